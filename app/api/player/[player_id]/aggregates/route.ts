@@ -0,0 +1,34 @@
+import { NextResponse } from 'next/server';
+import { supabase } from '@/lib/supabase';
+
+export async function GET(_request: Request, { params }: { params: Promise<{ player_id: string }> }) {
+  const { player_id } = await params;
+
+  if (!player_id) {
+    return NextResponse.json({ error: 'Player ID is required' }, { status: 400 });
+  }
+
+  try {
+    // One precomputed row (python_scripts/player_aggregates.py) instead of the player's whole game history
+    const { data, error } = await supabase
+      .from('player_aggregates')
+      .select('games_played, last_game_date, career, seasons, splits, form, consistency, updated_at')
+      .eq('player_id', player_id)
+      .maybeSingle();
+
+    if (error) {
+      console.error('Error fetching player aggregates:', error);
+      throw new Error(error.message);
+    }
+
+    if (!data) {
+      return NextResponse.json({ error: 'No aggregates for this player' }, { status: 404 });
+    }
+
+    return NextResponse.json(data);
+
+  } catch (error) {
+    console.error(`Error fetching aggregates for player ${player_id}:`, error);
+    return NextResponse.json({ error: `Failed to fetch aggregates for player ${player_id}` }, { status: 500 });
+  }
+}
@@ -9,7 +9,23 @@ export async function GET(_request: Request, { params }: { params: Promise<{ pla
   }
 
   try {
-    // Fetch player's full name and all their seasonal stats
+    // Fetch player's full name and league first, so the stats query only scans that league's partition
+    const { data: player_data, error: player_error } = await supabase
+      .from('players')
+      .select('full_name, league')
+      .eq('player_id', player_id)
+      .maybeSingle();
+
+    if (player_error) {
+      console.error('Error fetching player details:', player_error);
+      throw new Error(player_error.message);
+    }
+
+    if (!player_data) {
+      return NextResponse.json({ error: 'Player not found' }, { status: 404 });
+    }
+
+    // Fetch all of the player's seasonal stats
     const { data: player_stats, error: stats_error } = await supabase
       .from('player_stats_by_season')
       .select(`
@@ -46,6 +62,7 @@ export async function GET(_request: Request, { params }: { params: Promise<{ pla
         three_pointers_made_z_score,
         free_throw_pct_z_score
       `)
+      .eq('league', player_data.league)
       .eq('player_id', player_id);
 
     if (stats_error) {
@@ -57,22 +74,6 @@ export async function GET(_request: Request, { params }: { params: Promise<{ pla
       return NextResponse.json({ error: 'Player not found' }, { status: 404 });
     }
 
-    // Fetch player's full name
-    const { data: player_data, error: player_error } = await supabase
-      .from('players')
-      .select('full_name')
-      .eq('player_id', player_id)
-      .single();
-
-    if (player_error) {
-      console.error('Error fetching player details:', player_error);
-      throw new Error(player_error.message);
-    }
-
-    if (!player_data) {
-      return NextResponse.json({ error: 'Player not found' }, { status: 404 });
-    }
-
     return NextResponse.json({ ...player_data, player_stats });
 
   } catch (error) {
@@ -0,0 +1,47 @@
+import { NextResponse } from 'next/server';
+import { supabase } from '@/lib/supabase';
+
+export async function GET(request: Request, { params }: { params: Promise<{ player_id: string }> }) {
+  const { player_id } = await params;
+
+  if (!player_id) {
+    return NextResponse.json({ error: 'Player ID is required' }, { status: 400 });
+  }
+
+  const topN = Number(new URL(request.url).searchParams.get('top') ?? '5') || 5;
+
+  try {
+    // Contributions are precomputed by predict_risers_fallers.py for every predicted player
+    const { data, error } = await supabase
+      .from('player_prediction_contributions')
+      .select('season, swish_score, predicted_swish_score, riser_faller_score, base_value, contributions')
+      .eq('player_id', player_id)
+      .order('season', { ascending: false })
+      .limit(1)
+      .maybeSingle();
+
+    if (error) {
+      console.error('Error fetching prediction contributions:', error);
+      throw new Error(error.message);
+    }
+
+    if (!data) {
+      return NextResponse.json({ error: 'No prediction found for player' }, { status: 404 });
+    }
+
+    const { contributions, ...prediction } = data;
+    const sorted = Object.entries(contributions as Record<string, number>)
+      .map(([feature, contribution]) => ({ feature, contribution }))
+      .sort((a, b) => b.contribution - a.contribution);
+
+    return NextResponse.json({
+      ...prediction,
+      pushing_higher: sorted.slice(0, topN).filter(d => d.contribution > 0),
+      pushing_lower: sorted.slice(-topN).reverse().filter(d => d.contribution < 0),
+    });
+
+  } catch (error) {
+    console.error(`Error fetching prediction drivers for player ${player_id}:`, error);
+    return NextResponse.json({ error: `Failed to fetch prediction drivers for player ${player_id}` }, { status: 500 });
+  }
+}
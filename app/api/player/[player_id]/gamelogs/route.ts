@@ -1,19 +1,27 @@
-import { NextResponse } from 'next/server';
+import { NextRequest, NextResponse } from 'next/server';
 import { supabase } from '@/lib/supabase';
 
-export async function GET(_request: Request, { params }: { params: Promise<{ player_id: string }> }) {
+const DEFAULT_LIMIT = 20;
+const MAX_LIMIT = 200;
+
+export async function GET(request: NextRequest, { params }: { params: Promise<{ player_id: string }> }) {
   const { player_id } = await params;
 
   if (!player_id) {
     return NextResponse.json({ error: 'Player ID is required' }, { status: 400 });
   }
 
+  // Only the most recent games; career and split aggregates come from /aggregates
+  const requested = parseInt(request.nextUrl.searchParams.get('limit') || '', 10);
+  const limit = Number.isNaN(requested) ? DEFAULT_LIMIT : Math.min(Math.max(requested, 1), MAX_LIMIT);
+
   try {
     const { data, error } = await supabase
       .from('game_logs')
-      .select('*')
+      .select('game_date, opponent, win_loss, minutes_played, points, rebounds, assists, steals, blocks, turnovers')
       .eq('player_id', player_id)
-      .order('game_date', { ascending: false });
+      .order('game_date', { ascending: false })
+      .limit(limit);
 
     if (error) {
       console.error('Error fetching game logs:', error);
@@ -1,4 +1,4 @@
-import { NextResponse } from 'next/server';
+import { NextRequest, NextResponse } from 'next/server';
 import { createClient } from '@supabase/supabase-js';
 
 const supabaseUrl = process.env.NEXT_PUBLIC_SUPABASE_URL;
@@ -10,8 +10,10 @@ if (!supabaseUrl || !supabaseAnonKey) {
 
 const supabase = createClient(supabaseUrl, supabaseAnonKey);
 
-export async function GET() {
+export async function GET(request: NextRequest) {
   try {
+    const scenario = request.nextUrl.searchParams.get('scenario') || 'baseline';
+
     // Fetch projections and join with player names
     const { data, error } = await supabase
       .from('player_projections')
@@ -19,6 +21,7 @@ export async function GET() {
         *,
         players:player_id (full_name)
       `)
+      .eq('scenario', scenario)
       .order('swish_score', { ascending: false });
 
     if (error) {
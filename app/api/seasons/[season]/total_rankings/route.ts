@@ -1,78 +1,155 @@
-import { NextResponse } from 'next/server';
+import { NextRequest, NextResponse } from 'next/server';
+import { gunzipSync } from 'zlib';
 import { supabase } from '@/lib/supabase';
 
-export async function GET(_request: Request, { params }: { params: Promise<{ season: string }> }) {
+// Published by python_scripts/snapshots.py after every pipeline run
+const SNAPSHOT_BUCKET = 'ranking-snapshots';
+// A snapshot's path changes whenever its content does, so a cached copy never goes stale
+const SNAPSHOT_CACHE_LIMIT = 64;
+const snapshotCache = new Map<string, ArrayBuffer>();
+
+async function loadSnapshot(path: string): Promise<ArrayBuffer> {
+  const cached = snapshotCache.get(path);
+  if (cached) {
+    return cached;
+  }
+
+  const { data } = supabase.storage.from(SNAPSHOT_BUCKET).getPublicUrl(path);
+  const response = await fetch(data.publicUrl);
+  if (!response.ok) {
+    throw new Error(`Snapshot ${path} returned ${response.status}`);
+  }
+  const payload = await response.arrayBuffer();
+
+  if (snapshotCache.size >= SNAPSHOT_CACHE_LIMIT) {
+    // Evict the oldest entry
+    snapshotCache.delete(snapshotCache.keys().next().value as string);
+  }
+  snapshotCache.set(path, payload);
+  return payload;
+}
+
+function matchesETag(request: NextRequest, etag: string) {
+  const ifNoneMatch = request.headers.get('if-none-match');
+  if (!ifNoneMatch) {
+    return false;
+  }
+  return ifNoneMatch.split(',').some(tag => tag.trim().replace(/^W\//, '') === etag);
+}
+
+// Used until the pipeline has published a snapshot for the season
+async function queryRankings(league: string, season: string) {
+  const { data, error } = await supabase
+    .from('player_stats_by_season')
+    .select(`
+      player_id,
+      season,
+      team,
+      player_age,
+      games_played,
+      avg_minutes,
+      points,
+      rebounds,
+      assists,
+      steals,
+      blocks,
+      turnovers,
+      swish_score,
+      usage_rate,
+      field_goals_made,
+      field_goal_attempts,
+      three_pointers_made,
+      three_point_attempts,
+      free_throws_made,
+      free_throw_attempts,
+      true_shooting_pct,
+      field_goal_pct,
+      free_throw_pct,
+      players ( full_name ),
+      points_z_score,
+      rebounds_z_score,
+      assists_z_score,
+      steals_z_score,
+      blocks_z_score,
+      turnovers_z_score,
+      field_goal_pct_z_score,
+      three_pointers_made_z_score,
+      free_throw_pct_z_score
+    `)
+    .eq('league', league)
+    .eq('season', season)
+    .order('swish_score', { ascending: false });
+
+  if (error) {
+    console.error('Error fetching data from Supabase:', error);
+    throw new Error(error.message);
+  }
+
+  if (!data) {
+    return [];
+  }
+
+  // The data from Supabase with a join is nested. We need to flatten it.
+  let ranked = 0;
+  return data.map(item => {
+    // The Supabase client infers the joined 'players' table as an object, but to be safe with types we handle it carefully.
+    const playerName = (item.players as any)?.full_name || 'Unknown Player';
+
+    // We create a new object, excluding the original 'players' nested object.
+    const { players, ...stats } = item;
+
+    return {
+      ...stats,
+      Player: playerName,
+      // Same ranks as the published snapshots: players without a swish score are unranked
+      rank: stats.swish_score === null ? null : ++ranked,
+    };
+  });
+}
+
+export async function GET(request: NextRequest, { params }: { params: Promise<{ season: string }> }) {
   const { season } = await params;
+  const league = request.nextUrl.searchParams.get('league') || 'nba';
 
   if (!season) {
     return NextResponse.json({ error: 'Season parameter is required' }, { status: 400 });
   }
 
   try {
-    const { data, error } = await supabase
-      .from('player_stats_by_season')
-      .select(`
-        player_id,
-        season,
-        team,
-        player_age,
-        games_played,
-        avg_minutes,
-        points,
-        rebounds,
-        assists,
-        steals,
-        blocks,
-        turnovers,
-        swish_score,
-        usage_rate,
-        field_goals_made,
-        field_goal_attempts,
-        three_pointers_made,
-        three_point_attempts,
-        free_throws_made,
-        free_throw_attempts,
-        true_shooting_pct,
-        field_goal_pct,
-        free_throw_pct,
-        players ( full_name ),
-        points_z_score,
-        rebounds_z_score,
-        assists_z_score,
-        steals_z_score,
-        blocks_z_score,
-        turnovers_z_score,
-        field_goal_pct_z_score,
-        three_pointers_made_z_score,
-        free_throw_pct_z_score
-      `)
+    // One primary-key lookup instead of the joined, sorted query
+    const { data: snapshot, error: snapshotError } = await supabase
+      .from('ranking_snapshots')
+      .select('version, path')
+      .eq('league', league)
       .eq('season', season)
-      .order('swish_score', { ascending: false });
+      .maybeSingle();
 
-    if (error) {
-      console.error('Error fetching data from Supabase:', error);
-      throw new Error(error.message);
-    }
+    if (snapshotError) {
+      console.error(`Error looking up the ranking snapshot for season ${season}:`, snapshotError);
+    } else if (snapshot) {
+      const etag = `"${snapshot.version}"`;
+      const headers: Record<string, string> = { ETag: etag, 'Cache-Control': 'public, max-age=0, must-revalidate' };
+
+      if (matchesETag(request, etag)) {
+        return new NextResponse(null, { status: 304, headers });
+      }
 
-    if (!data) {
-        return NextResponse.json([]);
+      try {
+        const payload = await loadSnapshot(snapshot.path);
+        headers['Content-Type'] = 'application/json';
+        headers['Vary'] = 'Accept-Encoding';
+        // The snapshot is stored gzipped, so most clients get it as-is
+        if (/\bgzip\b/.test(request.headers.get('accept-encoding') || '')) {
+          headers['Content-Encoding'] = 'gzip';
+          return new NextResponse(payload, { headers });
+        }
+        return new NextResponse(gunzipSync(new Uint8Array(payload)).toString('utf-8'), { headers });
+      } catch (error) {
+        console.error(`Error loading ranking snapshot ${snapshot.path}; querying the database instead:`, error);
+      }
     }
 
-    // The data from Supabase with a join is nested. We need to flatten it.
-    const flattenedData = data.map(item => {
-      // The Supabase client infers the joined 'players' table as an object, but to be safe with types we handle it carefully.
-      const playerName = (item.players as any)?.full_name || 'Unknown Player';
-      
-      // We create a new object, excluding the original 'players' nested object.
-      const { players, ...stats } = item;
-
-      return {
-        ...stats,
-        Player: playerName,
-      };
-    });
-
-    return NextResponse.json(flattenedData);
+    return NextResponse.json(await queryRankings(league, season));
 
   } catch (error) {
     console.error(`Error fetching rankings for season ${season}:`, error);
@@ -1,33 +1,43 @@
 import { createClient } from '@supabase/supabase-js';
-import { NextResponse } from 'next/server';
+import { NextRequest, NextResponse } from 'next/server';
+import { createHash } from 'crypto';
 
 // Initialize Supabase client
 const supabaseUrl = process.env.NEXT_PUBLIC_SUPABASE_URL!;
 const supabaseAnonKey = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!;
 const supabase = createClient(supabaseUrl, supabaseAnonKey);
 
-export async function GET() {
+// Returns the league's seasons, newest first. With ?details=1 each entry also carries its
+// row count, last refresh and ranking snapshot version, so clients can tell which cached
+// seasons are stale; the ETag changes whenever any of them does.
+export async function GET(request: NextRequest) {
   try {
-    // Fetch all season entries from the table
+    const league = request.nextUrl.searchParams.get('league') || 'nba';
+    const details = request.nextUrl.searchParams.get('details') === '1';
+
+    // One small row per season, kept current by the pipeline's upserts
     const { data, error } = await supabase
-      .from('player_stats_by_season')
-      .select('season');
+      .from('season_catalog')
+      .select('season, row_count, refreshed_at, snapshot_version')
+      .eq('league', league)
+      .gt('row_count', 0)
+      .order('season', { ascending: false });
 
     if (error) {
       throw error;
     }
 
-    if (!data) {
-        return NextResponse.json([], { status: 200 });
-    }
-
-    // Create a unique set of seasons from the fetched data
-    const seasons = [...new Set(data.map(item => item.season))];
+    const catalog = data || [];
+    const etag = `"${createHash('sha1').update(JSON.stringify(catalog)).digest('hex').slice(0, 16)}"`;
+    const headers = { ETag: etag, 'Cache-Control': 'public, max-age=0, must-revalidate' };
 
-    // Sort seasons descending
-    seasons.sort((a, b) => b.localeCompare(a));
+    const ifNoneMatch = request.headers.get('if-none-match');
+    if (ifNoneMatch && ifNoneMatch.split(',').some(tag => tag.trim().replace(/^W\//, '') === etag)) {
+      return new NextResponse(null, { status: 304, headers });
+    }
 
-    return NextResponse.json(seasons);
+    const body = details ? catalog : catalog.map(item => item.season);
+    return NextResponse.json(body, { headers });
   } catch (error) {
     console.error('Error fetching seasons from Supabase:', error);
     return NextResponse.json({ message: 'Error fetching seasons data' }, { status: 500 });
@@ -52,6 +52,28 @@ interface GameLog {
   turnovers: number;
 }
 
+// Per-game averages of a group of games, precomputed by python_scripts/player_aggregates.py
+interface GameSummary {
+  games: number;
+  minutes_played: number;
+  points: number;
+  rebounds: number;
+  assists: number;
+  steals: number;
+  blocks: number;
+  turnovers: number;
+}
+
+interface PlayerAggregates {
+  career: GameSummary;
+  splits: Record<string, GameSummary>;
+  form: Record<string, GameSummary>;
+}
+
+interface SummaryRow extends GameSummary {
+  season: string; // Row label, named to satisfy Table1's key constraint
+}
+
 // --- COMPONENT ---
 const PlayerPage = () => {
   const params = useParams();
@@ -59,6 +81,7 @@ const PlayerPage = () => {
 
   const [playerDetails, setPlayerDetails] = useState<PlayerDetails | null>(null);
   const [gameLogs, setGameLogs] = useState<GameLog[]>([]);
+  const [aggregates, setAggregates] = useState<PlayerAggregates | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -69,9 +92,10 @@ const PlayerPage = () => {
       setIsLoading(true);
       setError(null);
       try {
-        const [detailsRes, gameLogsRes] = await Promise.all([
+        const [detailsRes, gameLogsRes, aggregatesRes] = await Promise.all([
           fetch(`/api/player/${player_id}/details`),
-          fetch(`/api/player/${player_id}/gamelogs`)
+          fetch(`/api/player/${player_id}/gamelogs`),
+          fetch(`/api/player/${player_id}/aggregates`)
         ]);
 
         if (!detailsRes.ok || !gameLogsRes.ok) {
@@ -80,6 +104,8 @@ const PlayerPage = () => {
 
         const detailsData = await detailsRes.json();
         const gameLogsData = await gameLogsRes.json();
+        // Players without game logs have no aggregates; the summary is then left out
+        const aggregatesData = aggregatesRes.ok ? await aggregatesRes.json() : null;
 
         // Sort player stats by season chronologically
         if (detailsData && detailsData.player_stats) {
@@ -99,6 +125,7 @@ const PlayerPage = () => {
 
         setPlayerDetails(detailsData);
         setGameLogs(gameLogsWithKeys);
+        setAggregates(aggregatesData);
 
       } catch (err) {
         setError('Could not load player data.');
@@ -207,6 +234,38 @@ const PlayerPage = () => {
     { key: 'turnovers', label: 'TOV' },
   ];
 
+  const summaryColumns = [
+    { key: 'season', label: '' },
+    { key: 'games', label: 'GP' },
+    { key: 'minutes_played', label: 'MIN' },
+    { key: 'points', label: 'PTS' },
+    { key: 'rebounds', label: 'REB' },
+    { key: 'assists', label: 'AST' },
+    { key: 'steals', label: 'STL' },
+    { key: 'blocks', label: 'BLK' },
+    { key: 'turnovers', label: 'TOV' },
+  ];
+
+  // Form windows come from config.PLAYER_FORM_WINDOWS, keyed 'last_<N>'
+  const formWindows = Object.keys(aggregates?.form || {})
+    .map(key => ({ key, games: parseInt(key.replace('last_', ''), 10) }))
+    .sort((a, b) => a.games - b.games);
+
+  const summaryRows: SummaryRow[] = aggregates ? [
+    { label: 'Career', summary: aggregates.career },
+    ...formWindows.map(window => ({ label: `Last ${window.games}`, summary: aggregates.form[window.key] })),
+    { label: 'Home', summary: aggregates.splits?.home },
+    { label: 'Away', summary: aggregates.splits?.away },
+  ].filter(row => row.summary).map(row => ({ ...row.summary, season: row.label })) : [];
+
+  const renderSummaryCell = (row: SummaryRow, key: keyof SummaryRow | (string & {})) => {
+    const value = row[key as keyof SummaryRow];
+    if (typeof value !== 'number') {
+      return value;
+    }
+    return key === 'games' ? value.toFixed(0) : value.toFixed(1);
+  };
+
   const renderSeasonStatsCell = (stats: SeasonalStats, key: keyof SeasonalStats | (string & {})) => {
     const value = stats[key as keyof SeasonalStats];
 
@@ -256,7 +315,18 @@ const PlayerPage = () => {
         </div>
         <h1 className="text-4xl font-bold mb-6 text-center">{playerDetails.full_name}</h1>
 
-        <h2 className="text-2xl font-semibold mb-4">Per Game Season Stats</h2>
+        {summaryRows.length > 0 && (
+          <>
+            <h2 className="text-2xl font-semibold mb-4">Career, Form and Splits</h2>
+            <Table1<SummaryRow>
+              columns={summaryColumns}
+              data={summaryRows}
+              renderCell={renderSummaryCell}
+            />
+          </>
+        )}
+
+        <h2 className={`text-2xl font-semibold mb-4 ${summaryRows.length > 0 ? 'mt-8' : ''}`}>Per Game Season Stats</h2>
         <Table1
           columns={seasonStatsColumns}
           data={playerDetails.player_stats}
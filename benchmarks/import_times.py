@@ -0,0 +1,113 @@
+"""
+Startup import-time report for the pipeline and predmodel entry points.
+
+Each entry point is started in a fresh interpreter with `python -X importtime`, on its
+cheapest code path (`--help`, or no arguments for get_nba_id.py), so the report shows
+what a script imports before it does any work. For every script it prints the total
+startup time and the slowest top-level imports by cumulative time.
+
+Usage:
+    python benchmarks/import_times.py                       # every entry point
+    python benchmarks/import_times.py --scripts seed.py     # scripts whose path contains 'seed.py'
+    python benchmarks/import_times.py --top 5 --tree        # show nested imports too
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCHMARK_DIR, '..'))
+
+# (script relative to the repo root, arguments for its cheapest code path)
+ENTRY_POINTS = [
+    ('python_scripts/get_nba_id.py', []),
+    ('python_scripts/run_pipeline.py', ['--help']),
+    ('python_scripts/fetch_game_logs.py', ['--help']),
+    ('python_scripts/seed.py', []),
+    ('predmodel/train_model.py', ['--help']),
+    ('predmodel/predict_player_stats.py', ['--help']),
+    ('predmodel/predict_risers_fallers.py', ['--help']),
+    ('predmodel/train_game_model.py', ['--help']),
+    ('predmodel/backtest.py', ['--help']),
+]
+
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        list: (module, self microseconds, cumulative microseconds, nesting depth) in
+            the order the imports finished.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+            imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return imports
+
+
+def _last_message(stderr):
+    messages = [line for line in stderr.splitlines() if line.strip() and not line.startswith('import time:')]
+    return messages[-1] if messages else ''
+
+
+def measure_entry_point(script, args):
+    """
+    Runs one entry point under `-X importtime`.
+
+    Returns:
+        dict: Wall-clock startup seconds, exit code and the parsed imports.
+    """
+    path = os.path.join(REPO_ROOT, script)
+    # Keep the measured runs from appending to the metrics file
+    env = dict(os.environ, PIPELINE_METRICS_FILE='')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', path, *args], cwd=os.path.dirname(path),
+                            env=env, capture_output=True, text=True)
+    return {
+        'seconds': time.perf_counter() - start,
+        'returncode': result.returncode,
+        'imports': parse_importtime(result.stderr),
+        'message': _last_message(result.stderr) if result.returncode != 0 else None,
+    }
+
+
+def print_report(script, measurement, top, tree):
+    imports = measurement['imports']
+    total_ms = sum(cumulative for _, _, cumulative, depth in imports if depth == 0) / 1000
+    print(f"\n{script}: {measurement['seconds']:.2f}s startup, {total_ms:.0f}ms importing "
+          f"{len(imports)} modules")
+    if measurement['returncode'] != 0:
+        print(f"  (exited with {measurement['returncode']}: {measurement['message']})")
+    shown = imports if tree else [entry for entry in imports if entry[3] == 0]
+    for name, _, cumulative, depth in sorted(shown, key=lambda entry: entry[2], reverse=True)[:top]:
+        indent = '  ' * depth if tree else ''
+        print(f"  {cumulative / 1000:>8.1f}ms  {indent}{name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the startup import time of each entry point.")
+    parser.add_argument('--scripts', nargs='*', default=None,
+                        help="Only measure entry points whose path contains one of these strings.")
+    parser.add_argument('--top', type=int, default=10, help="Slowest imports to list per script.")
+    parser.add_argument('--tree', action='store_true', help="Include nested imports, not only top-level ones.")
+    args = parser.parse_args()
+
+    entry_points = [(script, script_args) for script, script_args in ENTRY_POINTS
+                    if not args.scripts or any(pattern in script for pattern in args.scripts)]
+    print("--- Startup Import Times ---")
+    for script, script_args in entry_points:
+        print_report(script, measure_entry_point(script, script_args), args.top, args.tree)
+
+
+if __name__ == '__main__':
+    main()
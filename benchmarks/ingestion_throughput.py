@@ -0,0 +1,253 @@
+"""
+Ingestion throughput benchmark: threaded vs asyncio pipeline against a local stub server.
+
+A stub server on localhost stands in for both upstreams: it serves
+LeagueDashPlayerStats responses built from synthetic_league data and the PostgREST
+endpoints seed.py writes to (players, upsert_player_stats), adding a fixed latency
+to every response. The real nba_api and Supabase clients are pointed at it, and the
+same league is ingested by each pipeline mode in turn:
+
+    batch    run_pipeline.main()                 threads fetch, then one seeding pass
+    stream   run_pipeline.main_streaming()       threads, one season at a time
+    async    async_pipeline.main_async()         one event loop
+
+For each mode it reports wall time, requests and requests per second, the connections
+the server accepted, the peak thread count and the rows stored, and checks that every
+mode stored the same rows.
+
+Usage:
+    python benchmarks/ingestion_throughput.py                              # 30 seasons, 50 ms latency
+    python benchmarks/ingestion_throughput.py --seasons 100 --latency-ms 120
+    python benchmarks/ingestion_throughput.py --modes stream async --stats-requests 64 --db-requests 128
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from urllib.parse import urlsplit, parse_qsl
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCHMARK_DIR, '..'))
+# Only python_scripts: these modules import its config
+sys.path[:0] = [BENCHMARK_DIR, os.path.join(REPO_ROOT, 'python_scripts')]
+# Benchmarks must not append to the pipeline metrics file
+os.environ.setdefault('PIPELINE_METRICS_FILE', '')
+
+import synthetic_league
+
+MODES = ['batch', 'stream', 'async']
+STUB_KEY = 'eyJhbGciOiJIUzI1NiJ9.e30.stub'  # Any JWT-shaped string; the stub does not check it
+
+# synthetic_league's columns back to the LeagueDashPlayerStats names the pipeline fetches
+RAW_COLUMNS = {
+    'PlayerID': 'PLAYER_ID', 'PlayerName': 'PLAYER_NAME', 'Team': 'TEAM_ABBREVIATION', 'PlayerAge': 'AGE',
+    'GamesPlayed': 'GP', 'AvgMinutes': 'MIN', 'Points': 'PTS', 'Rebounds': 'REB', 'Assists': 'AST',
+    'Steals': 'STL', 'Blocks': 'BLK', 'Turnovers': 'TOV', 'FieldGoalPct': 'FG_PCT', 'FreeThrowPct': 'FT_PCT',
+    'ThreePointPct': 'FG3_PCT', 'ThreePointersMade': 'FG3M', 'ThreePointAttempts': 'FG3A',
+    'FieldGoalsMade': 'FGM', 'FieldGoalAttempts': 'FGA', 'FreeThrowsMade': 'FTM', 'FreeThrowAttempts': 'FTA',
+    'TrueShootingPct': 'TS_PCT', 'UsageRate': 'USG_PCT',
+}
+ADVANCED_ONLY = ['TS_PCT', 'USG_PCT']
+
+
+def _result_set(df):
+    df = df.astype(object).where(df.notna(), None)
+    return {'resultSets': [{'name': 'LeagueDashPlayerStats', 'headers': list(df.columns),
+                            'rowSet': df.values.tolist()}]}
+
+
+def _in_values(value):
+    """Parses a PostgREST `in.(a,"b c")` filter value."""
+    return next(csv.reader([value[len('in.('):-1]]))
+
+
+class StubServer:
+    """
+    HTTP/1.1 keep-alive server for the NBA stats and PostgREST endpoints, on its own thread.
+
+    Every response waits `latency` seconds without blocking other requests, like a
+    remote upstream would.
+    """
+
+    def __init__(self, raw_df, latency):
+        self.latency = latency
+        self.stats = {season: _result_set(frame.drop(columns=['Season']).rename(columns=RAW_COLUMNS))
+                      for season, frame in raw_df.groupby('Season')}
+        self.player_ids = {}
+        self.reset()
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        threading.Thread(target=self._serve, args=(started,), daemon=True).start()
+        started.wait()
+
+    def reset(self):
+        self.requests = 0
+        self.connections = {'stats': 0, 'rest': 0}
+        self.stored = {}
+
+    def _serve(self, started):
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(asyncio.start_server(self._handle, '127.0.0.1', 0, backlog=1024))
+        self.port = server.sockets[0].getsockname()[1]
+        started.set()
+        self.loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        counted = False
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode().split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, value = line.decode().split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                url = urlsplit(target)
+                if not counted:
+                    self.connections['stats' if url.path.startswith('/stats/') else 'rest'] += 1
+                    counted = True
+                self.requests += 1
+                await asyncio.sleep(self.latency)
+                status, payload = self._route(method, url, body)
+                data = json.dumps(payload).encode()
+                writer.write(b'HTTP/1.1 %d OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n'
+                             % (status, len(data)) + data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _route(self, method, url, body):
+        params = dict(parse_qsl(url.query))
+        if url.path.startswith('/stats/'):
+            result = self.stats.get(params.get('Season'))
+            if result is None:
+                return 400, {'Message': 'Unknown season'}
+            if params.get('MeasureType') == 'Base':
+                result_set = result['resultSets'][0]
+                keep = [i for i, header in enumerate(result_set['headers']) if header not in ADVANCED_ONLY]
+                result = {'resultSets': [{'name': result_set['name'],
+                                          'headers': [result_set['headers'][i] for i in keep],
+                                          'rowSet': [[row[i] for i in keep] for row in result_set['rowSet']]}]}
+            return 200, result
+
+        if url.path == '/rest/v1/players' and method == 'POST':
+            rows = json.loads(body)
+            for row in rows:
+                row['player_id'] = self.player_ids.setdefault((row['league'], row['full_name']), len(self.player_ids) + 1)
+            return 201, rows
+        if url.path == '/rest/v1/players' and method == 'GET':
+            league = params['league'][len('eq.'):]
+            return 200, [{'player_id': self.player_ids[(league, name)], 'full_name': name}
+                         for name in _in_values(params['full_name']) if (league, name) in self.player_ids]
+        if url.path == '/rest/v1/rpc/upsert_player_stats' and method == 'POST':
+            rows = json.loads(body)['p_rows']
+            for row in rows:
+                # Serialized, so rows compare equal across runs even with NaN values
+                self.stored[(row['league'], row['player_id'], row['season'])] = json.dumps(row, sort_keys=True)
+            return 200, len(rows)
+        return 404, {'message': f'No stub for {method} {url.path}'}
+
+
+class ThreadSampler:
+    """Records the peak number of live threads while it runs."""
+
+    def __enter__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(0.005):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_mode(mode, args):
+    import db_connector
+    import run_pipeline
+
+    # Drop the clients an earlier mode left connected, so every mode opens its own connections
+    for client in db_connector._clients.values():
+        client.postgrest.session.close()
+    db_connector._clients.clear()
+
+    if mode == 'batch':
+        return run_pipeline.main(None, 'nba')
+    if mode == 'stream':
+        return run_pipeline.main_streaming(None, args.max_seasons_in_flight, 'nba')
+    from async_pipeline import main_async
+    return asyncio.run(main_async(None, args.max_seasons_in_flight, 'nba', args.stats_requests, args.db_requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seasons', type=int, default=30, help="Seasons to ingest (default: %(default)s).")
+    parser.add_argument('--scale', type=float, default=1, help="Multiple of the current league size.")
+    parser.add_argument('--latency-ms', type=float, default=50, help="Stub server latency per request.")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--max-seasons-in-flight', type=int, default=16,
+                        help="Seasons in flight in the stream and async modes (default: %(default)s).")
+    parser.add_argument('--stats-requests', type=int, default=32, help="NBA API requests in flight in async mode.")
+    parser.add_argument('--db-requests', type=int, default=64, help="Supabase requests in flight in async mode.")
+    parser.add_argument('--verbose', action='store_true', help="Show the pipeline's own output.")
+    args = parser.parse_args()
+
+    seasons = [f"{year}-{str(year + 1)[-2:]}" for year in range(2025 - args.seasons, 2025)]
+    raw_df = synthetic_league.generate_raw_player_stats(args.scale, seasons=seasons)
+    server = StubServer(raw_df, args.latency_ms / 1000)
+
+    # Point the real clients at the stub
+    os.environ['NEXT_PUBLIC_SUPABASE_URL'] = f'http://127.0.0.1:{server.port}'
+    os.environ['NEXT_PUBLIC_SUPABASE_ANON_KEY'] = STUB_KEY
+    os.environ['SUPABASE_SERVICE_KEY'] = STUB_KEY
+    from nba_api.stats.library.http import NBAStatsHTTP
+    import config
+    NBAStatsHTTP.base_url = f'http://127.0.0.1:{server.port}/stats/{{endpoint}}'
+    config.REQUEST_DELAY = 0
+    config.LEAGUES['nba']['seasons'] = seasons
+    # Only ingestion is measured; the stub has no storage API for the ranking snapshots
+    import snapshots
+    snapshots.publish_ranking_snapshots = lambda league, seasons=None: True
+
+    print(f"Ingesting {len(raw_df)} player seasons over {len(seasons)} seasons "
+          f"with {args.latency_ms:.0f} ms of latency per request.\n")
+    print(f"{'mode':<8}{'ok':>4}{'wall s':>9}{'requests':>10}{'req/s':>9}{'api conn':>10}{'db conn':>9}"
+          f"{'threads':>9}{'rows':>8}")
+    stored = {}
+    for mode in args.modes:
+        server.reset()
+        with ThreadSampler() as threads, redirect_stdout(sys.stdout if args.verbose else open(os.devnull, 'w')):
+            start = time.perf_counter()
+            ok = run_mode(mode, args)
+            seconds = time.perf_counter() - start
+        stored[mode] = server.stored
+        print(f"{mode:<8}{'yes' if ok else 'no':>4}{seconds:>9.2f}{server.requests:>10}{server.requests / seconds:>9.0f}"
+              f"{server.connections['stats']:>10}{server.connections['rest']:>9}{threads.peak:>9}{len(server.stored):>8}")
+
+    first = args.modes[0]
+    mismatched = [mode for mode in args.modes if stored[mode] != stored[first]]
+    print(f"\nStored rows {'differ: ' + ', '.join(mismatched) if mismatched else 'match'} across modes.")
+    return 1 if mismatched else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
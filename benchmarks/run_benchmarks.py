@@ -0,0 +1,274 @@
+"""
+Offline benchmark suite for the data pipeline and the projection models.
+
+Every benchmark runs on synthetic_league data at a multiple of the current league
+size, so no Supabase or NBA API access is needed. Micro-benchmarks time one stage
+(z-scores, fantasy scores, each feature function, training, inference, simulation);
+macro-benchmarks time a chain of stages end to end.
+
+Results are compared against a saved baseline, and a benchmark whose median time is
+more than `--threshold` slower than its baseline is flagged as a regression (the
+exit status is 1 if any are).
+
+Usage:
+    python benchmarks/run_benchmarks.py                        # all benchmarks at 1x and 10x
+    python benchmarks/run_benchmarks.py --scales 1 10 100      # include 100x
+    python benchmarks/run_benchmarks.py --filter features      # names containing 'features'
+    python benchmarks/run_benchmarks.py --save-baseline        # record the results as the baseline
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from functools import lru_cache
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCHMARK_DIR, '..'))
+# predmodel first so its config is the one imported; python_scripts modules don't use config
+sys.path[:0] = [BENCHMARK_DIR, os.path.join(REPO_ROOT, 'predmodel'), os.path.join(REPO_ROOT, 'python_scripts')]
+# Benchmarks must not append to the pipeline metrics file
+os.environ.setdefault('PIPELINE_METRICS_FILE', '')
+
+import numpy as np
+import xgboost as xgb
+
+import synthetic_league
+from process_and_calculate_z_scores import process_and_calc_zscores
+from calculate_total_fantasy_scores import calculate_fantasy_scores
+import feature_engineering as fe
+from train_model import prepare_data_for_modeling
+from simulate_projections import simulate_projections
+from train_game_model import build_game_features, write_training_shards
+from config import STATS_TO_PROJECT
+
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baselines', 'baseline.json')
+DEFAULT_SCALES = [1, 10]
+DEFAULT_THRESHOLD = 0.25      # Allowed slowdown over the baseline median
+NOISE_FLOOR_SECONDS = 0.005   # Differences below this are never flagged
+TRAIN_ROUNDS = 50
+TRAIN_PARAMS = {'objective': 'reg:squarederror', 'tree_method': 'hist', 'max_depth': 5, 'eta': 0.1, 'seed': 42}
+
+
+# --- Data, generated once per scale and shared by the benchmarks ---
+
+@lru_cache(maxsize=None)
+def raw_stats(scale):
+    return synthetic_league.generate_raw_player_stats(scale)
+
+
+@lru_cache(maxsize=None)
+def player_stats(scale):
+    with redirect_stdout(None):
+        return synthetic_league.to_player_stats_frame(raw_stats(scale))
+
+
+@lru_cache(maxsize=None)
+def modeling_data(scale):
+    with redirect_stdout(None):
+        df_model, features, targets = prepare_data_for_modeling(fe.engineer_features(player_stats(scale)), STATS_TO_PROJECT)
+    X = np.ascontiguousarray(df_model[features].to_numpy(dtype=np.float32))
+    y = np.ascontiguousarray(df_model[targets].to_numpy(dtype=np.float32))
+    return df_model, features, X, y
+
+
+@lru_cache(maxsize=None)
+def trained_boosters(scale):
+    _, features, X, y = modeling_data(scale)
+    dtrain = xgb.QuantileDMatrix(X, label=y[:, 0], feature_names=features)
+    boosters = []
+    for target_idx in range(y.shape[1]):
+        dtrain.set_label(y[:, target_idx])
+        boosters.append(xgb.train(TRAIN_PARAMS, dtrain, num_boost_round=TRAIN_ROUNDS))
+    return boosters
+
+
+@lru_cache(maxsize=None)
+def game_log_chunks(scale):
+    return list(synthetic_league.iter_game_logs(player_stats(scale)))
+
+
+def _residual_covariance(n_stats):
+    rng = np.random.default_rng(0)
+    a = rng.normal(0, 0.3, (n_stats, n_stats))
+    return a @ a.T + 0.1 * np.eye(n_stats)
+
+
+def _train_all_targets(features, X, y):
+    dtrain = xgb.QuantileDMatrix(X, label=y[:, 0], feature_names=features)
+    for target_idx in range(y.shape[1]):
+        dtrain.set_label(y[:, target_idx])
+        xgb.train(TRAIN_PARAMS, dtrain, num_boost_round=TRAIN_ROUNDS)
+
+
+def _pipeline_processing(raw_df):
+    return calculate_fantasy_scores(process_and_calc_zscores(raw_df))
+
+
+def _projection_end_to_end(stats_df):
+    df_model, features, targets = prepare_data_for_modeling(fe.engineer_features(stats_df), STATS_TO_PROJECT)
+    latest = df_model[df_model['season'] == df_model['season'].max()]
+    X = np.ascontiguousarray(df_model[features].to_numpy(dtype=np.float32))
+    y = df_model[targets].to_numpy(dtype=np.float32)
+    dtrain = xgb.QuantileDMatrix(X, label=y[:, 0], feature_names=features)
+    X_latest = np.ascontiguousarray(latest[features].to_numpy(dtype=np.float32))
+    for target_idx in range(y.shape[1]):
+        dtrain.set_label(y[:, target_idx])
+        xgb.train(TRAIN_PARAMS, dtrain, num_boost_round=TRAIN_ROUNDS).inplace_predict(X_latest)
+
+
+def _write_game_shards(chunks, shard_dir):
+    # write_training_shards tags each chunk, so give it fresh copies
+    write_training_shards((chunk.copy() for chunk in chunks), shard_dir)
+
+
+# --- Benchmark definitions ---
+# Each entry: name -> (kind, setup(scale) -> args, fn(*args), max_scale).
+# setup runs before every repeat and is not timed; fn is timed.
+
+BENCHMARKS = {
+    'z_scores': ('micro', lambda s: (raw_stats(s).copy(),), process_and_calc_zscores, None),
+    'fantasy_scores': ('micro', lambda s: (copy.deepcopy(process_and_calc_zscores(raw_stats(s))),),
+                       calculate_fantasy_scores, None),
+    'features.per_minute': ('micro', lambda s: (player_stats(s).copy(),), fe.create_per_minute_stats, None),
+    'features.yoy': ('micro', lambda s: (player_stats(s).copy(),), fe.create_yoy_stats, None),
+    'features.age_experience': ('micro', lambda s: (player_stats(s).copy(),), fe.create_age_and_experience_features, None),
+    'features.team_context': ('micro', lambda s: (player_stats(s).copy(),), fe.create_team_context_features, None),
+    'features.engineer_all': ('micro', lambda s: (player_stats(s).copy(),), fe.engineer_features, None),
+    'prepare_data': ('micro', lambda s: (fe.engineer_features(player_stats(s).copy()), STATS_TO_PROJECT),
+                     prepare_data_for_modeling, None),
+    'train.single_target': ('micro', lambda s: modeling_data(s)[1:],
+                            lambda features, X, y: _train_all_targets(features, X, y[:, :1]), None),
+    'inference.all_targets': ('micro', lambda s: (trained_boosters(s), modeling_data(s)[2]),
+                              lambda boosters, X: [b.inplace_predict(X) for b in boosters], None),
+    'inference.contributions': ('micro', lambda s: (trained_boosters(s)[0], xgb.DMatrix(modeling_data(s)[2], feature_names=modeling_data(s)[1])),
+                                lambda booster, dmatrix: booster.predict(dmatrix, pred_contribs=True), None),
+    'simulation.1000_draws': ('micro', lambda s: (modeling_data(s)[0].drop_duplicates('player_id', keep='last'),
+                                                  _residual_covariance(len(STATS_TO_PROJECT))),
+                              lambda df, cov: simulate_projections(df, cov, n_draws=1000), None),
+    'game_features.chunk': ('micro', lambda s: (game_log_chunks(s)[0].copy(),), build_game_features, 10),
+    'macro.pipeline_processing': ('macro', lambda s: (raw_stats(s).copy(),), _pipeline_processing, None),
+    'macro.train_all_targets': ('macro', lambda s: modeling_data(s)[1:], _train_all_targets, None),
+    'macro.projection_end_to_end': ('macro', lambda s: (player_stats(s).copy(),), _projection_end_to_end, None),
+    'macro.game_shards': ('macro', lambda s: (game_log_chunks(s), os.path.join(tempfile.gettempdir(), 'benchmark_game_shards')),
+                          _write_game_shards, 10),
+}
+
+REPEATS = {'micro': 5, 'macro': 3}
+
+
+def run_benchmark(name, scale, repeats=None):
+    """
+    Times one benchmark at one scale.
+
+    Returns:
+        dict: 'median', 'min' and 'mean' seconds over the repeats, plus 'repeats'.
+    """
+    kind, setup, fn, _ = BENCHMARKS[name]
+    repeats = repeats or REPEATS[kind]
+    timings = []
+    with redirect_stdout(None):
+        # One untimed warm-up run so first-call costs (imports, allocator growth) are excluded
+        fn(*setup(scale))
+        for _ in range(repeats):
+            args = setup(scale)
+            start = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - start)
+    return {'median': statistics.median(timings), 'min': min(timings),
+            'mean': statistics.fmean(timings), 'repeats': repeats}
+
+
+def environment_info():
+    """Versions and hardware that baselines depend on."""
+    import pandas as pd
+    return {'machine': platform.node(), 'platform': platform.platform(), 'python': platform.python_version(),
+            'cpu_count': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'xgboost': xgb.__version__}
+
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Flags benchmarks whose median is more than `threshold` slower than the baseline.
+
+    Returns:
+        list: (key, baseline median, current median, relative change) for every regression.
+    """
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get('results', {}).get(key)
+        if previous is None:
+            continue
+        change = result['median'] / previous['median'] - 1
+        if change > threshold and result['median'] - previous['median'] > NOISE_FLOOR_SECONDS:
+            regressions.append((key, previous['median'], result['median'], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES,
+                        help="League size multiples to benchmark (default: %(default)s).")
+    parser.add_argument('--filter', default=None, help="Only run benchmarks whose name contains this string.")
+    parser.add_argument('--repeats', type=int, default=None, help="Override the number of timed repeats.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline file (default: %(default)s).")
+    parser.add_argument('--save-baseline', action='store_true', help="Save these results as the new baseline.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown flagged as a regression (default: %(default)s).")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter is None or args.filter in name]
+    scales = [int(scale) if float(scale).is_integer() else scale for scale in args.scales]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('environment', {}).get('machine') != platform.node():
+            print(f"Warning: baseline was recorded on {baseline.get('environment', {}).get('machine')}; "
+                  "timings may not be comparable.")
+
+    results = {}
+    print(f"{'benchmark':<32}{'scale':>7}{'median s':>11}{'min s':>10}{'baseline':>11}{'change':>9}")
+    for scale in scales:
+        for name in names:
+            max_scale = BENCHMARKS[name][3]
+            if max_scale is not None and scale > max_scale:
+                continue
+            key = f'{name}@{scale}x'
+            results[key] = run_benchmark(name, scale, args.repeats)
+
+            previous = baseline.get('results', {}).get(key)
+            previous_str = f"{previous['median']:.4f}" if previous else '-'
+            change_str = f"{results[key]['median'] / previous['median'] - 1:+.0%}" if previous else '-'
+            print(f"{name:<32}{scale:>6}x{results[key]['median']:>11.4f}{results[key]['min']:>10.4f}"
+                  f"{previous_str:>11}{change_str:>9}")
+
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for key, previous_median, median, change in regressions:
+            print(f"  {key}: {previous_median:.4f}s -> {median:.4f}s ({change:+.0%})")
+    elif baseline:
+        print("\nNo regressions against the baseline.")
+
+    if args.save_baseline:
+        # Keep results for benchmarks and scales that were not part of this run
+        merged = {**baseline.get('results', {}), **results}
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({'created_at': datetime.now(timezone.utc).isoformat(), 'environment': environment_info(),
+                       'results': merged}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Synthetic league generator for offline benchmarks.
+
+Produces frames shaped like the real pipeline's data at a multiple of its current size
+(about 165 qualifying players per season over 10 seasons, and their game logs):
+
+    generate_raw_player_stats(scale)   Like run_pipeline.fetch_player_data() output.
+    to_player_stats_frame(raw_df)      Like the player_stats_by_season table, built by
+                                       running the real z-score and fantasy stages.
+    iter_game_logs(player_stats_df)    Like the game_logs table, in (player_id, game_date)
+                                       order and yielded in bounded chunks.
+
+Players have multi-season careers with roster turnover and team changes, an age
+curve, and correlated stat lines (usage drives scoring, a position mix trades
+rebounds and blocks for assists and threes), so groupbys, merges and models see
+realistic cardinalities and signal. Everything is seeded and runs without network
+access.
+"""
+import numpy as np
+import pandas as pd
+
+BASE_PLAYERS_PER_SEASON = 165
+BASE_SEASONS = [f"{year}-{str(year + 1)[-2:]}" for year in range(2015, 2025)]
+TEAMS = ['ATL', 'BOS', 'BKN', 'CHA', 'CHI', 'CLE', 'DAL', 'DEN', 'DET', 'GSW', 'HOU', 'IND', 'LAC', 'LAL', 'MEM',
+         'MIA', 'MIL', 'MIN', 'NOP', 'NYK', 'OKC', 'ORL', 'PHI', 'PHX', 'POR', 'SAC', 'SAS', 'TOR', 'UTA', 'WAS']
+RETENTION_RATE = 0.8      # Share of a season's players who qualify again the next season
+TEAM_RETENTION_RATE = 0.75
+SEASON_START_DAY = '10-20'
+SEASON_DAYS = 170
+
+# Maps the pipeline's column names onto the player_stats_by_season columns (as seed.py does)
+PLAYER_STATS_COLUMNS = {
+    'PlayerAge': 'player_age', 'Team': 'team', 'GamesPlayed': 'games_played', 'AvgMinutes': 'avg_minutes',
+    'Points': 'points', 'Rebounds': 'rebounds', 'Assists': 'assists', 'Steals': 'steals', 'Blocks': 'blocks',
+    'Turnovers': 'turnovers', 'FieldGoalPct': 'field_goal_pct', 'FreeThrowPct': 'free_throw_pct',
+    'ThreePointPct': 'three_point_pct', 'ThreePointersMade': 'three_pointers_made', 'ThreePointAttempts': 'three_point_attempts',
+    'FieldGoalsMade': 'field_goals_made', 'FieldGoalAttempts': 'field_goal_attempts', 'FreeThrowsMade': 'free_throws_made',
+    'FreeThrowAttempts': 'free_throw_attempts', 'TrueShootingPct': 'true_shooting_pct', 'UsageRate': 'usage_rate',
+    'Points_ZScore': 'points_z_score', 'Rebounds_ZScore': 'rebounds_z_score', 'Assists_ZScore': 'assists_z_score',
+    'Steals_ZScore': 'steals_z_score', 'Blocks_ZScore': 'blocks_z_score', 'FieldGoalPct_ZScore': 'field_goal_pct_z_score',
+    'ThreePointersMade_ZScore': 'three_pointers_made_z_score', 'FreeThrowPct_ZScore': 'free_throw_pct_z_score',
+    'Turnovers_ZScore': 'turnovers_z_score', 'Swish_Score': 'swish_score', 'Overall_Rank': 'overall_rank',
+    'Season': 'season'
+}
+
+
+def _careers(n_per_season, seasons, rng):
+    """Simulates roster turnover; returns (player index, season index) pairs and per-player traits."""
+    n_seasons = len(seasons)
+    max_players = n_per_season * (1 + int(np.ceil((1 - RETENTION_RATE) * (n_seasons - 1) * 1.5)) + 1)
+    debut_age = rng.normal(24.5, 2.0, max_players).clip(19, 31)
+    skill = rng.normal(0, 1, max_players)
+    position = rng.beta(2, 2, max_players)        # 0 = guard, 1 = big
+    shooting = rng.normal(0, 1, max_players)
+
+    player_idx, season_idx, years = [], [], []
+    active = np.arange(n_per_season)
+    experience = np.zeros(max_players, dtype=np.int64)
+    next_player = n_per_season
+    for s in range(n_seasons):
+        player_idx.append(active)
+        season_idx.append(np.full(len(active), s))
+        years.append(experience[active].copy())
+        experience[active] += 1
+
+        # Older and weaker players drop out more often; replacements debut to keep the pool size
+        age = debut_age[active] + experience[active]
+        stay_prob = np.clip(RETENTION_RATE + 0.05 * skill[active] - 0.04 * np.maximum(age - 32, 0), 0.2, 0.97)
+        stayers = active[rng.random(len(active)) < stay_prob]
+        n_new = min(n_per_season - len(stayers), max_players - next_player)
+        active = np.concatenate([stayers, np.arange(next_player, next_player + n_new)])
+        next_player += n_new
+
+    traits = {'debut_age': debut_age, 'skill': skill, 'position': position, 'shooting': shooting}
+    return np.concatenate(player_idx), np.concatenate(season_idx), np.concatenate(years), traits
+
+
+def generate_raw_player_stats(scale=1, seasons=BASE_SEASONS, seed=0):
+    """
+    Generates qualifying player-season stat lines, like run_pipeline.fetch_player_data().
+
+    Args:
+        scale (float): Multiple of the current league size (players per season).
+        seasons (list): Season labels, oldest first.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: One row per player-season with the pipeline's PascalCase columns.
+    """
+    rng = np.random.default_rng(seed)
+    n_per_season = max(1, int(round(BASE_PLAYERS_PER_SEASON * scale)))
+    player_idx, season_idx, years, traits = _careers(n_per_season, seasons, rng)
+    n = len(player_idx)
+
+    age = np.floor(traits['debut_age'][player_idx] + years)
+    # Peak around 27, decline after 30
+    age_effect = -0.012 * (age - 27) ** 2
+    skill = traits['skill'][player_idx] + age_effect + rng.normal(0, 0.35, n)
+    position = traits['position'][player_idx]
+    shooting = traits['shooting'][player_idx] + rng.normal(0, 0.3, n)
+
+    minutes = np.clip(30.6 + 2.5 * skill + rng.normal(0, 1.5, n), 25.0, 38.5)
+    games = np.clip(np.round(66 + 6 * skill + rng.normal(0, 11, n)), 20, 82)
+    usage = np.clip(0.21 + 0.045 * skill + rng.normal(0, 0.025, n), 0.07, 0.40)
+
+    fga = np.clip(usage * minutes * 1.9 + rng.normal(0, 0.8, n), 3.0, None)
+    three_rate = np.clip(0.38 - 0.3 * (position - 0.5) + 0.05 * shooting + rng.normal(0, 0.06, n), 0.0, 0.75)
+    three_pa = fga * three_rate
+    three_pct = np.clip(0.355 + 0.02 * shooting + rng.normal(0, 0.03, n), 0.2, 0.5)
+    three_pm = three_pa * three_pct
+    two_pct = np.clip(0.52 + 0.06 * (position - 0.5) + rng.normal(0, 0.03, n), 0.38, 0.7)
+    fgm = three_pm + (fga - three_pa) * two_pct
+    fta = np.clip(fga * (0.27 + 0.06 * skill + rng.normal(0, 0.05, n)), 0.3, None)
+    ft_pct = np.clip(0.79 + 0.04 * shooting - 0.06 * (position - 0.5) + rng.normal(0, 0.04, n), 0.4, 0.95)
+    ftm = fta * ft_pct
+    points = 2 * fgm + three_pm + ftm
+
+    rebounds = np.clip(minutes * (0.1 + 0.22 * position) + rng.normal(0, 0.8, n), 1.5, None)
+    assists = np.clip(minutes * (0.2 - 0.17 * position) * (1 + 0.2 * skill) + rng.normal(0, 0.6, n), 0.3, None)
+    steals = np.clip(0.03 * minutes + 0.1 * skill + rng.normal(0, 0.2, n), 0.2, None)
+    blocks = np.clip(minutes * 0.06 * position ** 2 + rng.normal(0, 0.15, n), 0.0, None)
+    turnovers = np.clip(0.08 * usage * minutes + 0.2 * assists + rng.normal(0, 0.25, n), 0.4, None)
+    ts_pct = points / (2 * (fga + 0.44 * fta))
+
+    player_ids = 1_000_000 + player_idx
+    df = pd.DataFrame({
+        'PlayerID': player_ids,
+        'PlayerName': [f'Player {pid}' for pid in player_ids],
+        'Team': '',
+        'Season': np.asarray(seasons)[season_idx],
+        'PlayerAge': age.astype(np.int64),
+        'GamesPlayed': games.astype(np.int64),
+        'AvgMinutes': minutes.round(1),
+        'Points': points.round(1),
+        'Rebounds': rebounds.round(1),
+        'Assists': assists.round(1),
+        'Steals': steals.round(1),
+        'Blocks': blocks.round(1),
+        'Turnovers': turnovers.round(1),
+        'FieldGoalPct': (fgm / fga).round(3),
+        'FreeThrowPct': ft_pct.round(3),
+        'ThreePointPct': np.where(three_pa > 0, three_pct, 0.0).round(3),
+        'ThreePointersMade': three_pm.round(1),
+        'ThreePointAttempts': three_pa.round(1),
+        'FieldGoalsMade': fgm.round(1),
+        'FieldGoalAttempts': fga.round(1),
+        'FreeThrowsMade': ftm.round(1),
+        'FreeThrowAttempts': fta.round(1),
+        'TrueShootingPct': ts_pct.round(3),
+        'UsageRate': usage.round(3),
+    })
+
+    # Players mostly stay on their team from one season to the next
+    df = df.sort_values(['PlayerID', 'Season'], kind='stable').reset_index(drop=True)
+    is_first = df['PlayerID'].ne(df['PlayerID'].shift())
+    moves = is_first | (rng.random(len(df)) > TEAM_RETENTION_RATE)
+    team_idx = np.where(moves, rng.integers(0, len(TEAMS), len(df)), -1)
+    team_idx = pd.Series(team_idx).replace(-1, np.nan).ffill().astype(np.int64).to_numpy()
+    df['Team'] = np.asarray(TEAMS)[team_idx]
+
+    df['PlayerAge'] = df['PlayerAge'].astype('Int64')
+    return df.sort_values(['Season', 'PlayerID'], kind='stable').reset_index(drop=True)
+
+
+def to_player_stats_frame(raw_df):
+    """
+    Turns raw pipeline rows into player_stats_by_season rows by running the real
+    z-score and fantasy scoring stages, then renaming columns as seed.py does.
+    """
+    from process_and_calculate_z_scores import process_and_calc_zscores
+    from calculate_total_fantasy_scores import calculate_fantasy_scores
+
+    scored = calculate_fantasy_scores(process_and_calc_zscores(raw_df))
+    df = pd.concat(scored.values(), ignore_index=True)
+    df['player_id'] = 'p' + df['PlayerID'].astype(str)
+    cols = [col for col in PLAYER_STATS_COLUMNS if col in df.columns]
+    return df[cols + ['player_id']].rename(columns=PLAYER_STATS_COLUMNS)
+
+
+def iter_game_logs(player_stats_df, chunk_rows=100000, seed=0):
+    """
+    Generates game logs consistent with each player-season's averages.
+
+    Args:
+        player_stats_df (pd.DataFrame): Output of to_player_stats_frame.
+        chunk_rows (int): Approximate rows per yielded chunk.
+        seed (int): Random seed.
+
+    Yields:
+        pd.DataFrame: game_logs rows ordered by (player_id, game_date).
+    """
+    rng = np.random.default_rng(seed)
+    seasons = player_stats_df.sort_values(['player_id', 'season'], kind='stable').reset_index(drop=True)
+    count_stats = ['points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers', 'three_pointers_made',
+                   'field_goals_made', 'field_goal_attempts', 'free_throws_made', 'free_throw_attempts']
+    game_counts = seasons['games_played'].astype(np.int64).to_numpy()
+    bounds = np.concatenate([[0], np.cumsum(game_counts)])
+
+    start = 0
+    while start < len(seasons):
+        # End each chunk on a player boundary
+        end = int(np.searchsorted(bounds, bounds[start] + chunk_rows, side='right')) - 1
+        end = max(end, start + 1)
+        while end < len(seasons) and seasons['player_id'].iat[end] == seasons['player_id'].iat[end - 1]:
+            end += 1
+        block = seasons.iloc[start:end]
+        reps = game_counts[start:end]
+        n = int(reps.sum())
+
+        season_start = pd.to_datetime(block['season'].str[:4] + '-' + SEASON_START_DAY).to_numpy().repeat(reps)
+        # Spread each player's games over the season in order
+        offsets = np.concatenate([np.sort(rng.choice(SEASON_DAYS, size=k, replace=False)) for k in reps])
+        game_dates = pd.to_datetime(season_start) + pd.to_timedelta(offsets, unit='D')
+
+        team = block['team'].to_numpy().repeat(reps)
+        team_idx = pd.Index(TEAMS).get_indexer(team)
+        opponent = np.asarray(TEAMS)[(team_idx + rng.integers(1, len(TEAMS), n)) % len(TEAMS)]
+        home = rng.random(n) < 0.5
+        logs = pd.DataFrame({
+            'player_id': block['player_id'].to_numpy().repeat(reps),
+            'game_date': game_dates.strftime('%Y-%m-%d'),
+            'opponent': np.where(home, team + ' vs. ' + opponent, team + ' @ ' + opponent),
+            'win_loss': np.where(rng.random(n) < 0.5, 'W', 'L'),
+            'minutes_played': np.clip(block['avg_minutes'].to_numpy().repeat(reps) + rng.normal(0, 4, n), 5, 48).round(1),
+        })
+        for stat in count_stats:
+            logs[stat] = rng.poisson(np.clip(block[stat].to_numpy(dtype=np.float64).repeat(reps), 0, None))
+        logs['plus_minus'] = rng.normal(0, 9, n).round().astype(np.int64)
+
+        yield logs
+        start = end
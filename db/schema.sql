@@ -2,18 +2,24 @@
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
 -- Table for storing player information
+-- league is 'nba', 'wnba' or 'gleague'; names and stats API ids are only unique within a league
 CREATE TABLE players (
     player_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    full_name TEXT NOT NULL UNIQUE,
-    nba_player_id INT UNIQUE,
-    created_at TIMESTAMPTZ DEFAULT now()
+    league TEXT NOT NULL DEFAULT 'nba',
+    full_name TEXT NOT NULL,
+    nba_player_id INT, -- Player id in the stats API of the player's league
+    created_at TIMESTAMPTZ DEFAULT now(),
+    UNIQUE(league, full_name),
+    UNIQUE(league, nba_player_id)
 );
 
--- Table for storing player stats by season
+-- Table for storing player stats by season, partitioned by league so each league's
+-- queries only scan its own rows
 CREATE TABLE player_stats_by_season (
-    stat_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    stat_id UUID DEFAULT uuid_generate_v4(),
+    league TEXT NOT NULL DEFAULT 'nba',
     player_id UUID REFERENCES players(player_id) ON DELETE CASCADE,
-    season TEXT NOT NULL,
+    season TEXT NOT NULL, -- '2024-25'; single year for WNBA ('2024')
     player_age INT,
     team TEXT,
     games_played INT,
@@ -47,15 +53,140 @@ CREATE TABLE player_stats_by_season (
     swish_score FLOAT,
     overall_rank INT,
     created_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (league, stat_id),
     -- Ensure each player has only one entry per season
-    UNIQUE(player_id, season)
+    UNIQUE(league, player_id, season)
+) PARTITION BY LIST (league);
+
+CREATE TABLE player_stats_by_season_nba PARTITION OF player_stats_by_season FOR VALUES IN ('nba');
+CREATE TABLE player_stats_by_season_wnba PARTITION OF player_stats_by_season FOR VALUES IN ('wnba');
+CREATE TABLE player_stats_by_season_gleague PARTITION OF player_stats_by_season FOR VALUES IN ('gleague');
+
+-- Season listing for each league (the /api/seasons route), one row per season, so clients
+-- can list seasons and check whether their cached data is stale without scanning the stats.
+-- Maintained by upsert_player_stats in the same transaction as the rows it counts.
+CREATE TABLE season_catalog (
+    league TEXT NOT NULL,
+    season TEXT NOT NULL,
+    row_count INT NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now(), -- Last time any of the season's rows were upserted
+    snapshot_version TEXT, -- ranking_snapshots.version of the season's published rankings
+    PRIMARY KEY (league, season)
+);
+
+-- Counting a season's rows reads only that season
+CREATE INDEX player_stats_by_season_league_season_idx ON player_stats_by_season (league, season);
+
+-- Upserts a chunk of player_stats_by_season rows (a JSON array, as python_scripts/seed.py builds
+-- them) and refreshes the season_catalog entries of the seasons it touches, in one transaction.
+-- Returns the number of rows upserted.
+CREATE OR REPLACE FUNCTION upsert_player_stats(p_rows JSONB)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    upserted INT;
+BEGIN
+    -- Lock the catalog rows first, so concurrent chunks of one season count in turn
+    INSERT INTO season_catalog (league, season)
+    SELECT DISTINCT COALESCE(r->>'league', 'nba'), r->>'season'
+    FROM jsonb_array_elements(p_rows) AS r
+    ORDER BY 1, 2
+    ON CONFLICT (league, season) DO UPDATE SET refreshed_at = now();
+
+    INSERT INTO player_stats_by_season (
+        league, player_id, season,
+        player_age, team, games_played, avg_minutes, points, rebounds,
+        assists, steals, blocks, turnovers, field_goal_pct, free_throw_pct,
+        three_point_pct, three_pointers_made, three_point_attempts, field_goals_made, field_goal_attempts, free_throws_made,
+        free_throw_attempts, true_shooting_pct, usage_rate, points_z_score, rebounds_z_score, assists_z_score,
+        steals_z_score, blocks_z_score, field_goal_pct_z_score, three_pointers_made_z_score, free_throw_pct_z_score, turnovers_z_score,
+        swish_score, overall_rank
+    )
+    SELECT COALESCE(r.league, 'nba'), r.player_id, r.season,
+           r.player_age, r.team, r.games_played, r.avg_minutes, r.points, r.rebounds,
+           r.assists, r.steals, r.blocks, r.turnovers, r.field_goal_pct, r.free_throw_pct,
+           r.three_point_pct, r.three_pointers_made, r.three_point_attempts, r.field_goals_made, r.field_goal_attempts, r.free_throws_made,
+           r.free_throw_attempts, r.true_shooting_pct, r.usage_rate, r.points_z_score, r.rebounds_z_score, r.assists_z_score,
+           r.steals_z_score, r.blocks_z_score, r.field_goal_pct_z_score, r.three_pointers_made_z_score, r.free_throw_pct_z_score, r.turnovers_z_score,
+           r.swish_score, r.overall_rank
+    FROM jsonb_populate_recordset(NULL::player_stats_by_season, p_rows) AS r
+    ON CONFLICT (league, player_id, season) DO UPDATE SET
+        player_age = EXCLUDED.player_age,
+        team = EXCLUDED.team,
+        games_played = EXCLUDED.games_played,
+        avg_minutes = EXCLUDED.avg_minutes,
+        points = EXCLUDED.points,
+        rebounds = EXCLUDED.rebounds,
+        assists = EXCLUDED.assists,
+        steals = EXCLUDED.steals,
+        blocks = EXCLUDED.blocks,
+        turnovers = EXCLUDED.turnovers,
+        field_goal_pct = EXCLUDED.field_goal_pct,
+        free_throw_pct = EXCLUDED.free_throw_pct,
+        three_point_pct = EXCLUDED.three_point_pct,
+        three_pointers_made = EXCLUDED.three_pointers_made,
+        three_point_attempts = EXCLUDED.three_point_attempts,
+        field_goals_made = EXCLUDED.field_goals_made,
+        field_goal_attempts = EXCLUDED.field_goal_attempts,
+        free_throws_made = EXCLUDED.free_throws_made,
+        free_throw_attempts = EXCLUDED.free_throw_attempts,
+        true_shooting_pct = EXCLUDED.true_shooting_pct,
+        usage_rate = EXCLUDED.usage_rate,
+        points_z_score = EXCLUDED.points_z_score,
+        rebounds_z_score = EXCLUDED.rebounds_z_score,
+        assists_z_score = EXCLUDED.assists_z_score,
+        steals_z_score = EXCLUDED.steals_z_score,
+        blocks_z_score = EXCLUDED.blocks_z_score,
+        field_goal_pct_z_score = EXCLUDED.field_goal_pct_z_score,
+        three_pointers_made_z_score = EXCLUDED.three_pointers_made_z_score,
+        free_throw_pct_z_score = EXCLUDED.free_throw_pct_z_score,
+        turnovers_z_score = EXCLUDED.turnovers_z_score,
+        swish_score = EXCLUDED.swish_score,
+        overall_rank = EXCLUDED.overall_rank;
+    GET DIAGNOSTICS upserted = ROW_COUNT;
+
+    UPDATE season_catalog c
+    SET row_count = (SELECT count(*) FROM player_stats_by_season s WHERE s.league = c.league AND s.season = c.season)
+    WHERE (c.league, c.season) IN (SELECT DISTINCT COALESCE(r->>'league', 'nba'), r->>'season'
+                                   FROM jsonb_array_elements(p_rows) AS r);
+
+    RETURN upserted;
+END;
+$$;
+
+-- Catalog the seasons seeded before the catalog existed
+INSERT INTO season_catalog (league, season, row_count, refreshed_at)
+SELECT league, season, count(*), max(created_at)
+FROM player_stats_by_season
+GROUP BY league, season
+ON CONFLICT (league, season) DO NOTHING;
+
+-- Current ranking snapshot of each league's season (written by python_scripts/snapshots.py).
+-- Snapshots are immutable gzip JSON files in the ranking-snapshots storage bucket, named
+-- by their content hash (version), which the total_rankings route also uses as its ETag.
+CREATE TABLE ranking_snapshots (
+    league TEXT NOT NULL,
+    season TEXT NOT NULL,
+    version TEXT NOT NULL,
+    path TEXT NOT NULL, -- '<league>/<season>/<version>.json.gz'
+    row_count INT NOT NULL,
+    size_bytes INT NOT NULL,
+    published_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (league, season)
 );
 
+-- Public bucket, so the API reads snapshots from the storage CDN without a key
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('ranking-snapshots', 'ranking-snapshots', true)
+ON CONFLICT (id) DO NOTHING;
+
 -- Table for storing player projections for the next season
 CREATE TABLE player_projections (
     projection_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     player_id UUID REFERENCES players(player_id) ON DELETE CASCADE,
     season TEXT NOT NULL,
+    scenario TEXT NOT NULL DEFAULT 'baseline', -- Projection scenario; 'baseline' is the standard run
     full_name TEXT,
     team TEXT,
     player_age INT,
@@ -87,13 +218,21 @@ CREATE TABLE player_projections (
     free_throw_pct_z_score FLOAT,
     three_pointers_made_z_score FLOAT,
     swish_score FLOAT,
+    swish_score_floor FLOAT, -- Monte Carlo 10th percentile
+    swish_score_median FLOAT,
+    swish_score_ceiling FLOAT, -- Monte Carlo 90th percentile
+    expected_rank FLOAT,
+    top_n INT, -- Rank threshold of top_n_probability (predmodel config.SIMULATION_TOP_N)
+    top_n_probability FLOAT,
+    stat_ranges JSONB, -- { stat: [floor, ceiling] }
     created_at TIMESTAMPTZ DEFAULT now(),
-    UNIQUE(player_id, season)
+    UNIQUE(player_id, season, scenario)
 );
 
--- Table for future use: storing individual game logs
+-- Table for storing individual game logs, partitioned by league like player_stats_by_season
 CREATE TABLE game_logs (
-    game_log_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    game_log_id UUID DEFAULT uuid_generate_v4(),
+    league TEXT NOT NULL DEFAULT 'nba',
     player_id UUID REFERENCES players(player_id) ON DELETE CASCADE,
     game_date DATE NOT NULL,
     opponent TEXT,
@@ -116,5 +255,61 @@ CREATE TABLE game_logs (
     points INT,
     plus_minus INT,
     created_at TIMESTAMPTZ DEFAULT now(),
-    UNIQUE(player_id, game_date)
+    PRIMARY KEY (league, game_log_id),
+    UNIQUE(league, player_id, game_date)
+) PARTITION BY LIST (league);
+
+CREATE TABLE game_logs_nba PARTITION OF game_logs FOR VALUES IN ('nba');
+CREATE TABLE game_logs_wnba PARTITION OF game_logs FOR VALUES IN ('wnba');
+CREATE TABLE game_logs_gleague PARTITION OF game_logs FOR VALUES IN ('gleague');
+
+-- Table for storing per-feature contributions behind each player's swish score prediction
+CREATE TABLE player_prediction_contributions (
+    contribution_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    player_id UUID REFERENCES players(player_id) ON DELETE CASCADE,
+    season TEXT NOT NULL,
+    swish_score FLOAT,
+    predicted_swish_score FLOAT,
+    riser_faller_score FLOAT,
+    base_value FLOAT, -- Model's expected value; base_value + sum(contributions) = predicted_swish_score
+    contributions JSONB NOT NULL, -- { feature_name: contribution }
+    created_at TIMESTAMPTZ DEFAULT now(),
+    UNIQUE(player_id, season)
 );
+
+-- Table for storing each active player's projected stat line for their next game
+CREATE TABLE player_next_game_projections (
+    player_id UUID PRIMARY KEY REFERENCES players(player_id) ON DELETE CASCADE,
+    last_game_date DATE,
+    minutes_played FLOAT,
+    points FLOAT,
+    rebounds FLOAT,
+    assists FLOAT,
+    steals FLOAT,
+    blocks FLOAT,
+    turnovers FLOAT,
+    three_pointers_made FLOAT,
+    field_goals_made FLOAT,
+    field_goal_attempts FLOAT,
+    free_throws_made FLOAT,
+    free_throw_attempts FLOAT,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Table for storing each player's aggregates, precomputed from their game logs by
+-- python_scripts/player_aggregates.py, so the player page reads one row instead of every game
+CREATE TABLE player_aggregates (
+    player_id UUID PRIMARY KEY REFERENCES players(player_id) ON DELETE CASCADE,
+    league TEXT NOT NULL,
+    games_played INT NOT NULL,
+    last_game_date DATE,
+    career JSONB NOT NULL, -- games, per-game averages, total_<stat> and shooting percentages
+    seasons JSONB NOT NULL, -- { season: the same per season }
+    splits JSONB NOT NULL, -- { home | away | wins | losses: the same per split }
+    form JSONB NOT NULL, -- { last_5 | last_10: the same over the player's last N games }
+    consistency JSONB NOT NULL, -- <stat>_std, points_cv, points_floor, points_ceiling
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Keyset pagination for streaming a league's game logs in (player_id, game_date) order
+-- uses the index behind UNIQUE(league, player_id, game_date) on that league's partition.
@@ -0,0 +1,315 @@
+"""
+Historical backtest of the next-season projections and riser/faller calls.
+
+Every historical season is replayed as if it were the latest one: models are trained
+only on season pairs whose outcome was known at the time, the following season is
+projected, and the projections are scored against what actually happened. Reported
+per season and overall:
+    - per-stat MSE and MAE of the stat line projections
+    - Spearman rank correlation between projected and actual swish scores
+    - riser/faller hit rate: how often the top risers (fallers) of the swish score
+      model actually improved (declined)
+
+The engineered feature matrix is written once to .npy files keyed by a hash of the
+data, and the season workers run in parallel processes that memory-map it instead of
+each receiving a pickled copy. Season results are cached by data hash, model config
+and season, so changing the config only retrains the affected seasons and an
+unchanged rerun returns immediately.
+
+Usage:
+    python backtest.py              # fetch data, then backtest every season
+    python backtest.py --cached     # reuse the last feature matrix without fetching
+    python backtest.py --seasons 2021-22 2022-23 --workers 2
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from scipy.stats import spearmanr
+
+# Add python_scripts to the path to import feature_engineering
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python_scripts')))
+from feature_engineering import fetch_player_stats, engineer_features
+from config import (
+    STATS_TO_PROJECT,
+    CV_MIN_TRAIN_SEASONS,
+    BACKTEST_PARAMS,
+    BACKTEST_NUM_ROUNDS,
+    BACKTEST_RISER_TOP_N,
+    BACKTEST_RISER_MIN_MINUTES,
+    BACKTEST_WORKERS
+)
+from train_model import prepare_data_for_modeling
+from hyperparameter_search import _to_booster_params
+from model_registry import compute_data_hash
+from simulate_projections import score_draws
+from instrumentation import stage, print_stage_summary
+from profiling import add_profiling_arguments, apply_profiling_arguments
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKTEST_DIR = os.path.join(SCRIPT_DIR, 'backtest_cache')
+
+# The swish score model is backtested alongside the stat line model for riser/faller calls
+SWISH_TARGET = 'swish_score'
+
+
+def build_backtest_matrix(player_stats_df, cache_dir=BACKTEST_DIR):
+    """
+    Engineers features and writes the modeling matrix to disk for memory-mapped access.
+
+    Args:
+        player_stats_df (pd.DataFrame): Raw player stats by season.
+        cache_dir (str): Directory holding one subdirectory per data hash.
+
+    Returns:
+        str: Directory containing X.npy, y.npy, seasons.npy and meta.json.
+    """
+    df_model, features, targets = prepare_data_for_modeling(
+        engineer_features(player_stats_df), STATS_TO_PROJECT + [SWISH_TARGET])
+    df_model = df_model.sort_values(['season', 'player_id'], kind='stable')
+
+    X, y = df_model[features], df_model[targets]
+    data_hash = compute_data_hash(X, y)
+    matrix_dir = os.path.join(cache_dir, data_hash)
+    if os.path.isfile(os.path.join(matrix_dir, 'meta.json')):
+        print(f"Reusing feature matrix {data_hash} ({len(df_model)} rows).")
+        return matrix_dir
+
+    os.makedirs(matrix_dir, exist_ok=True)
+    np.save(os.path.join(matrix_dir, 'X.npy'), np.ascontiguousarray(X.to_numpy(dtype=np.float32)))
+    np.save(os.path.join(matrix_dir, 'y.npy'), np.ascontiguousarray(y.to_numpy(dtype=np.float32)))
+    np.save(os.path.join(matrix_dir, 'seasons.npy'), df_model['season'].to_numpy(dtype=str))
+    np.save(os.path.join(matrix_dir, 'current_swish.npy'), df_model[SWISH_TARGET].to_numpy(dtype=np.float32))
+    np.save(os.path.join(matrix_dir, 'avg_minutes.npy'), df_model['avg_minutes'].to_numpy(dtype=np.float32))
+
+    meta = {'data_hash': data_hash, 'features': features, 'targets': targets, 'rows': len(df_model)}
+    with open(os.path.join(matrix_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    with open(os.path.join(cache_dir, 'LATEST'), 'w') as f:
+        f.write(data_hash)
+
+    print(f"Wrote feature matrix {data_hash} ({len(df_model)} rows x {len(features)} features) to {matrix_dir}")
+    return matrix_dir
+
+
+def _load_matrix(matrix_dir):
+    """Memory-maps the cached arrays; the operating system shares the pages across processes."""
+    arrays = {name: np.load(os.path.join(matrix_dir, f'{name}.npy'), mmap_mode='r')
+              for name in ('X', 'y', 'current_swish', 'avg_minutes')}
+    arrays['seasons'] = np.load(os.path.join(matrix_dir, 'seasons.npy'))
+    with open(os.path.join(matrix_dir, 'meta.json')) as f:
+        meta = json.load(f)
+    return arrays, meta
+
+
+def config_hash(params, num_rounds):
+    """Short hash of the model config, used to key cached season results."""
+    payload = json.dumps({'params': params, 'num_rounds': num_rounds}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def riser_hit_rate(current, predicted, actual, avg_minutes, top_n=BACKTEST_RISER_TOP_N,
+                   min_minutes=BACKTEST_RISER_MIN_MINUTES):
+    """
+    Scores riser/faller calls the way display_risers_fallers makes them.
+
+    Returns:
+        tuple: (fraction of the top risers whose swish score rose, fraction of the
+                top fallers whose swish score fell).
+    """
+    eligible = avg_minutes >= min_minutes
+    predicted_change = (predicted - current)[eligible]
+    actual_change = (actual - current)[eligible]
+    if len(predicted_change) < 2 * top_n:
+        return np.nan, np.nan
+
+    order = np.argsort(-predicted_change, kind='stable')
+    risers, fallers = order[:top_n], order[-top_n:]
+    return float((actual_change[risers] > 0).mean()), float((actual_change[fallers] < 0).mean())
+
+
+def backtest_season(matrix_dir, test_season, params=BACKTEST_PARAMS, num_rounds=BACKTEST_NUM_ROUNDS, nthread=1):
+    """
+    Replays one season: trains on earlier season pairs, projects the next season and scores it.
+
+    Runs in a worker process; the feature matrix is memory-mapped rather than passed in.
+
+    Returns:
+        dict: Metrics for the season ('season', 'train_rows', 'test_rows', 'mse', 'mae',
+              'rank_correlation', 'riser_hit_rate', 'faller_hit_rate', 'seconds').
+    """
+    start = time.perf_counter()
+    arrays, meta = _load_matrix(matrix_dir)
+    seasons = arrays['seasons']
+    train_idx = np.flatnonzero(seasons < test_season)
+    test_idx = np.flatnonzero(seasons == test_season)
+
+    X, y = arrays['X'], arrays['y']
+    X_train, X_test = np.ascontiguousarray(X[train_idx]), np.ascontiguousarray(X[test_idx])
+    y_train, y_test = np.asarray(y[train_idx]), np.asarray(y[test_idx])
+
+    booster_params = _to_booster_params(params, random_state=42)
+    booster_params['nthread'] = nthread
+    dtrain = xgb.QuantileDMatrix(X_train, label=y_train[:, 0], feature_names=meta['features'],
+                                 max_bin=booster_params.get('max_bin', 256))
+
+    predictions = np.empty_like(y_test)
+    for target_idx in range(y_train.shape[1]):
+        dtrain.set_label(y_train[:, target_idx])
+        booster = xgb.train(booster_params, dtrain, num_boost_round=num_rounds)
+        predictions[:, target_idx] = booster.inplace_predict(X_test)
+
+    stats = [target.replace('target_', '') for target in meta['targets']]
+    stat_cols = [i for i, stat in enumerate(stats) if stat != SWISH_TARGET]
+    swish_col = stats.index(SWISH_TARGET)
+    errors = predictions[:, stat_cols] - y_test[:, stat_cols]
+
+    # Score the projected and actual stat lines league-relative, like the published swish score
+    stat_index = {stats[i]: j for j, i in enumerate(stat_cols)}
+    projected_swish = score_draws(predictions[None, :, stat_cols], stat_index)[0]
+    actual_swish = score_draws(y_test[None, :, stat_cols], stat_index)[0]
+
+    current_swish = np.asarray(arrays['current_swish'][test_idx])
+    riser_rate, faller_rate = riser_hit_rate(
+        current_swish, predictions[:, swish_col], y_test[:, swish_col],
+        np.asarray(arrays['avg_minutes'][test_idx]))
+
+    return {
+        'season': test_season,
+        'train_rows': int(len(train_idx)),
+        'test_rows': int(len(test_idx)),
+        'mse': dict(zip([stats[i] for i in stat_cols], (errors ** 2).mean(axis=0).tolist())),
+        'mae': dict(zip([stats[i] for i in stat_cols], np.abs(errors).mean(axis=0).tolist())),
+        'rank_correlation': float(spearmanr(projected_swish, actual_swish).correlation),
+        'riser_hit_rate': riser_rate,
+        'faller_hit_rate': faller_rate,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def run_backtest(matrix_dir, seasons=None, params=BACKTEST_PARAMS, num_rounds=BACKTEST_NUM_ROUNDS,
+                 workers=BACKTEST_WORKERS, use_cache=True):
+    """
+    Backtests every eligible season in parallel, reusing cached season results.
+
+    Args:
+        matrix_dir (str): Output of build_backtest_matrix.
+        seasons (list): Seasons whose next season is projected. Defaults to every season
+            with at least CV_MIN_TRAIN_SEASONS seasons of history before it.
+        params (dict): sklearn-style XGBoost parameters.
+        num_rounds (int): Boosting rounds per target.
+        workers (int): Worker processes.
+        use_cache (bool): If False, recompute every season.
+
+    Returns:
+        pd.DataFrame: One row per season with rank correlation, hit rates, average MSE and
+            per-stat MSE columns ('mse_<stat>').
+    """
+    arrays, meta = _load_matrix(matrix_dir)
+    all_seasons = sorted(set(arrays['seasons'].tolist()))
+    seasons = seasons or all_seasons[CV_MIN_TRAIN_SEASONS:]
+
+    results_path = os.path.join(matrix_dir, f'results_{config_hash(params, num_rounds)}.json')
+    cached = {}
+    if use_cache and os.path.exists(results_path):
+        with open(results_path) as f:
+            cached = json.load(f)
+
+    pending = [season for season in seasons if season not in cached]
+    if pending:
+        workers = max(1, min(workers, len(pending)))
+        nthread = max(1, (os.cpu_count() or 1) // workers)
+        print(f"Backtesting {len(pending)} season(s) on {workers} worker(s) "
+              f"({len(seasons) - len(pending)} cached)...")
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {season: executor.submit(backtest_season, matrix_dir, season, params, num_rounds, nthread)
+                       for season in pending}
+            for season, future in futures.items():
+                cached[season] = future.result()
+                print(f"  {season}: rank corr={cached[season]['rank_correlation']:.3f} "
+                      f"({cached[season]['seconds']:.1f}s)")
+        print(f"Backtest finished in {time.perf_counter() - start:.1f}s.")
+
+        with open(results_path, 'w') as f:
+            json.dump(cached, f, indent=2)
+    else:
+        print(f"All {len(seasons)} season(s) cached for this data and config.")
+
+    rows = []
+    for season in seasons:
+        result = cached[season]
+        row = {
+            'season': season,
+            'test_rows': result['test_rows'],
+            'rank_correlation': result['rank_correlation'],
+            'riser_hit_rate': result['riser_hit_rate'],
+            'faller_hit_rate': result['faller_hit_rate'],
+            'avg_mse': float(np.mean(list(result['mse'].values()))),
+        }
+        row.update({f'mse_{stat}': value for stat, value in result['mse'].items()})
+        row.update({f'mae_{stat}': value for stat, value in result['mae'].items()})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def print_backtest_report(results_df):
+    """Prints per-season metrics and the per-stat error averaged over seasons."""
+    print("\n--- Backtest by Season (features from season, projecting the next) ---")
+    summary_cols = ['season', 'test_rows', 'rank_correlation', 'riser_hit_rate', 'faller_hit_rate', 'avg_mse']
+    print(results_df[summary_cols].round(3).to_string(index=False))
+
+    print("\n--- Average Error by Stat ---")
+    for stat in STATS_TO_PROJECT:
+        if f'mse_{stat}' in results_df.columns:
+            print(f"  {stat:<20}: MSE={results_df[f'mse_{stat}'].mean():.4f}  MAE={results_df[f'mae_{stat}'].mean():.4f}")
+    print("-----------------------------")
+    print(f"Mean rank correlation: {results_df['rank_correlation'].mean():.3f}, "
+          f"riser hit rate: {results_df['riser_hit_rate'].mean():.3f}, "
+          f"faller hit rate: {results_df['faller_hit_rate'].mean():.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the projection models on historical seasons.")
+    parser.add_argument('--cached', action='store_true',
+                        help="Reuse the last feature matrix instead of fetching data from the database.")
+    parser.add_argument('--seasons', nargs='*', default=None,
+                        help="Seasons to project from (default: every season with enough history).")
+    parser.add_argument('--workers', type=int, default=BACKTEST_WORKERS, help="Worker processes.")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every season.")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    apply_profiling_arguments(args)
+
+    if args.cached:
+        latest_path = os.path.join(BACKTEST_DIR, 'LATEST')
+        if not os.path.exists(latest_path):
+            print("No cached feature matrix yet; run without --cached first.")
+            return
+        with open(latest_path) as f:
+            matrix_dir = os.path.join(BACKTEST_DIR, f.read().strip())
+    else:
+        with stage('fetch') as metrics:
+            player_stats_df = fetch_player_stats()
+            metrics.rows_out = None if player_stats_df is None else len(player_stats_df)
+        if player_stats_df is None:
+            return
+        with stage('build_matrix', rows_in=len(player_stats_df)):
+            matrix_dir = build_backtest_matrix(player_stats_df)
+
+    with stage('backtest', workers=args.workers) as metrics:
+        results_df = run_backtest(matrix_dir, seasons=args.seasons, workers=args.workers, use_cache=not args.no_cache)
+        metrics.rows_out = len(results_df)
+    print_backtest_report(results_df)
+    print_stage_summary()
+
+
+if __name__ == '__main__':
+    main()
@@ -36,6 +36,19 @@ Z_SCORE_STATS = [
     'three_pointers_made',
 ]
 
+# Maps each z-score stat to its weight key in Z_SCORE_COLUMNS
+Z_SCORE_KEY_MAP = {
+    'points': 'Points_ZScore',
+    'rebounds': 'Rebounds_ZScore',
+    'assists': 'Assists_ZScore',
+    'steals': 'Steals_ZScore',
+    'blocks': 'Blocks_ZScore',
+    'turnovers': 'Turnovers_ZScore',
+    'field_goal_pct': 'FieldGoalPct_ZScore',
+    'free_throw_pct': 'FreeThrowPct_ZScore',
+    'three_pointers_made': 'ThreePointersMade_ZScore'
+}
+
 Z_SCORE_COLUMNS = {
     'Points_ZScore':            1.195,   # Points
     'Rebounds_ZScore':          1.267,   # Rebounds
@@ -48,3 +61,75 @@ Z_SCORE_COLUMNS = {
     'Turnovers_ZScore':        -1.217    # Turnovers (penalty, stays negative)
 }
 
+
+# Season walk-forward cross-validation (train on seasons <= s, test on s+1)
+CV_MIN_TRAIN_SEASONS = 3   # Seasons in the first training window
+CV_MAX_FOLDS = 5           # Only the most recent folds are used
+
+# Hyperparameter search space for the multi-output XGBoost model.
+# n_estimators is not searched: the number of boosting rounds is chosen by early stopping.
+PARAM_GRID = {
+    'max_depth': [3, 5],
+    'learning_rate': [0.05, 0.1],
+    'subsample': [0.7, 1.0],
+    'min_child_weight': [1, 5],
+}
+
+# Budget for the successive-halving search in train_model.py
+TUNING_TIME_BUDGET_SECONDS = 1800    # Wall-clock budget (None for no limit)
+TUNING_ROUND_BUDGET = None           # Total boosting rounds across all fits (None for no limit)
+TUNING_MIN_ROUNDS = 50               # Boosting rounds allowed on the first rung
+TUNING_MAX_ROUNDS = 800              # Upper bound on boosting rounds per fit
+EARLY_STOPPING_ROUNDS = 25
+
+# Warm-start incremental retraining (train_model.py --incremental)
+INCREMENTAL_MAX_ROUNDS = 200             # New boosting rounds added per target
+INCREMENTAL_VALIDATION_FRACTION = 0.1    # Share of new-season players held out for early stopping
+INCREMENTAL_ACCEPTANCE_FRACTION = 0.1    # Share of new-season players held out to accept or reject the update
+INCREMENTAL_RETENTION_FRACTION = 0.1     # Share of the latest season's players never fit, to measure forgetting
+INCREMENTAL_REGRESSION_TOLERANCE = 0.02  # Allowed relative MSE increase before falling back
+
+# Model registry (model_registry.py), relative to predmodel/
+MODEL_REGISTRY_DIR = 'models'
+STATS_MODEL_NAME = 'multi_output_xgb'   # Multi-output next-season stat line model (train_model.py)
+SWISH_MODEL_NAME = 'final_xgb'          # Next-season swish score model (predict_risers_fallers.py)
+GAME_MODEL_NAME = 'game_xgb'            # Next-game stat line model (train_game_model.py)
+
+# Resident prediction server (prediction_server.py)
+PREDICTION_SERVER_HOST = '127.0.0.1'
+PREDICTION_SERVER_PORT = 8765
+MICRO_BATCH_MAX_ROWS = 512     # Flush a micro-batch once it holds this many rows
+MICRO_BATCH_MAX_WAIT_MS = 2    # ...or this long after its first request arrived
+
+# Monte Carlo projection ranges (simulate_projections.py)
+SIMULATION_DRAWS = 5000          # Simulated seasons per run
+SIMULATION_CHUNK_SIZE = 500      # Draws scored at once; bounds peak memory
+SIMULATION_TOP_N = 50            # Report the probability of finishing inside this rank (stored as top_n)
+SIMULATION_INTERVAL = (10, 90)   # Percentiles reported as floor and ceiling
+
+# Game-level projection model (train_game_model.py)
+GAME_STATS_TO_PROJECT = [
+    'minutes_played', 'points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+    'three_pointers_made', 'field_goals_made', 'field_goal_attempts',
+    'free_throws_made', 'free_throw_attempts',
+]
+GAME_ROLLING_STATS = GAME_STATS_TO_PROJECT     # Stats averaged over each player's recent games
+GAME_ROLLING_WINDOWS = (3, 5, 10)              # Recent-form windows, in games
+GAME_LOG_PAGE_SIZE = 1000                      # Rows per database request (PostgREST max-rows)
+GAME_LOG_CHUNK_ROWS = 100000                   # Rows processed and written per training shard
+GAME_MODEL_PARAMS = {'max_depth': 6, 'eta': 0.1, 'subsample': 0.8, 'max_bin': 256}
+GAME_MODEL_ROUNDS = 300
+ACTIVE_PLAYER_DAYS = 30                        # Players with a game this recent get a next-game projection
+GAME_MODEL_HOLDOUT_DAYS = 28                   # The most recent games, held out to report validation error
+
+# Projection uploads (predict_player_stats.py)
+DEFAULT_PROJECTION_SCENARIO = 'baseline'  # Scenario label for the standard projections
+UPLOAD_CHUNK_SIZE = 500                   # Rows per upsert request
+UPLOAD_MAX_WORKERS = 4                    # Upsert requests in flight at once
+
+# Historical backtest (backtest.py)
+BACKTEST_PARAMS = {'max_depth': 5, 'learning_rate': 0.05, 'subsample': 0.8, 'min_child_weight': 5}
+BACKTEST_NUM_ROUNDS = 300        # Boosting rounds per target
+BACKTEST_RISER_TOP_N = 10        # Risers/fallers scored per season, as shown by predict_risers_fallers
+BACKTEST_RISER_MIN_MINUTES = 28  # Minutes filter applied before picking risers/fallers
+BACKTEST_WORKERS = 4             # Seasons backtested in parallel
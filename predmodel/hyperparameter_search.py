@@ -0,0 +1,168 @@
+"""
+Budget-aware hyperparameter search for the multi-output XGBoost projection model.
+
+Candidates are evaluated with successive halving: every configuration gets a small
+number of boosting rounds, only the best fraction is promoted to the next rung with
+more rounds, and each fold stops early once its validation error stops improving.
+The search respects a wall-clock and/or boosting-round budget and always returns
+the best configuration seen so far when the budget runs out.
+"""
+import itertools
+import time
+
+import numpy as np
+import xgboost as xgb
+
+
+def expand_param_grid(param_grid):
+    """
+    Expands a dict of parameter lists into a list of parameter dicts.
+
+    Args:
+        param_grid (dict): Mapping of XGBoost parameter name to candidate values.
+
+    Returns:
+        list: One dict per combination, in a stable order.
+    """
+    keys = sorted(param_grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+
+
+def _to_booster_params(params, random_state):
+    """Maps sklearn-style XGBRegressor parameter names onto native booster names."""
+    booster_params = {'objective': 'reg:squarederror', 'tree_method': 'hist', 'seed': random_state}
+    for key, value in params.items():
+        if key == 'learning_rate':
+            booster_params['eta'] = value
+        else:
+            booster_params[key] = value
+    return booster_params
+
+
+def evaluate_config(params, fold_cache, num_boost_round, early_stopping_rounds=25, random_state=42):
+    """
+    Cross-validates one configuration for every target with early stopping.
+
+    Args:
+        params (dict): sklearn-style XGBoost parameters (e.g. 'max_depth', 'learning_rate').
+        fold_cache (FoldMatrixCache): Cached season fold matrices from season_cv.
+        num_boost_round (int): Maximum boosting rounds for this evaluation.
+        early_stopping_rounds (int): Rounds without validation improvement before stopping.
+        random_state (int): Seed passed to the booster.
+
+    Returns:
+        tuple: (mean validation MSE across folds and targets, mean best round count,
+                total boosting rounds actually run).
+    """
+    booster_params = _to_booster_params(params, random_state)
+    booster_params['eval_metric'] = 'rmse'
+    booster_params['max_bin'] = fold_cache.max_bin
+    fold_mses = []
+    best_rounds = []
+    rounds_used = 0
+
+    for fold_idx in range(len(fold_cache)):
+        for target_idx in range(fold_cache.num_targets):
+            dtrain, dvalid = fold_cache.set_target(fold_idx, target_idx)
+            booster = xgb.train(
+                booster_params, dtrain, num_boost_round=num_boost_round,
+                evals=[(dvalid, 'valid')], early_stopping_rounds=early_stopping_rounds,
+                verbose_eval=False
+            )
+            fold_mses.append(booster.best_score ** 2)
+            best_rounds.append(booster.best_iteration + 1)
+            rounds_used += booster.num_boosted_rounds()
+
+    return float(np.mean(fold_mses)), int(round(np.mean(best_rounds))), rounds_used
+
+
+def successive_halving_search(fold_cache, param_grid, min_rounds=50, max_rounds=800,
+                              reduction_factor=3, early_stopping_rounds=25,
+                              time_budget=None, round_budget=None, random_state=42):
+    """
+    Searches the parameter grid with successive halving and per-fold early stopping.
+
+    Rung 0 evaluates every configuration with `min_rounds` boosting rounds. Each later
+    rung keeps the best 1/`reduction_factor` of the survivors and multiplies the round
+    allowance by `reduction_factor`, up to `max_rounds`.
+
+    Args:
+        fold_cache (FoldMatrixCache): Cached season fold matrices from season_cv.
+        param_grid (dict): Mapping of XGBoost parameter name to candidate values.
+        min_rounds (int): Boosting rounds allowed on the first rung.
+        max_rounds (int): Upper bound on boosting rounds for any evaluation.
+        reduction_factor (int): Fraction of configurations dropped at each rung.
+        early_stopping_rounds (int): Rounds without validation improvement before stopping.
+        time_budget (float): Optional wall-clock budget in seconds.
+        round_budget (int): Optional budget on the total number of boosting rounds run.
+        random_state (int): Seed passed to the booster.
+
+    Returns:
+        dict: 'params' (best parameters, including 'n_estimators'), 'score' (CV MSE),
+              'history' (one entry per evaluation), 'elapsed' (seconds) and
+              'budget_exhausted' (bool).
+    """
+    start_time = time.perf_counter()
+    candidates = expand_param_grid(param_grid)
+    history = []
+    rounds_spent = 0
+    budget_exhausted = False
+    best = None
+
+    def over_budget():
+        if time_budget is not None and time.perf_counter() - start_time >= time_budget:
+            return True
+        if round_budget is not None and rounds_spent >= round_budget:
+            return True
+        return False
+
+    rung = 0
+    rung_rounds = min_rounds
+
+    while True:
+        print(f"  Rung {rung}: {len(candidates)} candidate(s), up to {rung_rounds} boosting rounds each")
+        rung_results = []
+
+        for params in candidates:
+            if over_budget():
+                budget_exhausted = True
+                break
+
+            score, best_round, rounds_used = evaluate_config(
+                params, fold_cache, rung_rounds, early_stopping_rounds, random_state
+            )
+            rounds_spent += rounds_used
+            result = {'rung': rung, 'params': params, 'score': score,
+                      'n_estimators': best_round, 'max_rounds': rung_rounds}
+            history.append(result)
+            rung_results.append(result)
+
+            # Later rungs train with more rounds, so they are the more trustworthy estimate
+            if best is None or rung > best['rung'] or (rung == best['rung'] and score < best['score']):
+                best = result
+
+        if budget_exhausted or len(rung_results) <= 1 or rung_rounds >= max_rounds:
+            break
+
+        rung_results.sort(key=lambda r: r['score'])
+        keep = max(1, len(rung_results) // reduction_factor)
+        candidates = [r['params'] for r in rung_results[:keep]]
+        rung_rounds = min(max_rounds, rung_rounds * reduction_factor)
+        rung += 1
+
+    elapsed = time.perf_counter() - start_time
+    if budget_exhausted:
+        print(f"  Search budget exhausted after {elapsed:.1f}s and {rounds_spent} boosting rounds.")
+
+    if best is None:
+        raise RuntimeError("Search budget was exhausted before any configuration was evaluated.")
+
+    best_params = dict(best['params'])
+    best_params['n_estimators'] = best['n_estimators']
+    return {
+        'params': best_params,
+        'score': best['score'],
+        'history': history,
+        'elapsed': elapsed,
+        'budget_exhausted': budget_exhausted,
+    }
@@ -0,0 +1,335 @@
+"""
+Versioned model registry using XGBoost's native binary format.
+
+Each registered version is a directory holding one UBJSON booster file per target and
+a small manifest.json that ties the boosters to the feature list, target list, training
+data hash and evaluation metrics. Loading reads only the manifest; boosters are loaded
+on first use. Several versions of a model can live side by side for A/B comparison.
+
+Layout:
+    models/<name>/<version>/manifest.json
+    models/<name>/<version>/booster_<i>.ubj
+    models/<name>/LATEST
+
+Usage:
+    python model_registry.py list [<name>]
+    python model_registry.py import <name> <joblib_file> [<target> ...]
+    python model_registry.py benchmark <name> <joblib_file>
+"""
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import MODEL_REGISTRY_DIR
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_PATH = os.path.join(SCRIPT_DIR, MODEL_REGISTRY_DIR)
+MANIFEST_FILENAME = 'manifest.json'
+
+
+def _xgboost():
+    # xgboost (which also loads sklearn and scipy) is imported on first use, so scripts
+    # that only touch the registry metadata, or exit on --help, start without it
+    import xgboost
+    return xgboost
+
+
+def compute_data_hash(*frames):
+    """
+    Computes a short, order-sensitive content hash of the training data.
+
+    Args:
+        *frames (pd.DataFrame): The feature and target frames used for training.
+
+    Returns:
+        str: A 16-character hex digest.
+    """
+    import pandas as pd
+
+    digest = hashlib.sha256()
+    for frame in frames:
+        digest.update(','.join(map(str, frame.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _model_dir(name):
+    return os.path.join(REGISTRY_PATH, name)
+
+
+def _version_key(version):
+    """
+    Sort key for version labels: numeric parts compare as numbers, so the same-second
+    suffixes order 20250101T000000Z, ...Z.1, ...Z.2, ...Z.10.
+    """
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part) for part in re.split(r'(\d+)', version) if part]
+
+
+def list_versions(name):
+    """Returns the registered versions of a model, oldest first."""
+    model_dir = _model_dir(name)
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted((v for v in os.listdir(model_dir)
+                   if os.path.isfile(os.path.join(model_dir, v, MANIFEST_FILENAME))), key=_version_key)
+
+
+def latest_version(name):
+    """Returns the version marked as LATEST for a model, or None if none is registered."""
+    latest_path = os.path.join(_model_dir(name), 'LATEST')
+    if os.path.exists(latest_path):
+        with open(latest_path) as f:
+            return f.read().strip()
+    versions = list_versions(name)
+    return versions[-1] if versions else None
+
+
+def save_model(name, boosters, features, targets, data_hash=None, metrics=None, params=None,
+               extra=None, version=None, set_latest=True):
+    """
+    Saves a set of boosters and their manifest as a new version.
+
+    Args:
+        name (str): Model name (e.g. 'multi_output_xgb').
+        boosters (list): One xgb.Booster per target, in target order.
+        features (list): Feature names in the order the boosters expect.
+        targets (list): Target names, one per booster.
+        data_hash (str): Hash of the training data (see compute_data_hash).
+        metrics (dict): Evaluation metrics to record alongside the model.
+        params (dict): Training parameters to record alongside the model.
+        extra (dict): Additional JSON-serializable entries to store in the manifest
+            (e.g. the CV residual covariance used for simulation).
+        version (str): Version label. Defaults to a UTC timestamp.
+        set_latest (bool): If True, marks this version as LATEST.
+
+    Returns:
+        str: The version that was written.
+    """
+    if len(boosters) != len(targets):
+        raise ValueError(f"Got {len(boosters)} boosters for {len(targets)} targets.")
+
+    if version is None:
+        # Timestamps sort chronologically; suffix if two versions land in the same second
+        base_version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        version, suffix = base_version, 1
+        while os.path.exists(os.path.join(_model_dir(name), version)):
+            version, suffix = f'{base_version}.{suffix}', suffix + 1
+    version_dir = os.path.join(_model_dir(name), version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    booster_files = []
+    for i, booster in enumerate(boosters):
+        filename = f'booster_{i}.ubj'
+        booster.save_model(os.path.join(version_dir, filename))
+        booster_files.append(filename)
+
+    manifest = {
+        'name': name,
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'format': 'xgboost-ubj',
+        'xgboost_version': _xgboost().__version__,
+        'features': list(features),
+        'targets': list(targets),
+        'boosters': booster_files,
+        'data_hash': data_hash,
+        'metrics': metrics or {},
+        'params': params or {},
+        **(extra or {}),
+    }
+    with open(os.path.join(version_dir, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2, default=float)
+
+    if set_latest:
+        with open(os.path.join(_model_dir(name), 'LATEST'), 'w') as f:
+            f.write(version)
+
+    print(f"Saved model '{name}' version {version} to {version_dir}")
+    return version
+
+
+class RegisteredModel:
+    """
+    A registered model version. The manifest is read on construction; boosters are
+    only loaded from disk the first time they are needed.
+    """
+
+    def __init__(self, name, version):
+        self.name = name
+        self.version = version
+        self.path = os.path.join(_model_dir(name), version)
+        with open(os.path.join(self.path, MANIFEST_FILENAME)) as f:
+            self.manifest = json.load(f)
+        self._boosters = None
+
+    @property
+    def features(self):
+        return self.manifest['features']
+
+    @property
+    def targets(self):
+        return self.manifest['targets']
+
+    @property
+    def metrics(self):
+        return self.manifest['metrics']
+
+    @property
+    def boosters(self):
+        if self._boosters is None:
+            boosters = []
+            for filename in self.manifest['boosters']:
+                booster = _xgboost().Booster()
+                booster.load_model(os.path.join(self.path, filename))
+                boosters.append(booster)
+            self._boosters = boosters
+        return self._boosters
+
+    def get_booster(self, target_idx=0):
+        """Returns the booster for one target (the only one for single-target models)."""
+        return self.boosters[target_idx]
+
+    def predict(self, X):
+        """
+        Predicts every target for the given rows.
+
+        Args:
+            X (pd.DataFrame or np.ndarray): Feature rows. DataFrames are reordered to
+                the manifest's feature order; arrays must already be in that order.
+
+        Returns:
+            np.ndarray: Shape (n_rows,) for single-target models, otherwise (n_rows, n_targets).
+        """
+        if hasattr(X, 'columns'):
+            X = X[self.features].to_numpy(dtype=np.float32)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        predictions = np.column_stack([booster.inplace_predict(X) for booster in self.boosters])
+        return predictions[:, 0] if len(self.targets) == 1 else predictions
+
+
+def load_model(name, version=None):
+    """
+    Loads a registered model version (LATEST by default). Boosters are loaded lazily.
+
+    Raises:
+        FileNotFoundError: If the model or version is not registered.
+    """
+    version = version or latest_version(name)
+    if version is None or not os.path.isfile(os.path.join(_model_dir(name), version, MANIFEST_FILENAME)):
+        raise FileNotFoundError(f"Model '{name}' version {version} is not in the registry at {REGISTRY_PATH}.")
+    return RegisteredModel(name, version)
+
+
+def compare_versions(name, version_a, version_b, X, y):
+    """
+    Evaluates two versions of a model on the same data for A/B comparison.
+
+    Args:
+        name (str): Model name.
+        version_a (str): First version.
+        version_b (str): Second version.
+        X (pd.DataFrame): Feature rows.
+        y (pd.DataFrame): Actual values, one column per target.
+
+    Returns:
+        pd.DataFrame: Per-target MSE for each version and the difference (b - a).
+    """
+    import pandas as pd
+
+    model_a, model_b = load_model(name, version_a), load_model(name, version_b)
+    y_values = np.asarray(y, dtype=np.float64).reshape(len(X), -1)
+    mse_a = ((model_a.predict(X).reshape(len(X), -1) - y_values) ** 2).mean(axis=0)
+    mse_b = ((model_b.predict(X).reshape(len(X), -1) - y_values) ** 2).mean(axis=0)
+
+    return pd.DataFrame({
+        'target': model_a.targets,
+        f'mse_{version_a}': mse_a,
+        f'mse_{version_b}': mse_b,
+        'mse_diff': mse_b - mse_a,
+    })
+
+
+def import_joblib_model(name, joblib_path, targets=None):
+    """
+    Converts an existing joblib-pickled XGBRegressor or MultiOutputRegressor into a registry version.
+    """
+    import joblib
+
+    model = joblib.load(joblib_path)
+    estimators = model.estimators_ if hasattr(model, 'estimators_') else [model]
+    boosters = [estimator.get_booster() for estimator in estimators]
+    features = list(boosters[0].feature_names)
+    targets = targets or [f'target_{i}' for i in range(len(boosters))]
+    return save_model(name, boosters, features, targets, params={'imported_from': os.path.basename(joblib_path)})
+
+
+def load_or_import(name, joblib_path, targets=None):
+    """
+    Loads the LATEST registered version of a model, importing it from a legacy joblib
+    pickle on first use if it has not been registered yet.
+    """
+    try:
+        return load_model(name)
+    except FileNotFoundError:
+        if not os.path.exists(joblib_path):
+            raise
+        print(f"Model '{name}' is not registered yet. Importing it from {joblib_path}...")
+        import_joblib_model(name, joblib_path, targets)
+        return load_model(name)
+
+
+def benchmark_load(name, joblib_path, repeats=5):
+    """
+    Measures cold-start load time of a registry version against its joblib pickle.
+
+    Each measurement runs in a fresh interpreter, so import costs (sklearn for the
+    pickles, xgboost for both) are included, as they are when a script starts.
+
+    Returns:
+        dict: Median seconds for 'joblib' and 'registry' cold starts.
+    """
+    joblib_code = f"import joblib; joblib.load({joblib_path!r})"
+    registry_code = (
+        f"import sys; sys.path.insert(0, {SCRIPT_DIR!r}); "
+        f"from model_registry import load_model; load_model({name!r}).boosters"
+    )
+
+    def median_cold_start(code):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True, capture_output=True)
+            timings.append(time.perf_counter() - start)
+        return float(np.median(timings))
+
+    results = {'joblib': median_cold_start(joblib_code), 'registry': median_cold_start(registry_code)}
+    print(f"Cold-start load (median of {repeats}): joblib={results['joblib']:.3f}s, "
+          f"registry={results['registry']:.3f}s ({results['joblib'] / results['registry']:.1f}x)")
+    return results
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+
+    if command == 'list':
+        names = sys.argv[2:] or (sorted(os.listdir(REGISTRY_PATH)) if os.path.isdir(REGISTRY_PATH) else [])
+        for model_name in names:
+            latest = latest_version(model_name)
+            for model_version in list_versions(model_name):
+                metrics = load_model(model_name, model_version).metrics
+                marker = ' (LATEST)' if model_version == latest else ''
+                print(f"{model_name} {model_version}{marker}: {metrics}")
+    elif command == 'import' and len(sys.argv) >= 4:
+        import_joblib_model(sys.argv[2], sys.argv[3], sys.argv[4:] or None)
+    elif command == 'benchmark' and len(sys.argv) == 4:
+        benchmark_load(sys.argv[2], sys.argv[3])
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -1,6 +1,6 @@
+import argparse
 import pandas as pd
 import numpy as np
-import joblib
 import sys
 import os
 
@@ -9,32 +9,40 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'p
 from feature_engineering import (
     fetch_player_stats,
     fetch_players,
-    create_per_minute_stats,
-    create_yoy_stats,
-    create_age_and_experience_features,
-    create_team_context_features
+    engineer_features
 )
-from db_connector import get_supabase_client
-from config import STATS_TO_PROJECT, Z_SCORE_STATS, Z_SCORE_COLUMNS
+from db_connector import upsert_in_chunks
+from config import (
+    STATS_TO_PROJECT,
+    Z_SCORE_STATS,
+    Z_SCORE_COLUMNS,
+    Z_SCORE_KEY_MAP,
+    STATS_MODEL_NAME,
+    SIMULATION_TOP_N,
+    DEFAULT_PROJECTION_SCENARIO,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_MAX_WORKERS
+)
+from model_registry import load_model
+from simulate_projections import simulate_projections
+from instrumentation import stage, print_stage_summary
+from profiling import add_profiling_arguments, apply_profiling_arguments
 
-def predict_stats_for_next_season(model_filename='multi_output_xgb_model.joblib'):
+def predict_stats_for_next_season(model_version=None):
     """
     Loads the trained model, fetches the latest data, engineers features,
     and predicts the full stat line for all players for the next season.
 
     Args:
-        model_filename (str): The filename of the trained multi-output model.
+        model_version (str): Registry version of the multi-output model. Defaults to LATEST.
 
     Returns:
         tuple: A tuple containing the DataFrame of predictions, the original DataFrame
                used for prediction, and the prediction season string.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(script_dir, model_filename)
-
-    print(f"Loading model from {model_path}...")
-    model = joblib.load(model_path)
-    print("Model loaded successfully.")
+    print(f"Loading model '{STATS_MODEL_NAME}' from the registry...")
+    model = load_model(STATS_MODEL_NAME, model_version)
+    print(f"Model version {model.version} loaded successfully.")
 
     print("Fetching and engineering features for prediction...")
     player_stats_df = fetch_player_stats()
@@ -46,13 +54,10 @@ def predict_stats_for_next_season(model_filename='multi_output_xgb_model.joblib'
     prediction_season = f"{int(most_recent_season.split('-')[0]) + 1}-{str(int(most_recent_season.split('-')[1]) + 1)[-2:]}"
     print(f"Predicting stats for {prediction_season} based on {most_recent_season} data.")
 
-    player_stats_df = create_per_minute_stats(player_stats_df)
-    player_stats_df = create_yoy_stats(player_stats_df)
-    player_stats_df = create_age_and_experience_features(player_stats_df)
-    player_stats_df = create_team_context_features(player_stats_df)
+    player_stats_df = engineer_features(player_stats_df)
 
     df_for_prediction = player_stats_df[player_stats_df['season'] == most_recent_season].copy()
-    features = model.estimators_[0].get_booster().feature_names
+    features = model.features
 
     missing_features = [f for f in features if f not in df_for_prediction.columns]
     if missing_features:
@@ -63,7 +68,8 @@ def predict_stats_for_next_season(model_filename='multi_output_xgb_model.joblib'
     print("Making predictions...")
     predicted_stats = model.predict(X_for_prediction)
 
-    df_predictions = pd.DataFrame(predicted_stats, columns=STATS_TO_PROJECT, index=df_for_prediction.index)
+    df_predictions = pd.DataFrame(predicted_stats, columns=model.targets, index=df_for_prediction.index)
+    df_predictions.attrs['residual_covariance'] = model.manifest.get('residual_covariance')
     print("Predictions complete.")
 
     return df_predictions, df_for_prediction, prediction_season
@@ -80,25 +86,12 @@ def calculate_z_scores_and_swish_score(projections_df):
         mean = df[stat].mean()
         std = df[stat].std()
         
-        # Construct the key for the Z_SCORE_COLUMNS dictionary
-        z_score_key_map = {
-            'points': 'Points_ZScore',
-            'rebounds': 'Rebounds_ZScore',
-            'assists': 'Assists_ZScore',
-            'steals': 'Steals_ZScore',
-            'blocks': 'Blocks_ZScore',
-            'turnovers': 'Turnovers_ZScore',
-            'field_goal_pct': 'FieldGoalPct_ZScore',
-            'free_throw_pct': 'FreeThrowPct_ZScore',
-            'three_pointers_made': 'ThreePointersMade_ZScore'
-        }
-        weight_key = z_score_key_map.get(stat)
+        weight_key = Z_SCORE_KEY_MAP.get(stat)
         weight = Z_SCORE_COLUMNS.get(weight_key, 1.0) # Default to 1.0 if not found
 
         if std > 0:
+            # Turnovers are negative in fantasy; their weight in Z_SCORE_COLUMNS already carries the sign
             z_score = (df[stat] - mean) / std
-            if stat == 'turnovers':
-                z_score *= -1  # Turnovers are negative in fantasy
             df[col_name] = z_score * weight
         else:
             df[col_name] = 0.0
@@ -110,56 +103,107 @@ def calculate_z_scores_and_swish_score(projections_df):
     print("Z-score and Swish Score calculation complete.")
     return df
 
-def upload_projections_to_db(projections_df, season):
+def add_simulated_ranges(projections_df, residual_covariance):
+    """
+    Runs the Monte Carlo simulation and attaches swish score ranges, top-N odds (with
+    the N they are for) and per-stat floor/ceiling ranges to the projections.
+    """
+    summary = simulate_projections(projections_df, residual_covariance)
+    df = projections_df.copy()
+    for col in ['swish_score_floor', 'swish_score_median', 'swish_score_ceiling', 'expected_rank',
+                'top_n_probability']:
+        df[col] = summary[col]
+    df['top_n'] = SIMULATION_TOP_N
+
+    range_cols = [f'{stat}_{bound}' for stat in STATS_TO_PROJECT for bound in ('floor', 'ceiling')]
+    df['stat_ranges'] = [
+        {stat: [ranges[f'{stat}_floor'], ranges[f'{stat}_ceiling']] for stat in STATS_TO_PROJECT}
+        for ranges in summary[range_cols].round(3).to_dict('records')
+    ]
+    return df
+
+def upload_projections_to_db(projections_df, season, scenario=DEFAULT_PROJECTION_SCENARIO):
     """
     Uploads the player stat projections and z-scores to the database.
+
+    Rows are streamed in bounded chunks sent concurrently, so a failed request only
+    affects its own chunk.
+
+    Args:
+        projections_df (pd.DataFrame): Projections with a 'player_id' column.
+        season (str): The season the projections are for.
+        scenario (str): Projection scenario label; each scenario keeps its own rows per season.
     """
     if projections_df is None or projections_df.empty:
         print("No projections to upload.")
         return
 
-    print(f"Connecting to the database to upload projections for {season}...")
+    print(f"Connecting to the database to upload '{scenario}' projections for {season}...")
     try:
-        supabase = get_supabase_client(admin=True)
-        upload_data = projections_df.copy()
-        upload_data['season'] = season
-        
         # Ensure required columns for DB exist
-        if 'player_id' not in upload_data.columns:
+        if 'player_id' not in projections_df.columns:
              raise ValueError("Missing 'player_id' in projections DataFrame.")
 
-        data_to_insert = upload_data.to_dict('records')
-
-        response = supabase.table('player_projections').upsert(data_to_insert, on_conflict='player_id,season').execute()
+        upload_data = projections_df.assign(season=season, scenario=scenario)
+        result = upsert_in_chunks(
+            'player_projections', upload_data, on_conflict='player_id,season,scenario',
+            chunk_size=UPLOAD_CHUNK_SIZE, max_workers=UPLOAD_MAX_WORKERS
+        )
 
-        if len(response.data) > 0:
-            print(f"Successfully uploaded/updated {len(response.data)} player projections.")
+        if result['failed_offsets']:
+            print(f"Uploaded {result['rows']} player projections; chunks starting at rows "
+                  f"{result['failed_offsets']} failed.")
         else:
-            print("Upload failed or nothing to upload. Response:", response.error or response.status_text)
+            print(f"Successfully uploaded/updated {result['rows']} player projections.")
 
     except Exception as e:
         print(f"An error occurred during database upload: {e}")
 
 if __name__ == '__main__':
-    projections, df_for_prediction, season = predict_stats_for_next_season()
+    parser = argparse.ArgumentParser(description='Project next season stat lines for every player.')
+    parser.add_argument('--scenario', default=DEFAULT_PROJECTION_SCENARIO,
+                        help='Label stored with the uploaded projections (default: %(default)s).')
+    parser.add_argument('--model-version', default=None,
+                        help='Registry version of the stats model to use (default: LATEST).')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    apply_profiling_arguments(args)
+
+    with stage('predict') as metrics:
+        projections, df_for_prediction, season = predict_stats_for_next_season(args.model_version)
+        metrics.rows_out = None if projections is None else len(projections)
 
     if projections is not None:
+        residual_covariance = projections.attrs.get('residual_covariance')
+
         # Add player info (id, name, team) to the projections
         players_df = fetch_players()
         projections = projections.merge(df_for_prediction[['player_id', 'team', 'player_age']], left_index=True, right_index=True)
         projections = projections.merge(players_df[['player_id', 'full_name']], on='player_id', how='left')
 
         # Calculate z-scores and swish_score
-        projections_with_scores = calculate_z_scores_and_swish_score(projections)
+        with stage('swish_scores', rows_in=len(projections)):
+            projections_with_scores = calculate_z_scores_and_swish_score(projections)
+
+        # Simulate the season to attach floor/ceiling ranges and top-50 odds
+        if residual_covariance is not None:
+            with stage('simulate', rows_in=len(projections_with_scores)):
+                projections_with_scores = add_simulated_ranges(projections_with_scores, residual_covariance)
+        else:
+            print("Model has no residual covariance recorded; skipping projection ranges.")
 
         # Upload the results
-        upload_projections_to_db(projections_with_scores, season)
+        with stage('upload', rows_in=len(projections_with_scores), scenario=args.scenario):
+            upload_projections_to_db(projections_with_scores, season, args.scenario)
 
         # Display a sample of the predictions
         print("\n--- Predicted Player Stats for Next Season (Top 20 by Swish Score) ---")
         display_df = projections_with_scores.sort_values(by='swish_score', ascending=False).head(20)
-        display_cols = ['full_name', 'team', 'swish_score'] + STATS_TO_PROJECT
+        display_cols = ['full_name', 'team', 'swish_score', 'swish_score_floor', 'swish_score_ceiling',
+                        'top_n_probability'] + STATS_TO_PROJECT
         # Ensure all display columns exist before trying to print
         display_cols = [col for col in display_cols if col in display_df.columns]
         print(display_df[display_cols].round(2).to_string(index=False, justify='right'))
         print("-------------------------------------------------------------------------------------")
+
+    print_stage_summary()
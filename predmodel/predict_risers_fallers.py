@@ -1,68 +1,92 @@
+import argparse
 import pandas as pd
-import joblib
+import numpy as np
 import sys
 import os
-import shap
 
 # Add python_scripts to the path to import feature_engineering
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python_scripts')))
 from feature_engineering import (
     fetch_player_stats, 
     fetch_players,
-    create_per_minute_stats, 
-    create_yoy_stats, 
-    create_age_and_experience_features,
-    create_team_context_features
+    engineer_features
 )
+from db_connector import get_supabase_client
+from config import SWISH_MODEL_NAME
+from model_registry import load_or_import
+from instrumentation import stage, print_stage_summary
+from profiling import add_profiling_arguments, apply_profiling_arguments
 
-def explain_prediction_with_shap(model, X_train, player_instance, top_n=5):
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def compute_feature_contributions(model, X):
     """
-    Explains a single prediction using SHAP.
+    Computes per-feature SHAP contributions for every row in one batched pass.
+
+    Uses the booster's native `pred_contribs` output, which gives exact TreeSHAP
+    values without building an explainer per player.
 
     Args:
-        model: The trained model.
-        X_train (pd.DataFrame): The training data used to build the SHAP explainer.
-        player_instance (pd.DataFrame): The specific player instance to explain.
-        top_n (int): The number of top features to display.
+        model: The trained swish score model (a registry model or XGBRegressor).
+        X (pd.DataFrame): Feature rows to explain, in the model's feature order.
+
+    Returns:
+        pd.DataFrame: One column per feature plus 'bias' (the base value), indexed like X.
+            Each row sums to the model's prediction for that row.
     """
-    explainer = shap.TreeExplainer(model)
-    
-    # We need to align the columns of the player_instance with the training data
-    player_instance_aligned = player_instance[X_train.columns]
+    import xgboost as xgb
+
+    booster = model.get_booster()
+    dmatrix = xgb.DMatrix(X.to_numpy(dtype=np.float32), feature_names=list(X.columns))
+    contribs = booster.predict(dmatrix, pred_contribs=True)
+    return pd.DataFrame(contribs, columns=list(X.columns) + ['bias'], index=X.index)
+
+def top_drivers(contributions_df, player_id, top_n=5):
+    """
+    Returns the features pushing a player's prediction up and down the most.
+
+    Args:
+        contributions_df (pd.DataFrame): Contributions table indexed by player_id.
+        player_id: The player to explain.
+        top_n (int): The number of features to return in each direction.
+
+    Returns:
+        tuple: (pd.Series of the top positive contributions, pd.Series of the top negative contributions).
+    """
+    player_contribs = contributions_df.loc[player_id].drop('bias').sort_values(ascending=False)
+    return player_contribs.head(top_n), player_contribs.tail(top_n).sort_values()
+
+def explain_prediction(contributions_df, player_id, top_n=5):
+    """
+    Prints the key factors behind a single player's prediction from the contributions table.
+    """
+    pushing_higher, pushing_lower = top_drivers(contributions_df, player_id, top_n)
 
-    shap_values = explainer.shap_values(player_instance_aligned)
-    
-    # Create a DataFrame for easier manipulation
-    feature_names = X_train.columns
-    shap_df = pd.DataFrame(shap_values, columns=feature_names)
-    
-    # Get the top N contributing features
-    top_features = shap_df.iloc[0].sort_values(ascending=False)
-    
     print("\n--- Key Factors for Prediction ---")
-    print("Top 5 features pushing prediction higher:")
-    for feature, shap_value in top_features.head(top_n).items():
+    print(f"Top {top_n} features pushing prediction higher:")
+    for feature, shap_value in pushing_higher.items():
         print(f"  - {feature}: {shap_value:+.3f}")
     
-    print("\nTop 5 features pushing prediction lower:")
-    for feature, shap_value in top_features.tail(top_n).sort_values().items():
+    print(f"\nTop {top_n} features pushing prediction lower:")
+    for feature, shap_value in pushing_lower.items():
         print(f"  - {feature}: {shap_value:+.3f}")
 
     print("----------------------------------")
 
-def make_predictions(df, model, all_training_data):
+def make_predictions(df, model):
     """
-    Generates predictions for the upcoming season.
+    Generates predictions and per-feature contributions for the upcoming season.
 
     Args:
         df (pd.DataFrame): DataFrame with the latest season's data and features.
-        model: The trained model.
+        model (RegisteredModel): The trained swish score model from the registry.
 
     Returns:
-        pd.DataFrame: DataFrame with added prediction and riser/faller scores.
+        pd.DataFrame: DataFrame with added prediction and riser/faller scores. The
+            per-player contributions table is attached as `attrs['contributions']`.
     """
     # Get the feature names from the trained model
-    features = model.feature_names_in_
+    features = list(model.features)
     
     # Define columns to keep, including player_id
     cols_to_keep = ['player_id'] + list(features)
@@ -88,9 +112,10 @@ def make_predictions(df, model, all_training_data):
     # Calculate riser/faller score
     df_pred['riser_faller_score'] = df_pred['predicted_swish_score'] - df_pred['swish_score']
 
-    # Attach model and training data for SHAP explanations
-    df_pred.attrs['model'] = model
-    df_pred.attrs['X_train'] = all_training_data[features]
+    # Explain every prediction in one batched pass and keep the table alongside the predictions
+    contributions_df = compute_feature_contributions(model, X_for_prediction)
+    contributions_df.index = df_pred['player_id']
+    df_pred.attrs['contributions'] = contributions_df
 
     return df_pred
 
@@ -129,47 +154,74 @@ def display_risers_fallers(predictions_df, prediction_season, min_minutes=28):
     print(f"\n--- Top 10 Potential Fallers for {prediction_season} (min. {min_minutes} MPG) ---")
     print(fallers[['full_name', 'swish_score', 'predicted_swish_score', 'riser_faller_score']].to_string(index=False))
 
-    # --- SHAP Explanations for Top Riser and Faller ---
+    # --- Explanations for Top Riser and Faller ---
     if not risers.empty and not fallers.empty:
-        model = predictions_df.attrs['model']
-        X_train = predictions_df.attrs['X_train']
-
-        top_riser_id = risers.iloc[0]['player_id']
-        top_faller_id = fallers.iloc[0]['player_id']
-
-        # Get the instance data from the original predictions_df before merging
-        top_riser_instance = predictions_df[predictions_df['player_id'] == top_riser_id]
-        top_faller_instance = predictions_df[predictions_df['player_id'] == top_faller_id]
+        contributions_df = predictions_df.attrs['contributions']
 
         print(f"\n\n--- Explanation for Top Riser: {risers.iloc[0]['full_name']} ---")
-        explain_prediction_with_shap(model, X_train, top_riser_instance, top_n=10)
+        explain_prediction(contributions_df, risers.iloc[0]['player_id'], top_n=10)
 
         print(f"\n--- Explanation for Top Faller: {fallers.iloc[0]['full_name']} ---")
-        explain_prediction_with_shap(model, X_train, top_faller_instance, top_n=10)
+        explain_prediction(contributions_df, fallers.iloc[0]['player_id'], top_n=10)
     # -------------------------------------------------
 
+def upload_prediction_contributions(predictions_df, season):
+    """
+    Uploads each player's prediction and feature contributions to the database so
+    the web app can show the drivers behind any player's projection.
+    """
+    contributions_df = predictions_df.attrs.get('contributions')
+    if contributions_df is None or contributions_df.empty:
+        print("No prediction contributions to upload.")
+        return
+
+    print(f"Uploading prediction contributions for {len(contributions_df)} players for {season}...")
+    try:
+        supabase = get_supabase_client(admin=True)
+        scores = predictions_df.set_index('player_id')
+        feature_contribs = contributions_df.drop(columns=['bias']).round(4)
+        records = [
+            {
+                'player_id': player_id,
+                'season': season,
+                'swish_score': float(scores.at[player_id, 'swish_score']),
+                'predicted_swish_score': float(scores.at[player_id, 'predicted_swish_score']),
+                'riser_faller_score': float(scores.at[player_id, 'riser_faller_score']),
+                'base_value': float(contributions_df.at[player_id, 'bias']),
+                'contributions': contribs,
+            }
+            for player_id, contribs in zip(feature_contribs.index, feature_contribs.to_dict('records'))
+        ]
+        supabase.table('player_prediction_contributions').upsert(records, on_conflict='player_id,season').execute()
+        print(f"Successfully uploaded contributions for {len(records)} players.")
+    except Exception as e:
+        print(f"An error occurred while uploading prediction contributions: {e}")
+
 if __name__ == '__main__':
-    # 1. Load the trained model
-    model_filename = 'final_xgb_model.joblib'
+    parser = argparse.ArgumentParser(description="Score next-season risers and fallers with the swish score model.")
+    add_profiling_arguments(parser)
+    apply_profiling_arguments(parser.parse_args())
+
+    # 1. Load the trained model from the registry (imported from the legacy pickle on first run)
     try:
-        final_model = joblib.load(model_filename)
-        print(f"Model loaded from {model_filename}")
+        final_model = load_or_import(SWISH_MODEL_NAME, os.path.join(SCRIPT_DIR, 'final_xgb_model.joblib'), ['swish_score'])
+        print(f"Model '{SWISH_MODEL_NAME}' version {final_model.version} loaded from the registry.")
     except FileNotFoundError:
-        print(f"Error: Model file not found at {model_filename}. Please run train_model.py first.")
+        print(f"Error: Model '{SWISH_MODEL_NAME}' not found in the registry. Please run train_model.py first.")
         sys.exit(1)
 
     # 2. Fetch all data and engineer features
-    player_stats_df = fetch_player_stats()
+    with stage('fetch') as metrics:
+        player_stats_df = fetch_player_stats()
+        metrics.rows_out = None if player_stats_df is None else len(player_stats_df)
     if player_stats_df is not None:
         # --- TEMPORARY FILTER FOR TESTING ---
         print("Applying temporary filter: Using data only up to the 2023-24 season.")
         player_stats_df = player_stats_df[player_stats_df['season'] <= '2023-24']
         # ------------------------------------
 
-        player_stats_df = create_per_minute_stats(player_stats_df)
-        player_stats_df = create_yoy_stats(player_stats_df)
-        player_stats_df = create_age_and_experience_features(player_stats_df)
-        player_stats_df = create_team_context_features(player_stats_df)
+        with stage('engineer_features', rows_in=len(player_stats_df)):
+            player_stats_df = engineer_features(player_stats_df)
 
         # 3. Find the latest season that has a preceding season for YoY calculations
         all_seasons_in_df = sorted(player_stats_df['season'].unique(), reverse=True)
@@ -195,9 +247,17 @@ if __name__ == '__main__':
 
         prediction_data = player_stats_df[player_stats_df['season'] == latest_season_for_pred].copy()
 
-        # 4. Make predictions using the entire historical dataframe for SHAP context
-        predictions_df = make_predictions(prediction_data, final_model, player_stats_df)
+        # 4. Make predictions and compute contributions for every player
+        with stage('predict', rows_in=len(prediction_data)) as metrics:
+            predictions_df = make_predictions(prediction_data, final_model)
+            metrics.rows_out = None if predictions_df is None else len(predictions_df)
 
         if predictions_df is not None:
             # 5. Display top risers and fallers with explanations
             display_risers_fallers(predictions_df, prediction_season)
+
+            # 6. Store the contributions so any player's drivers can be served without recomputing
+            with stage('upload_contributions', rows_in=len(predictions_df)):
+                upload_prediction_contributions(predictions_df, prediction_season)
+
+        print_stage_summary()
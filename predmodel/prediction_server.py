@@ -0,0 +1,274 @@
+"""
+Long-lived local prediction server that keeps the models and feature rows resident.
+
+The predict scripts load the models from the registry, pull the full history from the database and
+re-run feature engineering on every invocation. This server does that work once at
+startup, keeps the latest season's engineered feature rows in memory and answers
+projection requests over local HTTP. Concurrent requests are coalesced into a single
+booster call by a micro-batcher.
+
+Endpoints:
+    GET  /health                              Model versions and feature row status.
+    GET  /projections/<player_id>             Projection for one player.
+    POST /projections  {"player_ids": [...]}  Projections for several players.
+                       {"rows": [{...}]}      Projections for ad-hoc feature rows.
+    POST /reload                              Re-fetch and re-engineer the feature rows.
+
+Usage:
+    python prediction_server.py
+"""
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Add python_scripts to the path to import feature_engineering
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python_scripts')))
+from feature_engineering import fetch_player_stats, fetch_players, engineer_features
+from config import (
+    STATS_TO_PROJECT,
+    PREDICTION_SERVER_HOST,
+    PREDICTION_SERVER_PORT,
+    MICRO_BATCH_MAX_ROWS,
+    MICRO_BATCH_MAX_WAIT_MS,
+    STATS_MODEL_NAME,
+    SWISH_MODEL_NAME
+)
+from model_registry import load_model, load_or_import
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _predict_matrix(boosters, X):
+    """Predicts every booster on a float32 matrix and stacks the outputs column-wise."""
+    return np.column_stack([booster.inplace_predict(X) for booster in boosters])
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into one booster call.
+
+    Requests are queued with a Future. A single worker thread drains the queue until
+    it holds `max_rows` rows or `max_wait_ms` has passed since the first request,
+    predicts the stacked matrix once, and resolves each Future with its slice.
+    """
+
+    def __init__(self, predict_fn, max_rows=MICRO_BATCH_MAX_ROWS, max_wait_ms=MICRO_BATCH_MAX_WAIT_MS):
+        self._predict_fn = predict_fn
+        self._max_rows = max_rows
+        self._max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, X):
+        """Queues a float32 feature matrix and returns a Future for its predictions."""
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            batch_rows = len(batch[0][0])
+            deadline = time.perf_counter() + self._max_wait
+
+            while batch_rows < self._max_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                batch_rows += len(item[0])
+
+            try:
+                predictions = self._predict_fn(np.vstack([X for X, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for X, future in batch:
+                future.set_result(predictions[offset:offset + len(X)])
+                offset += len(X)
+
+
+class PredictionService:
+    """Holds the loaded models and the latest engineered feature rows."""
+
+    def __init__(self, stats_model_version=None, swish_model_version=None):
+        print("Loading models...")
+        start = time.perf_counter()
+        stats_model = load_model(STATS_MODEL_NAME, stats_model_version)
+        if swish_model_version is None:
+            swish_model = load_or_import(SWISH_MODEL_NAME, os.path.join(SCRIPT_DIR, 'final_xgb_model.joblib'), ['swish_score'])
+        else:
+            swish_model = load_model(SWISH_MODEL_NAME, swish_model_version)
+        self.stats_features, self.stats_boosters = list(stats_model.features), stats_model.boosters
+        self.swish_features, self.swish_boosters = list(swish_model.features), swish_model.boosters
+        self.model_versions = {STATS_MODEL_NAME: stats_model.version, SWISH_MODEL_NAME: swish_model.version}
+        print(f"Models loaded in {time.perf_counter() - start:.2f}s.")
+
+        # One matrix holds the union of both models' features; each model reads its own columns
+        self.features = list(dict.fromkeys(self.stats_features + self.swish_features))
+        self._stats_cols = [self.features.index(f) for f in self.stats_features]
+        self._swish_cols = [self.features.index(f) for f in self.swish_features]
+
+        self._lock = threading.Lock()
+        self.reload()
+        self.batcher = MicroBatcher(self._predict)
+
+    def reload(self):
+        """Fetches the history, engineers features and keeps the latest season's rows in memory."""
+        start = time.perf_counter()
+        player_stats_df = fetch_player_stats()
+        if player_stats_df is None:
+            raise RuntimeError("Could not fetch player stats.")
+
+        player_stats_df = engineer_features(player_stats_df)
+        latest_season = player_stats_df['season'].max()
+        latest_df = player_stats_df[player_stats_df['season'] == latest_season]
+        latest_df = latest_df.dropna(subset=self.features).drop_duplicates(subset='player_id', keep='last')
+
+        players_df = fetch_players()
+        names = {} if players_df is None else dict(zip(players_df['player_id'], players_df['full_name']))
+
+        matrix = np.ascontiguousarray(latest_df[self.features].to_numpy(dtype=np.float32))
+        row_index = {player_id: i for i, player_id in enumerate(latest_df['player_id'])}
+
+        with self._lock:
+            self.season = latest_season
+            self._matrix = matrix
+            self._row_index = row_index
+            self._names = names
+            self._teams = dict(zip(latest_df['player_id'], latest_df['team']))
+            self.loaded_at = time.time()
+
+        print(f"Loaded {len(row_index)} feature rows for {latest_season} in {time.perf_counter() - start:.2f}s.")
+
+    def _predict(self, X):
+        stats = _predict_matrix(self.stats_boosters, np.ascontiguousarray(X[:, self._stats_cols]))
+        swish = _predict_matrix(self.swish_boosters, np.ascontiguousarray(X[:, self._swish_cols]))
+        return np.column_stack([stats, swish])
+
+    def _format(self, predictions, player_ids=None):
+        results = []
+        for i, row in enumerate(predictions):
+            result = {
+                'projection': {stat: float(value) for stat, value in zip(STATS_TO_PROJECT, row[:-1])},
+                'predicted_swish_score': float(row[-1]),
+            }
+            if player_ids is not None:
+                player_id = player_ids[i]
+                result = {'player_id': player_id, 'full_name': self._names.get(player_id),
+                          'team': self._teams.get(player_id), 'based_on_season': self.season, **result}
+            results.append(result)
+        return results
+
+    def project_players(self, player_ids):
+        """Projects the given players from their resident feature rows."""
+        with self._lock:
+            missing = [p for p in player_ids if p not in self._row_index]
+            if missing:
+                raise KeyError(f"No feature rows for player(s): {missing}")
+            X = self._matrix[[self._row_index[p] for p in player_ids]]
+        return self._format(self.batcher.submit(X).result(), player_ids)
+
+    def project_rows(self, rows):
+        """Projects ad-hoc feature rows (e.g. what-if scenarios) supplied by the caller."""
+        missing = sorted({f for row in rows for f in self.features if f not in row})
+        if missing:
+            raise KeyError(f"Missing required features: {missing}")
+        X = np.array([[row[f] for f in self.features] for row in rows], dtype=np.float32)
+        return self._format(self.batcher.submit(X).result())
+
+    def status(self):
+        return {'models': self.model_versions, 'season': self.season, 'players': len(self._row_index),
+                'features': len(self.features), 'loaded_at': self.loaded_at}
+
+
+def make_handler(service):
+    """Builds a request handler class bound to a PredictionService."""
+
+    class PredictionRequestHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get('Content-Length', 0))
+            return json.loads(self.rfile.read(length) or b'{}')
+
+        def do_GET(self):
+            try:
+                if self.path == '/health':
+                    self._send_json(200, {'status': 'ok', **service.status()})
+                elif self.path.startswith('/projections/'):
+                    player_id = self.path[len('/projections/'):]
+                    self._send_json(200, service.project_players([player_id])[0])
+                else:
+                    self._send_json(404, {'error': f'Unknown path {self.path}'})
+            except KeyError as e:
+                self._send_json(404, {'error': e.args[0] if e.args else str(e)})
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+
+        def do_POST(self):
+            try:
+                if self.path == '/projections':
+                    body = self._read_json()
+                    if 'player_ids' in body:
+                        self._send_json(200, service.project_players(body['player_ids']))
+                    elif 'rows' in body:
+                        self._send_json(200, service.project_rows(body['rows']))
+                    else:
+                        self._send_json(400, {'error': "Body must contain 'player_ids' or 'rows'."})
+                elif self.path == '/reload':
+                    service.reload()
+                    self._send_json(200, {'status': 'reloaded', **service.status()})
+                else:
+                    self._send_json(404, {'error': f'Unknown path {self.path}'})
+            except KeyError as e:
+                self._send_json(404, {'error': e.args[0] if e.args else str(e)})
+            except (ValueError, TypeError) as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            # Keep the console quiet on the hot path
+            pass
+
+    return PredictionRequestHandler
+
+
+def serve(host=PREDICTION_SERVER_HOST, port=PREDICTION_SERVER_PORT):
+    """Loads the models and feature rows once and serves projections until interrupted."""
+    service = PredictionService()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Prediction server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down prediction server.")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    serve()
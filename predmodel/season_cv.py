@@ -0,0 +1,106 @@
+"""
+Season-grouped walk-forward cross-validation for the projection models.
+
+Rows in the modeling frame are sorted by player, so splitting on row order mixes
+seasons between train and test. These folds are keyed on the `season` column
+instead: fold k trains on every season up to s and tests on season s+1.
+
+Each fold's quantized training matrix is built once and cached, so the CV report,
+every hyperparameter trial and every target reuse the same matrices.
+"""
+import numpy as np
+import xgboost as xgb
+
+# Number of histogram bins used to quantize the fold matrices. Boosters trained on
+# the cached matrices must use the same value.
+MAX_BIN = 256
+
+
+def season_walk_forward_splits(seasons, min_train_seasons=3, max_folds=None):
+    """
+    Generates walk-forward (train on seasons <= s, test on s+1) index splits.
+
+    Args:
+        seasons (array-like): Season label (e.g. '2021-22') for every row.
+        min_train_seasons (int): Number of seasons in the first training window.
+        max_folds (int): If set, only the most recent `max_folds` folds are returned.
+
+    Returns:
+        list: (train_index, test_index, test_season) tuples in chronological order.
+    """
+    seasons = np.asarray(seasons)
+    ordered_seasons = sorted(set(seasons.tolist()))
+    splits = []
+
+    for i in range(min_train_seasons, len(ordered_seasons)):
+        test_season = ordered_seasons[i]
+        train_index = np.flatnonzero(seasons < test_season)
+        test_index = np.flatnonzero(seasons == test_season)
+        if len(train_index) and len(test_index):
+            splits.append((train_index, test_index, test_season))
+
+    if max_folds is not None:
+        splits = splits[-max_folds:]
+    return splits
+
+
+class FoldMatrixCache:
+    """
+    Builds and holds the quantized train/test matrices for a set of season folds.
+
+    Labels are swapped in place per target, so one cache serves every target and
+    every hyperparameter trial without rebuilding a matrix from pandas slices.
+    """
+
+    def __init__(self, X, y, splits, max_bin=MAX_BIN):
+        """
+        Args:
+            X (pd.DataFrame): Feature matrix.
+            y (pd.DataFrame): Target matrix, one column per projected stat.
+            splits (list): Output of season_walk_forward_splits.
+            max_bin (int): Histogram bins used to quantize the training matrices.
+        """
+        self.feature_names = list(X.columns)
+        self.target_names = list(y.columns)
+        self.splits = splits
+        self.max_bin = max_bin
+        self._X = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+        self._y = np.ascontiguousarray(y.to_numpy(dtype=np.float32))
+        self._matrices = {}
+
+    def __len__(self):
+        return len(self.splits)
+
+    @property
+    def num_targets(self):
+        return self._y.shape[1]
+
+    def fold(self, fold_idx):
+        """
+        Returns the cached (dtrain, dtest, y_train, y_test) for a fold, building it on first use.
+        """
+        if fold_idx not in self._matrices:
+            train_index, test_index, _ = self.splits[fold_idx]
+            dtrain = xgb.QuantileDMatrix(
+                self._X[train_index], label=self._y[train_index, 0],
+                feature_names=self.feature_names, max_bin=self.max_bin
+            )
+            dtest = xgb.QuantileDMatrix(
+                self._X[test_index], label=self._y[test_index, 0],
+                feature_names=self.feature_names, max_bin=self.max_bin, ref=dtrain
+            )
+            self._matrices[fold_idx] = (dtrain, dtest, self._y[train_index], self._y[test_index])
+        return self._matrices[fold_idx]
+
+    def folds(self):
+        """Yields (fold_idx, test_season, dtrain, dtest, y_train, y_test) for every fold."""
+        for fold_idx, (_, _, test_season) in enumerate(self.splits):
+            dtrain, dtest, y_train, y_test = self.fold(fold_idx)
+            yield fold_idx, test_season, dtrain, dtest, y_train, y_test
+
+    def set_target(self, fold_idx, target_idx):
+        """Points the fold's cached matrices at one target column and returns them."""
+        dtrain, dtest, y_train, y_test = self.fold(fold_idx)
+        dtrain.set_label(y_train[:, target_idx])
+        dtest.set_label(y_test[:, target_idx])
+        return dtrain, dtest
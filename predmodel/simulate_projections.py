@@ -0,0 +1,153 @@
+"""
+Vectorized Monte Carlo engine for projection uncertainty ranges.
+
+Point projections from predict_stats_for_next_season are perturbed with correlated
+noise drawn from the out-of-fold residual covariance recorded by train_model.py.
+Every simulated season is scored exactly like the point projections (league-relative
+weighted z-scores summed into a swish score) and ranked, all with NumPy array
+operations over (draws, players, stats). The result is a floor/ceiling per stat and
+per swish score, plus each player's probability of finishing inside the top N.
+"""
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    STATS_TO_PROJECT,
+    Z_SCORE_STATS,
+    Z_SCORE_COLUMNS,
+    Z_SCORE_KEY_MAP,
+    SIMULATION_DRAWS,
+    SIMULATION_CHUNK_SIZE,
+    SIMULATION_TOP_N,
+    SIMULATION_INTERVAL
+)
+
+# Stats expressed as fractions are clipped to [0, 1]; everything else must be non-negative
+FRACTION_STATS = {'field_goal_pct', 'free_throw_pct', 'true_shooting_pct', 'usage_rate'}
+MAX_GAMES_PLAYED = 82
+
+
+def _stat_bounds(stats):
+    """Returns the lower and upper clip bounds for each stat, in order."""
+    lower = np.zeros(len(stats))
+    upper = np.full(len(stats), np.inf)
+    for i, stat in enumerate(stats):
+        if stat in FRACTION_STATS:
+            upper[i] = 1.0
+        elif stat == 'games_played':
+            upper[i] = MAX_GAMES_PLAYED
+    return lower, upper
+
+
+def _cholesky(covariance):
+    """Cholesky factor of the covariance, with a small ridge if it is not positive definite."""
+    covariance = np.asarray(covariance, dtype=np.float64)
+    jitter = 0.0
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(covariance + jitter * np.eye(len(covariance)))
+        except np.linalg.LinAlgError:
+            jitter = max(jitter * 10, 1e-8 * np.trace(covariance) / len(covariance))
+    raise np.linalg.LinAlgError("Residual covariance is not positive semi-definite.")
+
+
+def score_draws(draws, stat_index):
+    """
+    Scores simulated seasons the same way calculate_z_scores_and_swish_score scores projections.
+
+    Args:
+        draws (np.ndarray): Simulated stat lines, shape (n_draws, n_players, n_stats).
+        stat_index (dict): Maps stat name to its position on the last axis.
+
+    Returns:
+        np.ndarray: Swish scores, shape (n_draws, n_players).
+    """
+    z_cols = [stat_index[stat] for stat in Z_SCORE_STATS]
+    weights = np.array([Z_SCORE_COLUMNS.get(Z_SCORE_KEY_MAP[stat], 1.0) for stat in Z_SCORE_STATS], dtype=draws.dtype)
+
+    z_stats = draws[:, :, z_cols]
+    mean = z_stats.mean(axis=1, keepdims=True)
+    std = z_stats.std(axis=1, ddof=1, keepdims=True)
+    z_scores = np.divide(z_stats - mean, std, out=np.zeros_like(z_stats), where=std > 0)
+    return z_scores @ weights
+
+
+def rank_draws(swish_scores):
+    """Ranks players within each simulated season (1 = best), shape (n_draws, n_players)."""
+    order = np.argsort(-swish_scores, axis=1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, swish_scores.shape[1] + 1)[None, :], axis=1)
+    return ranks
+
+
+def simulate_projections(projections_df, residual_covariance, stats=STATS_TO_PROJECT,
+                         n_draws=SIMULATION_DRAWS, chunk_size=SIMULATION_CHUNK_SIZE,
+                         top_n=SIMULATION_TOP_N, interval=SIMULATION_INTERVAL, seed=42):
+    """
+    Simulates the league's next season and summarizes each player's range of outcomes.
+
+    Args:
+        projections_df (pd.DataFrame): Point projections with one column per stat in `stats`.
+        residual_covariance (array-like): Out-of-fold residual covariance, shape (n_stats, n_stats),
+            in the order of `stats`.
+        stats (list): The projected stats, in covariance order.
+        n_draws (int): Number of simulated seasons.
+        chunk_size (int): Draws generated and scored at once; bounds peak memory.
+        top_n (int): Rank threshold for the finish probability.
+        interval (tuple): Lower and upper percentiles reported as floor and ceiling.
+        seed (int): Random seed for reproducible simulations.
+
+    Returns:
+        pd.DataFrame: Indexed like projections_df, with '<stat>_floor' / '<stat>_ceiling' for
+            every stat, 'swish_score_floor', 'swish_score_median', 'swish_score_ceiling',
+            'expected_rank' and 'top_n_probability' (the chance of a rank <= top_n).
+    """
+    start_time = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    stat_index = {stat: i for i, stat in enumerate(stats)}
+
+    means = projections_df[stats].to_numpy(dtype=np.float64)
+    n_players, n_stats = means.shape
+    chol = _cholesky(residual_covariance).astype(np.float32)
+    lower, upper = _stat_bounds(stats)
+    lower, upper = lower.astype(np.float32), upper.astype(np.float32)
+    means32 = means.astype(np.float32)
+
+    swish_draws = np.empty((n_draws, n_players), dtype=np.float32)
+    top_n_counts = np.zeros(n_players, dtype=np.int64)
+    rank_sums = np.zeros(n_players, dtype=np.int64)
+
+    for chunk_start in range(0, n_draws, chunk_size):
+        chunk_draws = min(chunk_size, n_draws - chunk_start)
+        noise = rng.standard_normal((chunk_draws, n_players, n_stats), dtype=np.float32) @ chol.T
+        draws = np.clip(means32[None, :, :] + noise, lower, upper)
+
+        swish = score_draws(draws, stat_index)
+        ranks = rank_draws(swish)
+        swish_draws[chunk_start:chunk_start + chunk_draws] = swish
+        top_n_counts += (ranks <= top_n).sum(axis=0)
+        rank_sums += ranks.sum(axis=0)
+
+    low_pct, high_pct = interval
+    summary = pd.DataFrame(index=projections_df.index)
+
+    # Clipping is monotone, so stat percentiles follow directly from the marginal normal quantiles
+    stat_std = np.sqrt(np.diag(np.asarray(residual_covariance, dtype=np.float64)))
+    z_low, z_high = NormalDist().inv_cdf(low_pct / 100), NormalDist().inv_cdf(high_pct / 100)
+    for stat, i in stat_index.items():
+        summary[f'{stat}_floor'] = np.clip(means[:, i] + z_low * stat_std[i], lower[i], upper[i])
+        summary[f'{stat}_ceiling'] = np.clip(means[:, i] + z_high * stat_std[i], lower[i], upper[i])
+
+    floor, median, ceiling = np.percentile(swish_draws, [low_pct, 50, high_pct], axis=0)
+    summary['swish_score_floor'] = floor
+    summary['swish_score_median'] = median
+    summary['swish_score_ceiling'] = ceiling
+    summary['expected_rank'] = rank_sums / n_draws
+    summary['top_n_probability'] = top_n_counts / n_draws
+
+    print(f"Simulated {n_draws} seasons for {n_players} players in {time.perf_counter() - start_time:.2f}s.")
+    return summary
+
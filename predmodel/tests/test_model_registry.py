@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+import model_registry
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, 'REGISTRY_PATH', str(tmp_path))
+    return tmp_path
+
+
+def _boosters(targets=2, rows=50, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({'a': rng.normal(size=rows), 'b': rng.normal(size=rows)})
+    boosters = []
+    for i in range(targets):
+        dtrain = xgb.DMatrix(X, label=X['a'] * (i + 1) + rng.normal(scale=0.1, size=rows))
+        boosters.append(xgb.train({'max_depth': 2, 'seed': 0}, dtrain, num_boost_round=5))
+    return boosters, X
+
+
+def test_saved_version_round_trips(registry):
+    boosters, X = _boosters()
+    data_hash = model_registry.compute_data_hash(X)
+
+    version = model_registry.save_model('stats', boosters, ['a', 'b'], ['points', 'rebounds'],
+                                        data_hash=data_hash, metrics={'mse': 1.5})
+    model = model_registry.load_model('stats')
+
+    assert model.version == version
+    assert model.manifest['data_hash'] == data_hash
+    assert model.metrics == {'mse': 1.5}
+    expected = np.column_stack([booster.inplace_predict(X[['a', 'b']].to_numpy(np.float32)) for booster in boosters])
+    # Columns are reordered to the manifest's feature order
+    np.testing.assert_allclose(model.predict(X[['b', 'a']]), expected, rtol=1e-6)
+
+
+def test_latest_only_moves_when_asked(registry):
+    boosters, _ = _boosters(targets=1)
+    first = model_registry.save_model('swish', boosters, ['a', 'b'], ['swish'], version='v1')
+    model_registry.save_model('swish', boosters, ['a', 'b'], ['swish'], version='v2', set_latest=False)
+
+    assert model_registry.latest_version('swish') == first
+    assert model_registry.list_versions('swish') == ['v1', 'v2']
+    assert model_registry.load_model('swish', 'v2').version == 'v2'
+
+
+def test_missing_version_raises(registry):
+    with pytest.raises(FileNotFoundError):
+        model_registry.load_model('unknown')
+
+
+def test_data_hash_is_order_sensitive():
+    frame = pd.DataFrame({'a': [1, 2, 3]})
+    assert model_registry.compute_data_hash(frame) == model_registry.compute_data_hash(frame.copy())
+    assert model_registry.compute_data_hash(frame) != model_registry.compute_data_hash(frame.iloc[::-1])
+
+
+def test_versions_order_numerically_without_a_latest_marker(registry):
+    boosters, _ = _boosters(targets=1)
+    for version in ['20250101T000000Z', '20250101T000000Z.2', '20250101T000000Z.10', '20250101T000000Z.1']:
+        model_registry.save_model('swish', boosters, ['a', 'b'], ['swish'], version=version, set_latest=False)
+
+    assert model_registry.list_versions('swish') == [
+        '20250101T000000Z', '20250101T000000Z.1', '20250101T000000Z.2', '20250101T000000Z.10']
+    assert model_registry.latest_version('swish') == '20250101T000000Z.10'
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from config import STATS_TO_PROJECT
+from simulate_projections import rank_draws, simulate_projections
+
+
+def _projections(players=30, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({stat: rng.uniform(1, 20, players) for stat in STATS_TO_PROJECT})
+    for stat in ('field_goal_pct', 'free_throw_pct', 'true_shooting_pct', 'usage_rate'):
+        if stat in frame:
+            frame[stat] = rng.uniform(0.3, 0.9, players)
+    return frame
+
+
+def test_rank_draws_ranks_each_draw_best_first():
+    ranks = rank_draws(np.array([[1.0, 3.0, 2.0], [0.5, -1.0, 4.0]]))
+    assert ranks.tolist() == [[3, 1, 2], [2, 3, 1]]
+
+
+def test_simulation_ranges_and_top_n_odds():
+    projections = _projections()
+    covariance = np.diag(np.full(len(STATS_TO_PROJECT), 0.5))
+
+    summary = simulate_projections(projections, covariance, n_draws=400, chunk_size=150, top_n=10)
+
+    assert (summary['swish_score_floor'] <= summary['swish_score_median']).all()
+    assert (summary['swish_score_median'] <= summary['swish_score_ceiling']).all()
+    assert summary['top_n_probability'].between(0, 1).all()
+    # Every simulated season has exactly top_n players inside the top N
+    assert summary['top_n_probability'].sum() == np.float64(10)
+    assert summary['expected_rank'].between(1, len(projections)).all()
+    for stat in STATS_TO_PROJECT:
+        assert (summary[f'{stat}_floor'] <= summary[f'{stat}_ceiling']).all()
+        assert (summary[f'{stat}_floor'] >= 0).all()
+
+
+def test_simulation_is_reproducible_with_a_seed():
+    projections = _projections()
+    covariance = np.diag(np.full(len(STATS_TO_PROJECT), 0.5))
+
+    first = simulate_projections(projections, covariance, n_draws=100, seed=7)
+    second = simulate_projections(projections, covariance, n_draws=100, seed=7)
+    pd.testing.assert_frame_equal(first, second)
@@ -0,0 +1,85 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+import train_game_model as tgm
+
+
+def _games(player_id, count, start='2024-10-22'):
+    games = pd.DataFrame({
+        'player_id': player_id,
+        'game_date': pd.date_range(start, periods=count, freq='2D').strftime('%Y-%m-%d'),
+        'opponent': ['LAL vs. BOS', 'LAL @ BOS'] * (count // 2) + ['LAL vs. BOS'] * (count % 2),
+    })
+    rng = np.random.default_rng(len(player_id) + count)
+    for stat in tgm.GAME_STATS_TO_PROJECT:
+        games[stat] = rng.integers(0, 30, count).astype(float)
+    return games
+
+
+def test_chunk_without_training_rows_writes_no_shard(tmp_path):
+    # The middle chunk's player has fewer games than the longest rolling window
+    chunks = [_games('a', 30), _games('b', 5), _games('c', 25)]
+    shard_dir = str(tmp_path / 'shards')
+
+    tgm.write_training_shards(chunks, shard_dir=shard_dir)
+
+    shard_paths = sorted(glob.glob(os.path.join(shard_dir, 'shard_*.npz')))
+    assert len(shard_paths) == 2
+    for path in shard_paths:
+        with np.load(path) as shard:
+            assert len(shard['y'])
+
+    iterator = tgm.ShardIterator(shard_paths, 0, os.path.join(shard_dir, 'xgb_cache'))
+    matrix = tgm._external_memory_matrix(iterator)
+    expected_rows = (30 - tgm.MAX_WINDOW) + (25 - tgm.MAX_WINDOW)
+    assert matrix.num_row() == expected_rows
+
+
+def test_holdout_is_the_most_recent_games_across_shards(tmp_path):
+    # Player 'c' only played in the last days of the data, so their whole shard is held out
+    chunks = [_games('a', 30, start='2024-10-22'), _games('c', 14, start='2024-12-10')]
+    shard_dir = str(tmp_path / 'shards')
+    tgm.write_training_shards(chunks, shard_dir=shard_dir)
+    shard_paths = sorted(glob.glob(os.path.join(shard_dir, 'shard_*.npz')))
+
+    cutoff, valid_X, valid_y = tgm.holdout_split(shard_paths, holdout_days=28)
+
+    last_day = (pd.Timestamp('2024-12-10') + pd.Timedelta(days=26) - pd.Timestamp('1970-01-01')).days
+    assert cutoff == last_day - 27
+    a_days = (pd.date_range('2024-10-22', periods=30, freq='2D') - pd.Timestamp('1970-01-01')).days[tgm.MAX_WINDOW:]
+    c_rows = 14 - tgm.MAX_WINDOW
+    assert len(valid_y) == int((a_days >= cutoff).sum()) + c_rows
+
+    iterator = tgm.ShardIterator(shard_paths, 0, os.path.join(shard_dir, 'xgb_cache'), before_day=cutoff)
+    matrix = tgm._external_memory_matrix(iterator)
+    assert matrix.num_row() == int((a_days < cutoff).sum())
+
+
+class _VenueModel:
+    """Predicts 10 at home and 0 away, and records the rows it was given."""
+    features = tgm.game_feature_names()
+    targets = ['points']
+
+    def __init__(self):
+        self.inputs = []
+
+    def predict(self, X):
+        self.inputs.append(X.copy())
+        return X['is_home'].to_numpy() * 10
+
+
+def test_next_game_features_are_filled():
+    tails = pd.concat([_games('a', tgm.MAX_WINDOW + 2)], ignore_index=True)
+    model = _VenueModel()
+
+    projections = tgm.project_next_games(tails, model)
+
+    assert len(projections) == 1
+    assert projections['points'].tolist() == [5.0]
+    for X in model.inputs:
+        # Games are every other day, so the median rest is 2 days
+        assert X['days_rest'].tolist() == [2.0]
+        assert X.notna().all().all()
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+import model_registry
+import train_model as tm
+
+FEATURES = ['f0', 'f1']
+TARGETS = [f'target_{stat}' for stat in tm.STATS_TO_PROJECT]
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, 'REGISTRY_PATH', str(tmp_path))
+    return tmp_path
+
+
+def _season_rows(seasons, players_per_season, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for season in seasons:
+        df = pd.DataFrame({
+            'player_id': np.arange(players_per_season),
+            'season': season,
+            'f0': rng.normal(size=players_per_season),
+            'f1': rng.normal(size=players_per_season),
+        })
+        for i, target in enumerate(TARGETS):
+            df[target] = df['f0'] * (i + 1) + rng.normal(scale=0.1, size=players_per_season)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _register_previous(df_model, retention_players):
+    trained_through = df_model['season'].max()
+    fit_rows = df_model[~((df_model['season'] == trained_through) & df_model['player_id'].isin(retention_players or []))]
+    boosters = []
+    for target in TARGETS:
+        dtrain = xgb.DMatrix(fit_rows[FEATURES], label=fit_rows[target])
+        boosters.append(xgb.train({'max_depth': 2, 'seed': 0}, dtrain, num_boost_round=10))
+    extra = {'trained_through_season': trained_through, 'training_mode': 'full'}
+    if retention_players is not None:
+        extra['retention_players'] = retention_players
+    return model_registry.save_model(tm.STATS_MODEL_NAME, boosters, FEATURES, tm.STATS_TO_PROJECT,
+                                     params={'max_depth': 2}, extra=extra)
+
+
+def test_sample_players_never_takes_every_player():
+    rng = np.random.default_rng(0)
+    assert tm._sample_players([7], 0.5, rng) == []
+    assert len(tm._sample_players([1, 2], 0.9, rng)) == 1
+    assert len(tm._sample_players(range(100), 0.1, rng)) == 10
+
+
+def test_single_new_player_falls_back_to_full_retrain(registry):
+    old_rows = _season_rows(['2020-21', '2021-22'], 40)
+    previous_version = _register_previous(old_rows, retention_players=[0, 1, 2, 3])
+    new_rows = _season_rows(['2022-23'], 1, seed=1)
+
+    version = tm.incremental_retrain(pd.concat([old_rows, new_rows], ignore_index=True), FEATURES, TARGETS)
+
+    assert version is None
+    assert model_registry.latest_version(tm.STATS_MODEL_NAME) == previous_version
+
+
+def test_model_without_retention_players_is_not_warm_started(registry):
+    old_rows = _season_rows(['2020-21', '2021-22'], 40)
+    _register_previous(old_rows, retention_players=None)
+    new_rows = _season_rows(['2022-23'], 40, seed=1)
+
+    assert tm.incremental_retrain(pd.concat([old_rows, new_rows], ignore_index=True), FEATURES, TARGETS) is None
+
+
+def test_update_validation_and_acceptance_players_are_disjoint(registry, monkeypatch):
+    old_rows = _season_rows(['2020-21', '2021-22'], 40)
+    previous_version = _register_previous(old_rows, retention_players=[0, 1, 2, 3])
+    new_rows = _season_rows(['2022-23'], 50, seed=1)
+
+    row_counts = []
+    train = xgb.train
+
+    def recording_train(params, dtrain, *args, evals=(), **kwargs):
+        row_counts.append((dtrain.num_row(), evals[0][0].num_row()))
+        return train(params, dtrain, *args, evals=evals, **kwargs)
+
+    monkeypatch.setattr(tm.xgb, 'train', recording_train)
+    version = tm.incremental_retrain(pd.concat([old_rows, new_rows], ignore_index=True), FEATURES, TARGETS,
+                                     tolerance=float('inf'))
+
+    assert version is not None and version != previous_version
+    manifest = model_registry.load_model(tm.STATS_MODEL_NAME, version).manifest
+    acceptance_players = manifest['retention_players']
+    assert manifest['trained_through_season'] == '2022-23'
+    assert manifest['parent_version'] == previous_version
+    assert len(acceptance_players) == 5
+    # Each booster trains on the update players and stops early on separate validation players
+    assert set(row_counts) == {(40, 5)}
+    assert 'retention_mse' in manifest['metrics'] and 'acceptance_mse' in manifest['metrics']
@@ -0,0 +1,355 @@
+"""
+Out-of-core game-level projection model trained on the game_logs table.
+
+Game logs are streamed from the database in keyset-paginated pages and processed in
+bounded chunks: each chunk gets rolling-form features computed from the games before
+it (carrying the previous chunk's trailing games across the boundary), and is written
+to disk as a compressed shard. XGBoost then trains from the shards through an external
+memory iterator, so memory stays bounded by the chunk size rather than the table size.
+
+The trailing games of every player are kept while streaming, so next-game stat lines
+for every active player are produced in one batch at the end.
+
+Usage:
+    python train_game_model.py            # stream, train, register and project
+    python train_game_model.py --reuse    # train from shards written by a previous run
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+# Add python_scripts to the path to import db_connector
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python_scripts')))
+from db_connector import get_supabase_client, stream_game_logs as db_stream_game_logs
+from config import (
+    GAME_STATS_TO_PROJECT,
+    GAME_ROLLING_STATS,
+    GAME_ROLLING_WINDOWS,
+    GAME_LOG_PAGE_SIZE,
+    GAME_LOG_CHUNK_ROWS,
+    GAME_MODEL_NAME,
+    GAME_MODEL_PARAMS,
+    GAME_MODEL_ROUNDS,
+    GAME_MODEL_HOLDOUT_DAYS,
+    ACTIVE_PLAYER_DAYS
+)
+from model_registry import save_model, load_model
+from instrumentation import stage, print_stage_summary
+from profiling import add_profiling_arguments, apply_profiling_arguments
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARD_DIR = os.path.join(SCRIPT_DIR, 'game_model_cache')
+
+GAME_LOG_COLUMNS = ['player_id', 'game_date', 'opponent'] + sorted(set(GAME_ROLLING_STATS) | set(GAME_STATS_TO_PROJECT))
+MAX_WINDOW = max(GAME_ROLLING_WINDOWS)
+
+
+def game_feature_names():
+    """Returns the game model's feature names, in matrix order."""
+    names = [f'{stat}_last_{window}' for stat in GAME_ROLLING_STATS for window in GAME_ROLLING_WINDOWS]
+    return names + ['days_rest', 'is_home']
+
+
+def stream_game_logs(page_size=GAME_LOG_PAGE_SIZE, chunk_rows=GAME_LOG_CHUNK_ROWS, league='nba'):
+    """
+    Streams one league's game model columns ordered by (player_id, game_date) in bounded chunks.
+
+    Yields:
+        pd.DataFrame: Chunks of roughly `chunk_rows` game logs.
+    """
+    return db_stream_game_logs(GAME_LOG_COLUMNS, league=league, page_size=page_size, chunk_rows=chunk_rows)
+
+
+def build_game_features(games):
+    """
+    Computes rolling-form features for each game from the games that preceded it.
+
+    Args:
+        games (pd.DataFrame): Game logs sorted by player_id and game_date.
+
+    Returns:
+        pd.DataFrame: Feature columns aligned to `games`, plus 'prior_games'.
+    """
+    by_player = games.groupby('player_id', sort=False)
+    features = pd.DataFrame(index=games.index)
+
+    for stat in GAME_ROLLING_STATS:
+        prior = by_player[stat].shift(1)
+        prior_by_player = prior.groupby(games['player_id'], sort=False)
+        for window in GAME_ROLLING_WINDOWS:
+            features[f'{stat}_last_{window}'] = prior_by_player.transform(
+                lambda s, w=window: s.rolling(w, min_periods=w).mean())
+
+    game_dates = pd.to_datetime(games['game_date'])
+    features['days_rest'] = (game_dates - game_dates.groupby(games['player_id'], sort=False).shift(1)).dt.days
+    features['is_home'] = games['opponent'].str.contains('vs.', regex=False).astype(np.float32)
+    features['prior_games'] = by_player.cumcount()
+    return features
+
+
+def _epoch_days(game_dates):
+    return (pd.to_datetime(game_dates) - pd.Timestamp('1970-01-01')).dt.days.to_numpy(dtype=np.int32)
+
+
+def write_training_shards(chunks, shard_dir=SHARD_DIR):
+    """
+    Turns streamed game log chunks into on-disk training shards.
+
+    Each chunk is prefixed with the previous chunk's trailing games for the player it
+    ended on, so rolling windows are correct across chunk boundaries. Only games with a
+    full rolling window behind them become training rows. Each row's game date is stored
+    with it (as days since the epoch), so training can hold out the most recent games.
+
+    Returns:
+        pd.DataFrame: The last MAX_WINDOW games of every player, for inference.
+    """
+    if os.path.isdir(shard_dir):
+        shutil.rmtree(shard_dir)
+    os.makedirs(shard_dir)
+
+    feature_names = game_feature_names()
+    tails = []
+    carry = None
+    total_rows = 0
+
+    for shard_idx, chunk in enumerate(chunks):
+        chunk['is_carry'] = False
+        games = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+        features = build_game_features(games)
+
+        train_mask = (~games['is_carry']) & (features['prior_games'] >= MAX_WINDOW)
+        train_mask &= features[feature_names].notna().all(axis=1) & games[GAME_STATS_TO_PROJECT].notna().all(axis=1)
+        # An empty shard would make XGBoost reuse the previous batch, or leave nothing to validate on
+        if train_mask.any():
+            np.savez_compressed(
+                os.path.join(shard_dir, f'shard_{shard_idx:05d}.npz'),
+                X=features.loc[train_mask, feature_names].to_numpy(dtype=np.float32),
+                y=games.loc[train_mask, GAME_STATS_TO_PROJECT].to_numpy(dtype=np.float32),
+                day=_epoch_days(games.loc[train_mask, 'game_date'])
+            )
+        total_rows += int(train_mask.sum())
+
+        # Rows are ordered by player, so only the last player can continue into the next chunk
+        chunk_tails = games.groupby('player_id', sort=False).tail(MAX_WINDOW)
+        last_player = games['player_id'].iloc[-1]
+        carry = chunk_tails[chunk_tails['player_id'] == last_player].assign(is_carry=True)
+        tails.append(chunk_tails[chunk_tails['player_id'] != last_player])
+        print(f"  Shard {shard_idx}: {len(chunk)} game logs -> {int(train_mask.sum())} training rows")
+
+    if carry is not None:
+        tails.append(carry)
+    print(f"Wrote {total_rows} training rows to {shard_dir}")
+
+    if not tails:
+        return pd.DataFrame(columns=GAME_LOG_COLUMNS)
+    return pd.concat(tails, ignore_index=True).drop(columns=['is_carry'])
+
+
+class ShardIterator(xgb.DataIter):
+    """
+    Feeds on-disk shards to XGBoost one at a time for external-memory training.
+
+    With `before_day`, only games played before that day are fed, and shards without any
+    are skipped, so XGBoost never receives an empty batch.
+    """
+
+    def __init__(self, shard_paths, target_idx, cache_prefix, before_day=None):
+        self._shard_paths = shard_paths
+        self._target_idx = target_idx
+        self._before_day = before_day
+        self._position = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        while self._position < len(self._shard_paths):
+            with np.load(self._shard_paths[self._position]) as shard:
+                X, y = shard['X'], shard['y']
+                if self._before_day is not None:
+                    keep = shard['day'] < self._before_day
+                    X, y = X[keep], y[keep]
+            self._position += 1
+            if len(y):
+                input_data(data=X, label=y[:, self._target_idx], feature_names=game_feature_names())
+                return True
+        return False
+
+    def reset(self):
+        self._position = 0
+
+
+def holdout_split(shard_paths, holdout_days=GAME_MODEL_HOLDOUT_DAYS):
+    """
+    Picks the cutoff for the temporal holdout and loads the held-out rows.
+
+    Shards are ordered by player, so the holdout is the games of the last
+    `holdout_days` days across every shard rather than any one shard.
+
+    Returns:
+        tuple: (cutoff day, held-out X, held-out y). Games on or after the cutoff day
+            (days since the epoch) are held out.
+    """
+    last_day = None
+    for path in shard_paths:
+        with np.load(path) as shard:
+            if 'day' not in shard.files:
+                raise ValueError(f"{path} has no game dates; rerun without --reuse to rewrite the shards.")
+            last_day = max(int(shard['day'].max()), last_day or 0)
+    cutoff = last_day - holdout_days + 1
+
+    held_out_X, held_out_y = [], []
+    training_rows = 0
+    for path in shard_paths:
+        with np.load(path) as shard:
+            held_out = shard['day'] >= cutoff
+            held_out_X.append(shard['X'][held_out])
+            held_out_y.append(shard['y'][held_out])
+            training_rows += int((~held_out).sum())
+    if not training_rows:
+        raise ValueError(f"Every game is within the {holdout_days}-day holdout; there is nothing to train on.")
+    return cutoff, np.concatenate(held_out_X), np.concatenate(held_out_y)
+
+
+def _external_memory_matrix(iterator):
+    """Builds an external-memory matrix, quantized when this XGBoost version supports it."""
+    if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+        return xgb.ExtMemQuantileDMatrix(iterator, max_bin=GAME_MODEL_PARAMS.get('max_bin', 256))
+    return xgb.DMatrix(iterator)
+
+
+def train_game_model(shard_dir=SHARD_DIR):
+    """
+    Trains one booster per projected stat from the on-disk shards and registers them.
+
+    Returns:
+        str: The registered model version.
+    """
+    shard_paths = sorted(glob.glob(os.path.join(shard_dir, 'shard_*.npz')))
+    if not shard_paths:
+        raise FileNotFoundError(f"No training shards found in {shard_dir}.")
+
+    # The most recent games are held out to report validation error
+    cutoff, valid_X, valid_y = holdout_split(shard_paths)
+    print(f"  Holding out {len(valid_y)} games from the last {GAME_MODEL_HOLDOUT_DAYS} days.")
+    params = {'objective': 'reg:squarederror', 'tree_method': 'hist', 'seed': 42, **GAME_MODEL_PARAMS}
+
+    boosters = []
+    valid_mse = {}
+    for target_idx, stat in enumerate(GAME_STATS_TO_PROJECT):
+        start = time.perf_counter()
+        cache_prefix = os.path.join(shard_dir, f'xgb_cache_{stat}')
+        dtrain = _external_memory_matrix(ShardIterator(shard_paths, target_idx, cache_prefix, before_day=cutoff))
+        booster = xgb.train(params, dtrain, num_boost_round=GAME_MODEL_ROUNDS)
+        boosters.append(booster)
+
+        if len(valid_y):
+            preds = booster.inplace_predict(valid_X)
+            valid_mse[stat] = float(np.mean((preds - valid_y[:, target_idx]) ** 2))
+        print(f"  Trained {stat} in {time.perf_counter() - start:.1f}s"
+              + (f" (holdout MSE {valid_mse[stat]:.3f})" if stat in valid_mse else ""))
+
+    return save_model(
+        GAME_MODEL_NAME, boosters, game_feature_names(), GAME_STATS_TO_PROJECT,
+        metrics={'holdout_mse_by_target': valid_mse, 'holdout_days': GAME_MODEL_HOLDOUT_DAYS}, params=params
+    )
+
+
+def project_next_games(tails, model, active_days=ACTIVE_PLAYER_DAYS):
+    """
+    Projects the next game's stat line for every active player in one batch.
+
+    Args:
+        tails (pd.DataFrame): The last MAX_WINDOW games of each player, sorted by player and date.
+        model (RegisteredModel): The registered game model.
+        active_days (int): Players whose last game is older than this many days before the
+            most recent game in the data are treated as inactive.
+
+    Returns:
+        pd.DataFrame: One row per active player with a projected value for each stat.
+    """
+    game_dates = pd.to_datetime(tails['game_date'])
+    last_dates = game_dates.groupby(tails['player_id']).transform('max')
+    active = last_dates >= game_dates.max() - pd.Timedelta(days=active_days)
+    recent = tails[active]
+
+    # Append a placeholder "next game" per player so the rolling features cover their last games
+    next_games = recent.groupby('player_id', sort=False).tail(1).copy()
+    next_games[GAME_STATS_TO_PROJECT] = np.nan
+    next_games['game_date'] = (pd.to_datetime(next_games['game_date']) + pd.Timedelta(days=1)).dt.strftime('%Y-%m-%d')
+    next_games['opponent'] = None
+    next_games['is_next'] = True
+
+    games = pd.concat([recent.assign(is_next=False), next_games], ignore_index=True)
+    games = games.sort_values(['player_id', 'game_date', 'is_next'], kind='stable').reset_index(drop=True)
+    features = build_game_features(games)
+
+    # The schedule is not stored, so the next game's rest is the player's median rest over
+    # their recent games, and its venue is averaged over a home and an away game
+    median_rest = features['days_rest'].where(~games['is_next']).groupby(games['player_id'], sort=False).transform('median')
+    features.loc[games['is_next'], 'days_rest'] = median_rest[games['is_next']]
+
+    is_next = games['is_next'] & (features['prior_games'] >= MAX_WINDOW)
+    X = features.loc[is_next, model.features]
+    predictions = np.mean([model.predict(X.assign(is_home=venue)).reshape(len(X), -1) for venue in (1.0, 0.0)], axis=0)
+
+    projections = pd.DataFrame(predictions, columns=model.targets, index=X.index)
+    projections.insert(0, 'player_id', games.loc[is_next, 'player_id'].to_numpy())
+    projections.insert(1, 'last_game_date', games.loc[is_next.shift(-1, fill_value=False), 'game_date'].to_numpy())
+    return projections.reset_index(drop=True)
+
+
+def upload_next_game_projections(projections_df):
+    """Upserts next-game projections to the database."""
+    if projections_df is None or projections_df.empty:
+        print("No next-game projections to upload.")
+        return
+
+    print(f"Uploading next-game projections for {len(projections_df)} players...")
+    try:
+        supabase = get_supabase_client(admin=True)
+        records = projections_df.round(3).to_dict('records')
+        supabase.table('player_next_game_projections').upsert(records, on_conflict='player_id').execute()
+        print("Successfully uploaded next-game projections.")
+    except Exception as e:
+        print(f"An error occurred while uploading next-game projections: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the game-level projection model from game_logs.")
+    parser.add_argument('--reuse', action='store_true',
+                        help="Skip streaming and train from the shards written by a previous run.")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    apply_profiling_arguments(args)
+
+    tails_path = os.path.join(SHARD_DIR, 'tails.pkl')
+    if args.reuse and os.path.exists(tails_path):
+        tails = pd.read_pickle(tails_path)
+    else:
+        print("Streaming game logs into training shards...")
+        with stage('stream_shards'):
+            tails = write_training_shards(stream_game_logs())
+            tails.to_pickle(tails_path)
+
+    print("\nTraining game-level models from external memory...")
+    with stage('train'):
+        version = train_game_model()
+
+    print("\nProjecting next games for active players...")
+    with stage('project', rows_in=len(tails)) as metrics:
+        projections = project_next_games(tails, load_model(GAME_MODEL_NAME, version))
+        metrics.rows_out = len(projections)
+    with stage('upload', rows_in=len(projections)):
+        upload_next_game_projections(projections)
+    print(projections.head(20).round(2).to_string(index=False))
+    print_stage_summary()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,42 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import TimeSeriesSplit, GridSearchCV
 from sklearn.metrics import mean_squared_error
 import xgboost as xgb
-import joblib
 import sys
 import os
+import argparse
 from sklearn.multioutput import MultiOutputRegressor
 
 # Add python_scripts to the path to import feature_engineering
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python_scripts')))
 from feature_engineering import (
-    fetch_player_stats, 
-    create_per_minute_stats, 
-    create_yoy_stats, 
-    create_age_and_experience_features,
-    create_team_context_features
+    fetch_player_stats,
+    engineer_features
 )
 
-# Import the stats we want to predict from our config file
-from config import STATS_TO_PROJECT
+# Import the stats we want to predict and the tuning budget from our config file
+from config import (
+    STATS_TO_PROJECT,
+    PARAM_GRID,
+    TUNING_TIME_BUDGET_SECONDS,
+    TUNING_ROUND_BUDGET,
+    TUNING_MIN_ROUNDS,
+    TUNING_MAX_ROUNDS,
+    EARLY_STOPPING_ROUNDS,
+    CV_MIN_TRAIN_SEASONS,
+    CV_MAX_FOLDS,
+    STATS_MODEL_NAME,
+    INCREMENTAL_MAX_ROUNDS,
+    INCREMENTAL_VALIDATION_FRACTION,
+    INCREMENTAL_ACCEPTANCE_FRACTION,
+    INCREMENTAL_RETENTION_FRACTION,
+    INCREMENTAL_REGRESSION_TOLERANCE
+)
+from hyperparameter_search import successive_halving_search
+from season_cv import season_walk_forward_splits, FoldMatrixCache
+from model_registry import save_model, load_model, compute_data_hash
+from instrumentation import stage, print_stage_summary
+from profiling import add_profiling_arguments, apply_profiling_arguments
 
 # Define the stats we want to predict for the next season
 TARGET_STATS = STATS_TO_PROJECT
@@ -67,99 +84,314 @@ def prepare_data_for_modeling(df, target_stats):
 
     return df_model, features, target_names
 
-if __name__ == '__main__':
-    # 1. Fetch and engineer features
-    player_stats_df = fetch_player_stats()
-    if player_stats_df is not None:
-        player_stats_df = create_per_minute_stats(player_stats_df)
-        player_stats_df = create_yoy_stats(player_stats_df)
-        player_stats_df = create_age_and_experience_features(player_stats_df)
-        player_stats_df = create_team_context_features(player_stats_df)
-
-        # 2. Prepare data for modeling
-        df_model, features, targets = prepare_data_for_modeling(player_stats_df, STATS_TO_PROJECT)
-        
-        # Time Series Cross-Validation for robust evaluation
-        tscv = TimeSeriesSplit(n_splits=5)
-        X = df_model[features]
-        y = df_model[targets]
+def cross_validate(fold_cache, targets):
+    """
+    Runs season walk-forward cross-validation with default parameters.
+
+    Returns:
+        tuple: (dict of per-fold MSEs by target, residual covariance across targets).
+    """
+    print("\nRunning Season Walk-Forward Cross-Validation...")
+    
+    # Store MSE for each target across all folds, and the out-of-fold residuals for simulation
+    xgb_mses_by_target = {target: [] for target in targets}
+    oof_residuals = []
+    cv_params = {'objective': 'reg:squarederror', 'tree_method': 'hist', 'max_bin': fold_cache.max_bin, 'seed': 42}
+
+    for i, test_season, _, _, y_train, y_test in fold_cache.folds():
+        fold_mses = []
+        fold_residuals = np.empty_like(y_test)
+        for target_idx, target_name in enumerate(targets):
+            dtrain, dtest = fold_cache.set_target(i, target_idx)
+            booster = xgb.train(cv_params, dtrain, num_boost_round=100)
+            preds = booster.predict(dtest)
+            fold_residuals[:, target_idx] = y_test[:, target_idx] - preds
 
-        print("\nRunning Time Series Cross-Validation...")
-        
-        # Store MSE for each target across all folds
-        xgb_mses_by_target = {target: [] for target in targets}
-
-        for i, (train_index, test_index) in enumerate(tscv.split(X)):
-            X_train, X_test = X.iloc[train_index], X.iloc[test_index]
-            y_train, y_test = y.iloc[train_index], y.iloc[test_index]
-
-            # Train and evaluate MultiOutput XGBoost
-            xgb_model = MultiOutputRegressor(
-                xgb.XGBRegressor(objective='reg:squarederror', n_estimators=100, random_state=42)
-            )
-            xgb_model.fit(X_train, y_train)
-            xgb_preds = xgb_model.predict(X_test)
-            
             # Calculate MSE for each target
-            fold_mses = mean_squared_error(y_test, xgb_preds, multioutput='raw_values')
-            for target_idx, target_name in enumerate(targets):
-                xgb_mses_by_target[target_name].append(fold_mses[target_idx])
-            
-            print(f"  Fold {i+1}: Train size={len(X_train)}, Test size={len(X_test)}, Avg XGB MSE={np.mean(fold_mses):.4f}")
-
-        print("\n--- Average Cross-Validation MSE by Stat ---")
-        for target, mses in xgb_mses_by_target.items():
-            print(f"  {target.replace('target_', ''):<20}: {np.mean(mses):.4f}")
-        print("----------------------------------------")
-
-        # Hyperparameter tuning for XGBoost
-        print("\nRunning GridSearchCV for XGBoost...")
-        # Note: We tune the base estimator, not the MultiOutputRegressor wrapper
-        param_grid = {
-            'estimator__n_estimators': [100, 200],
-            'estimator__max_depth': [3, 5],
-            'estimator__learning_rate': [0.05, 0.1],
-            'estimator__subsample': [0.7, 1.0]
+            target_mse = mean_squared_error(y_test[:, target_idx], preds)
+            xgb_mses_by_target[target_name].append(target_mse)
+            fold_mses.append(target_mse)
+        oof_residuals.append(fold_residuals)
+        
+        print(f"  Fold {i+1} (test season {test_season}): Train size={len(y_train)}, Test size={len(y_test)}, Avg XGB MSE={np.mean(fold_mses):.4f}")
+
+    print("\n--- Average Cross-Validation MSE by Stat ---")
+    for target, mses in xgb_mses_by_target.items():
+        print(f"  {target.replace('target_', ''):<20}: {np.mean(mses):.4f}")
+    print("----------------------------------------")
+
+    # Residual covariance across stats drives the Monte Carlo projection ranges
+    residual_covariance = np.cov(np.vstack(oof_residuals), rowvar=False)
+    return xgb_mses_by_target, residual_covariance
+
+def _sample_players(player_ids, fraction, rng):
+    """Draws a random `fraction` (at least one, but never every player) of the unique player ids."""
+    players = pd.unique(np.asarray(player_ids))
+    if len(players) < 2:
+        return []
+    size = max(1, int(len(players) * fraction))
+    return rng.choice(players, size=min(size, len(players) - 1), replace=False).tolist()
+
+def full_retrain(df_model, features, targets):
+    """
+    Cross-validates, tunes and trains the multi-output model from scratch on all history,
+    then registers it.
+
+    A random slice of the latest season's players is left out of the final fit and
+    recorded in the manifest, so a later incremental update can measure forgetting on
+    rows neither model was trained on.
+
+    Returns:
+        str: The registered model version.
+    """
+    # Season-grouped walk-forward cross-validation for robust evaluation
+    X = df_model[features]
+    y = df_model[targets]
+    splits = season_walk_forward_splits(df_model['season'], min_train_seasons=CV_MIN_TRAIN_SEASONS, max_folds=CV_MAX_FOLDS)
+    fold_cache = FoldMatrixCache(X, y, splits)
+
+    xgb_mses_by_target, residual_covariance = cross_validate(fold_cache, targets)
+
+    # Hyperparameter tuning for XGBoost
+    print("\nRunning successive-halving search for XGBoost...")
+    search_result = successive_halving_search(
+        fold_cache, PARAM_GRID,
+        min_rounds=TUNING_MIN_ROUNDS,
+        max_rounds=TUNING_MAX_ROUNDS,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        time_budget=TUNING_TIME_BUDGET_SECONDS,
+        round_budget=TUNING_ROUND_BUDGET,
+        random_state=42
+    )
+
+    print("\nBest parameters found:", search_result['params'])
+    print(f"Search finished in {search_result['elapsed']:.1f}s after {len(search_result['history'])} evaluations.")
+
+    best_xgb_mse = search_result['score']
+
+    print("\n--- Tuned XGBoost Model Evaluation ---")
+    print(f"Tuned XGBoost CV MSE (averaged over all stats): {best_xgb_mse:.4f}")
+    print("------------------------------------")
+
+    # Train the final model on all data with the best parameters
+    print("\nTraining the final model on all available data...")
+    final_model_params = search_result['params']
+    final_base_model = xgb.XGBRegressor(objective='reg:squarederror', tree_method='hist', **final_model_params, random_state=42)
+    final_model = MultiOutputRegressor(final_base_model)
+    latest_season = df_model['season'].max()
+    latest_rows = df_model['season'] == latest_season
+    retention_players = _sample_players(df_model.loc[latest_rows, 'player_id'], INCREMENTAL_RETENTION_FRACTION,
+                                        np.random.default_rng(42))
+    is_retention = latest_rows & df_model['player_id'].isin(retention_players)
+    final_model.fit(X[~is_retention], y[~is_retention])
+    print("Final model training complete.")
+
+    # --- Aggregated Feature Importance ---
+    feature_importances = np.zeros(len(features))
+    for estimator in final_model.estimators_:
+        feature_importances += estimator.feature_importances_
+    feature_importances /= len(final_model.estimators_)
+
+    feature_importance_df = pd.DataFrame({'feature': features, 'importance': feature_importances})
+    feature_importance_df = feature_importance_df.sort_values(by='importance', ascending=False)
+
+    print("\n--- Top 10 Most Important Features (Averaged Across All Models) ---")
+    print(feature_importance_df.head(10).to_string(index=False))
+    print("---------------------------------------------------------------------")
+
+    # Save the final model to the registry with its features, data hash and metrics
+    return save_model(
+        STATS_MODEL_NAME,
+        [estimator.get_booster() for estimator in final_model.estimators_],
+        features,
+        STATS_TO_PROJECT,
+        data_hash=compute_data_hash(X, y),
+        metrics={
+            'cv_mse': best_xgb_mse,
+            'cv_mse_by_target': {target.replace('target_', ''): float(np.mean(mses)) for target, mses in xgb_mses_by_target.items()},
+        },
+        params=final_model_params,
+        extra={
+            'residual_covariance': residual_covariance.tolist(),
+            'trained_through_season': latest_season,
+            'retention_players': retention_players,
+            'training_mode': 'full',
         }
+    )
 
-        base_xgb = xgb.XGBRegressor(objective='reg:squarederror', random_state=42)
-        multi_output_xgb = MultiOutputRegressor(base_xgb)
-        
-        grid_search = GridSearchCV(estimator=multi_output_xgb, param_grid=param_grid, 
-                                 cv=tscv, scoring='neg_mean_squared_error', n_jobs=-1, verbose=1)
-        
-        grid_search.fit(X, y)
+def _mse_by_target(boosters, X, y):
+    """Per-target MSE of a list of boosters on a float32 feature matrix."""
+    preds = np.column_stack([booster.inplace_predict(X) for booster in boosters])
+    return ((preds - y) ** 2).mean(axis=0)
 
-        print("\nBest parameters found:", grid_search.best_params_)
-        
-        best_xgb_mse = -grid_search.best_score_
-
-        print("\n--- Tuned XGBoost Model Evaluation ---")
-        print(f"Tuned XGBoost CV MSE (averaged over all stats): {best_xgb_mse:.4f}")
-        print("------------------------------------")
-
-        # Train the final model on all data with the best parameters
-        print("\nTraining the final model on all available data...")
-        final_model_params = {key.replace('estimator__', ''): value for key, value in grid_search.best_params_.items()}
-        final_base_model = xgb.XGBRegressor(objective='reg:squarederror', **final_model_params, random_state=42)
-        final_model = MultiOutputRegressor(final_base_model)
-        final_model.fit(X, y)
-        print("Final model training complete.")
-
-        # --- Aggregated Feature Importance ---
-        feature_importances = np.zeros(len(features))
-        for estimator in final_model.estimators_:
-            feature_importances += estimator.feature_importances_
-        feature_importances /= len(final_model.estimators_)
-
-        feature_importance_df = pd.DataFrame({'feature': features, 'importance': feature_importances})
-        feature_importance_df = feature_importance_df.sort_values(by='importance', ascending=False)
-
-        print("\n--- Top 10 Most Important Features (Averaged Across All Models) ---")
-        print(feature_importance_df.head(10).to_string(index=False))
-        print("---------------------------------------------------------------------")
-
-        # Save the final model
-        model_filename = 'multi_output_xgb_model.joblib'
-        joblib.dump(final_model, model_filename)
-        print(f"Model saved to {model_filename}")
+def incremental_retrain(df_model, features, targets, previous_version=None,
+                        max_rounds=INCREMENTAL_MAX_ROUNDS,
+                        validation_fraction=INCREMENTAL_VALIDATION_FRACTION,
+                        acceptance_fraction=INCREMENTAL_ACCEPTANCE_FRACTION,
+                        tolerance=INCREMENTAL_REGRESSION_TOLERANCE):
+    """
+    Continues boosting the registered model on season pairs it has not seen yet.
+
+    The newly labeled rows (feature seasons after the model's 'trained_through_season')
+    are split by player into an update set, a validation set and an acceptance set.
+    Each target's booster keeps its existing trees and adds up to `max_rounds` new ones
+    on the update set, with early stopping on the validation set. The update is
+    accepted only if the MSE on the acceptance set and on the previous model's
+    retention players (rows of its last season that it was never fit on, to catch
+    forgetting) stay within `tolerance` of the previous model; otherwise the caller
+    should fully retrain. The acceptance players become the new version's retention
+    players.
+
+    Returns:
+        str: The registered (or already current) version, or None if the update was
+            rejected or impossible.
+    """
+    try:
+        previous_model = load_model(STATS_MODEL_NAME, previous_version)
+    except FileNotFoundError:
+        print("No registered model to warm-start from.")
+        return None
+
+    if list(previous_model.features) != list(features) or list(previous_model.targets) != list(STATS_TO_PROJECT):
+        print("Registered model was trained on a different feature or target list.")
+        return None
+
+    trained_through = previous_model.manifest.get('trained_through_season')
+    if trained_through is None:
+        print(f"Model version {previous_model.version} does not record the seasons it was trained on.")
+        return None
+
+    new_rows = df_model[df_model['season'] > trained_through]
+    if new_rows.empty:
+        print(f"No newly labeled season pairs after {trained_through}; model version {previous_model.version} is current.")
+        return previous_model.version
+
+    # Rows of the last trained season that the previous model held out of its fit
+    retention_rows = df_model[(df_model['season'] == trained_through)
+                              & df_model['player_id'].isin(previous_model.manifest.get('retention_players') or [])]
+    if retention_rows.empty:
+        print(f"Model version {previous_model.version} has no held-out {trained_through} rows to check for forgetting.")
+        return None
+
+    # Split the new players into update, validation (early stopping) and acceptance sets
+    new_players = np.random.default_rng(42).permutation(new_rows['player_id'].unique())
+    n_validation = max(1, int(len(new_players) * validation_fraction))
+    n_acceptance = max(1, int(len(new_players) * acceptance_fraction))
+    if len(new_players) <= n_validation + n_acceptance:
+        print(f"Only {len(new_players)} new players; too few to split into update, validation and acceptance sets.")
+        return None
+    validation_players = new_players[:n_validation].tolist()
+    acceptance_players = new_players[n_validation:n_validation + n_acceptance].tolist()
+    is_validation = new_rows['player_id'].isin(validation_players).to_numpy()
+    is_acceptance = new_rows['player_id'].isin(acceptance_players).to_numpy()
+    is_update = ~(is_validation | is_acceptance)
+
+    new_seasons = sorted(new_rows['season'].unique())
+    print(f"\nWarm-starting model version {previous_model.version} on {int(is_update.sum())} new rows from {new_seasons}...")
+
+    X_new = new_rows[features].to_numpy(dtype=np.float32)
+    y_new = new_rows[targets].to_numpy(dtype=np.float32)
+    X_update, y_update = X_new[is_update], y_new[is_update]
+    X_validation, y_validation = X_new[is_validation], y_new[is_validation]
+    X_acceptance, y_acceptance = X_new[is_acceptance], y_new[is_acceptance]
+    X_retention = retention_rows[features].to_numpy(dtype=np.float32)
+    y_retention = retention_rows[targets].to_numpy(dtype=np.float32)
+
+    params = {key: value for key, value in previous_model.manifest.get('params', {}).items() if key != 'n_estimators'}
+    booster_params = {'objective': 'reg:squarederror', 'tree_method': 'hist', 'seed': 42, 'eval_metric': 'rmse'}
+    booster_params.update({('eta' if key == 'learning_rate' else key): value for key, value in params.items()})
+
+    dupdate = xgb.DMatrix(X_update, feature_names=list(features))
+    dvalidation = xgb.DMatrix(X_validation, feature_names=list(features))
+    updated_boosters = []
+    for target_idx, booster in enumerate(previous_model.boosters):
+        dupdate.set_label(y_update[:, target_idx])
+        dvalidation.set_label(y_validation[:, target_idx])
+        updated = xgb.train(
+            booster_params, dupdate, num_boost_round=max_rounds, xgb_model=booster.copy(),
+            evals=[(dvalidation, 'validation')], early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False
+        )
+        # Keep only the rounds up to the best validation score
+        updated_boosters.append(updated[:updated.best_iteration + 1])
+
+    previous_acceptance_mse = _mse_by_target(previous_model.boosters, X_acceptance, y_acceptance)
+    updated_acceptance_mse = _mse_by_target(updated_boosters, X_acceptance, y_acceptance)
+    previous_retention_mse = _mse_by_target(previous_model.boosters, X_retention, y_retention)
+    updated_retention_mse = _mse_by_target(updated_boosters, X_retention, y_retention)
+
+    print(f"  Acceptance MSE (avg over stats): previous={previous_acceptance_mse.mean():.4f}, updated={updated_acceptance_mse.mean():.4f}")
+    print(f"  Held-out {trained_through} MSE (avg over stats): previous={previous_retention_mse.mean():.4f}, updated={updated_retention_mse.mean():.4f}")
+
+    if (updated_acceptance_mse.mean() > previous_acceptance_mse.mean() * (1 + tolerance)
+            or updated_retention_mse.mean() > previous_retention_mse.mean() * (1 + tolerance)):
+        print("  Validation error regressed; rejecting the incremental update.")
+        return None
+
+    X = df_model[features]
+    y = df_model[targets]
+    return save_model(
+        STATS_MODEL_NAME,
+        updated_boosters,
+        features,
+        STATS_TO_PROJECT,
+        data_hash=compute_data_hash(X, y),
+        metrics={
+            'acceptance_mse': float(updated_acceptance_mse.mean()),
+            'previous_acceptance_mse': float(previous_acceptance_mse.mean()),
+            'retention_mse': float(updated_retention_mse.mean()),
+            'previous_retention_mse': float(previous_retention_mse.mean()),
+            'cv_mse': previous_model.metrics.get('cv_mse'),
+            'cv_mse_by_target': previous_model.metrics.get('cv_mse_by_target'),
+        },
+        params=previous_model.manifest.get('params', {}),
+        extra={
+            'residual_covariance': previous_model.manifest.get('residual_covariance'),
+            'trained_through_season': df_model['season'].max(),
+            'retention_players': acceptance_players,
+            'training_mode': 'incremental',
+            'parent_version': previous_model.version,
+        }
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the multi-output next-season projection model.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Continue boosting the latest registered model on newly labeled seasons, "
+                             "falling back to full retraining if validation error regresses.")
+    parser.add_argument('--from-version', default=None,
+                        help="Registry version to warm-start from (defaults to LATEST).")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    apply_profiling_arguments(args)
+
+    # 1. Fetch and engineer features
+    with stage('fetch') as metrics:
+        player_stats_df = fetch_player_stats()
+        metrics.rows_out = None if player_stats_df is None else len(player_stats_df)
+    if player_stats_df is None:
+        return
+
+    with stage('engineer_features', rows_in=len(player_stats_df)) as metrics:
+        player_stats_df = engineer_features(player_stats_df)
+        metrics.rows_out = len(player_stats_df)
+
+    # 2. Prepare data for modeling
+    with stage('prepare', rows_in=len(player_stats_df)) as metrics:
+        df_model, features, targets = prepare_data_for_modeling(player_stats_df, STATS_TO_PROJECT)
+        metrics.rows_out = len(df_model)
+
+    # 3. Train, warm-starting from the previous model when requested
+    if args.incremental:
+        with stage('incremental_retrain', rows_in=len(df_model)):
+            version = incremental_retrain(df_model, features, targets, previous_version=args.from_version)
+        if version is not None:
+            print_stage_summary()
+            return
+        print("\nFalling back to full retraining...")
+
+    with stage('full_retrain', rows_in=len(df_model)):
+        full_retrain(df_model, features, targets)
+    print_stage_summary()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Asyncio mode of the in-memory pipeline (`run_pipeline.py --async`).
+
+Every season of a league is fetched, scored and seeded on one event loop: NBA API
+requests go through a shared httpx.AsyncClient and database writes through the shared
+async Supabase client, so hundreds of requests can be in flight on a single thread.
+Backpressure comes from three limits in config: NBA API requests in flight, Supabase
+requests in flight, and seasons held in memory at once.
+
+nba_api only sends requests with `requests`, so its endpoint classes are used here to
+build each request (get_request=False) and to parse the response; only the transport
+is replaced. Scoring and the seeded rows are the same as in the threaded pipeline.
+"""
+import asyncio
+
+import config
+from instrumentation import stage, print_stage_summary, get_run_id
+from run_pipeline import clean_player_data, _season_seeded
+
+async def fetch_stats_frame(http, request_slots, season, league_id, measure_type):
+    """
+    Fetches one LeagueDashPlayerStats result set over the async HTTP client.
+
+    Args:
+        http (httpx.AsyncClient): Shared NBA API client.
+        request_slots (asyncio.Semaphore): Bounds the NBA API requests in flight.
+        season (str): Season label, e.g. '2024-25'.
+        league_id (str): nba_api league id.
+        measure_type (str): 'Base' or 'Advanced'.
+
+    Returns:
+        pd.DataFrame: The endpoint's first result set.
+    """
+    from nba_api.stats.endpoints import leaguedashplayerstats
+    from nba_api.stats.library.http import NBAStatsHTTP
+
+    endpoint = leaguedashplayerstats.LeagueDashPlayerStats(
+        season=season, league_id_nullable=league_id, per_mode_detailed='PerGame',
+        measure_type_detailed_defense=measure_type, get_request=False)
+    # Same query nba_api would send: sorted, with unset parameters left out
+    params = sorted((key, value) for key, value in endpoint.parameters.items() if value is not None)
+    url = NBAStatsHTTP.base_url.format(endpoint=endpoint.endpoint)
+
+    async with request_slots:
+        response = await http.get(url, params=params)
+        # A small delay to be polite to the API, before the slot is released
+        await asyncio.sleep(config.REQUEST_DELAY)
+    response.raise_for_status()
+
+    endpoint.nba_response = NBAStatsHTTP.nba_response(
+        response=NBAStatsHTTP().clean_contents(response.text), status_code=response.status_code, url=str(response.url))
+    endpoint.load_response()
+    return endpoint.get_data_frames()[0]
+
+async def fetch_season_data_async(http, request_slots, season, league=config.DEFAULT_LEAGUE):
+    """Fetches and merges base and advanced stats for a single season, with both requests in flight at once."""
+    import pandas as pd
+
+    league_id = config.LEAGUES[league]['league_id']
+    print(f"  Fetching {league} data for season: {season}...")
+    with stage('fetch_season', season=season, league=league) as metrics:
+        try:
+            base_stats, advanced_stats = await asyncio.gather(
+                fetch_stats_frame(http, request_slots, season, league_id, 'Base'),
+                fetch_stats_frame(http, request_slots, season, league_id, 'Advanced'))
+
+            merged_df = pd.merge(base_stats, advanced_stats[['PLAYER_ID', 'TS_PCT', 'USG_PCT']], on='PLAYER_ID', how='left')
+            merged_df['SEASON'] = season
+            metrics.rows_out = len(merged_df)
+            print(f"    -> Successfully fetched and merged data for {season}.")
+            return merged_df
+        except Exception as e:
+            metrics.tags['error'] = str(e)
+            print(f"    -> ERROR: Could not fetch {league} data for season {season}: {e}")
+            return None
+
+async def seed_season_async(df, db_slots, checkpoints=None, progress_stage='seed'):
+    """
+    Seeds one season's scored rows through the async Supabase client.
+
+    The asyncio counterpart of seed.seed_data: players are upserted, their ids looked
+    up, and the stat chunks then upserted concurrently, each holding a slot of
+    `db_slots` while it is in flight. Progress is recorded the same way, as the
+    number of leading records acknowledged.
+
+    Args:
+        df (pd.DataFrame): One season of one league, with z-scores and swish scores.
+        db_slots (asyncio.Semaphore): Bounds the Supabase requests in flight.
+        checkpoints (RunCheckpoints): If given, acknowledged work is recorded so a
+            rerun of the same run resumes after it.
+        progress_stage (str): Name the progress is recorded under.
+
+    Returns:
+        bool: True if every record was upserted.
+    """
+    from db_connector import get_async_supabase_client
+    from seed import STATS_CHUNK_SIZE, league_of, build_player_records, build_stats_records
+
+    league = league_of(df)
+    supabase = await get_async_supabase_client(admin=True)
+    progress = checkpoints.progress(progress_stage) if checkpoints is not None else {}
+
+    async def execute(query):
+        async with db_slots:
+            return await query.execute()
+
+    # 1. Upsert players into the 'players' table
+    if not progress.get('players_done'):
+        try:
+            await execute(supabase.table('players').upsert(build_player_records(df, league), on_conflict='league, full_name'))
+            if checkpoints is not None:
+                checkpoints.set_progress(progress_stage, players_done=True)
+        except Exception as e:
+            print(f"    -> FATAL: Error upserting {progress_stage} players: {e}")
+            return False
+
+    # 2. Fetch player IDs to map names to foreign keys
+    try:
+        response = await execute(supabase.table('players').select('player_id, full_name').eq('league', league)
+                                 .in_('full_name', df['PlayerName'].unique().tolist()))
+        player_id_map = {p['full_name']: p['player_id'] for p in response.data}
+        df['player_id'] = df['PlayerName'].map(player_id_map)
+    except Exception as e:
+        print(f"    -> FATAL: Error fetching {progress_stage} player IDs: {e}")
+        return False
+
+    # 3. Upsert the player stats, every chunk at once
+    stats_records = build_stats_records(df)
+    start = progress.get('stats_rows_acked', 0) if progress.get('stats_rows') == len(stats_records) else 0
+    offsets = list(range(start, len(stats_records), STATS_CHUNK_SIZE))
+    acked, acked_through = set(), start
+
+    async def upsert_chunk(offset):
+        nonlocal acked_through
+        chunk = stats_records[offset:offset + STATS_CHUNK_SIZE]
+        await execute(supabase.rpc('upsert_player_stats', {'p_rows': chunk}))
+        acked.add(offset)
+        # Only the leading run of acknowledged chunks counts; later ones are resent on resume
+        while acked_through in acked:
+            acked_through = min(acked_through + STATS_CHUNK_SIZE, len(stats_records))
+        if checkpoints is not None:
+            checkpoints.set_progress(progress_stage, stats_rows=len(stats_records), stats_rows_acked=acked_through)
+
+    results = await asyncio.gather(*(upsert_chunk(offset) for offset in offsets), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        print(f"    -> FATAL: Error upserting {progress_stage} player stats: {errors[0]}")
+        return False
+    return True
+
+async def main_async(checkpoints=None, max_in_flight=config.ASYNC_MAX_SEASONS_IN_FLIGHT, league=config.DEFAULT_LEAGUE,
+                     max_stats_requests=config.ASYNC_MAX_STATS_REQUESTS, max_db_requests=config.ASYNC_MAX_DB_REQUESTS):
+    """
+    Runs the pipeline for one league on a single event loop, one task per season.
+
+    Each season goes fetch -> filter/rename -> z-scores -> fantasy scores -> upsert as
+    soon as its data arrives, like main_streaming, but with the network waits of
+    every season overlapped on one thread instead of a thread per season. Scoring a
+    season is a few milliseconds of pandas work and runs on the loop.
+
+    Args:
+        checkpoints (RunCheckpoints): If given, fetched seasons and per-season seeding
+            progress are checkpointed, and seasons fully seeded by an earlier attempt
+            of the same run are skipped.
+        max_in_flight (int): Seasons being fetched, scored or seeded at once.
+        league (str): Key in config.LEAGUES.
+        max_stats_requests (int): NBA API requests in flight at once.
+        max_db_requests (int): Supabase requests in flight at once.
+
+    Returns:
+        bool: True if every season was fetched and seeded.
+    """
+    import httpx
+    from nba_api.stats.library.http import NBAStatsHTTP
+    from process_and_calculate_z_scores import process_and_calc_zscores
+    from calculate_total_fantasy_scores import calculate_fantasy_scores
+    from snapshots import publish_ranking_snapshots
+
+    print(f"--- Starting the Async Data Pipeline ({league}, {max_in_flight} seasons, "
+          f"{max_stats_requests} API and {max_db_requests} database requests in flight) ---")
+    seasons = config.LEAGUES[league]['seasons']
+    pending = [season for season in seasons if not _season_seeded(checkpoints, season)]
+    if len(pending) < len(seasons):
+        print(f"Skipping {len(seasons) - len(pending)} seasons seeded by an earlier attempt.")
+
+    season_slots = asyncio.Semaphore(max_in_flight)
+    request_slots = asyncio.Semaphore(max_stats_requests)
+    db_slots = asyncio.Semaphore(max_db_requests)
+
+    async def run_season(season):
+        async with season_slots:
+            if checkpoints is not None and checkpoints.has_part('fetch_season', season):
+                print(f"  Loaded season {season} from checkpoint.")
+                raw_season_df = checkpoints.load_part('fetch_season', season)
+            else:
+                raw_season_df = await fetch_season_data_async(http, request_slots, season, league)
+                if raw_season_df is None:
+                    return False
+                if checkpoints is not None:
+                    checkpoints.save_part('fetch_season', season, raw_season_df)
+
+            season_df = clean_player_data(raw_season_df, league)
+            del raw_season_df
+            scored = calculate_fantasy_scores(process_and_calc_zscores(season_df)).get(season)
+            if scored is None or scored.empty:
+                print(f"  No qualifying players for season {season}.")
+                return True
+            stream_metrics.rows_out += len(scored)
+            seeded = await seed_season_async(scored, db_slots, checkpoints, f'seed_{season}')
+            if seeded:
+                print(f"    -> Seeded {len(scored)} player seasons for {season}.")
+            return seeded
+
+    limits = httpx.Limits(max_connections=max_stats_requests, max_keepalive_connections=max_stats_requests)
+    with stage('async', league=league) as stream_metrics:
+        stream_metrics.rows_out = 0
+        async with httpx.AsyncClient(headers=NBAStatsHTTP.headers, timeout=config.REQUEST_TIMEOUT,
+                                     limits=limits) as http:
+            results = dict(zip(pending, await asyncio.gather(*(run_season(season) for season in pending))))
+
+    failed = sorted(season for season, ok in results.items() if not ok)
+    if not failed:
+        with stage('publish_snapshots', league=league):
+            published = await asyncio.to_thread(publish_ranking_snapshots, league)
+
+    print_stage_summary()
+    if failed:
+        print(f"Seasons that did not finish: {failed}. Rerun with --async --resume {get_run_id()} to retry them.")
+        return False
+    if not published:
+        print(f"Publishing snapshots did not finish. Rerun with --async --resume {get_run_id()} to retry it.")
+        return False
+    print("--- Async Data Pipeline Completed Successfully ---")
+    return True
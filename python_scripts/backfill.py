@@ -0,0 +1,412 @@
+"""
+Backfills NBA player stats (and optionally game logs) for any range of seasons, back to
+the league's first season in 1946-47. The backfill is NBA-only: the historical
+endpoints are requested with the NBA league id and the seasons are scored with the NBA
+thresholds, whatever --league the rest of the pipeline runs with.
+
+Each season is fetched, filtered, scored and written to its own Parquet partition
+under config.BACKFILL_DIR (data/history/<dataset>/season=<season>/part.parquet), and
+only a few seasons are held in memory at once. Progress is recorded after every
+partition, so an interrupted backfill resumes where it stopped. Requests from all
+workers share one rate limiter, so a full history load takes a predictable time;
+the plan and a running ETA are printed as it goes.
+
+Data sources:
+    1996-97 onwards   LeagueDashPlayerStats (Base + Advanced), as in run_pipeline.py.
+    Earlier seasons   LeagueLeaders per-game totals for all players. These seasons have
+                      no player age or usage rate, and true shooting is derived from
+                      points and attempts. Stats the league did not record yet (steals
+                      and blocks before 1973-74, 3-pointers before 1979-80, turnovers
+                      before 1977-78) come back empty and score a z-score of 0, and
+                      seasons before 1951-52, which have no minutes, qualify players
+                      on games played alone.
+    Game logs         LeagueGameLog, one request per season for every player.
+
+Usage:
+    python backfill.py                                  # 1946-47 through the current season
+    python backfill.py --seasons 1979-80:1995-96 --game-logs
+    python backfill.py --seed                           # also upsert each season to Supabase
+    python backfill.py --dry-run                        # print the plan and ETA only
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import concurrent.futures
+from datetime import datetime, timezone
+
+import config
+from instrumentation import stage, print_stage_summary
+from profiling import add_profiling_arguments, apply_profiling_arguments
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HISTORY_DIR = os.path.join(REPO_ROOT, config.BACKFILL_DIR)
+PROGRESS_PATH = os.path.join(HISTORY_DIR, 'progress.json')
+
+# Stat columns of LeagueDashPlayerStats' raw format that LeagueLeaders may leave empty
+LEADERS_STAT_COLUMNS = ('AGE', 'GP', 'MIN', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'FGM', 'FGA', 'FG_PCT',
+                        'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT', 'USG_PCT')
+
+# Only the NBA has history before the seasons config.LEAGUES lists
+BACKFILL_LEAGUE = 'nba'
+
+# LeagueLeaders column names differ from LeagueDashPlayerStats for the same stats
+LEADERS_COLUMN_RENAMES = {'PLAYER': 'PLAYER_NAME', 'TEAM': 'TEAM_ABBREVIATION'}
+
+
+class RateLimiter:
+    """Spaces out calls from any number of threads to at most `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_time = time.monotonic()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_seconds = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+
+def season_start_year(season):
+    return int(season.split('-')[0])
+
+
+def season_label(start_year):
+    return f"{start_year}-{str(start_year + 1)[-2:]}"
+
+
+def parse_season_range(value):
+    """
+    Parses 'START:END' (inclusive, e.g. '1946-47:1995-96') or a single season.
+
+    Returns:
+        list: Season strings in chronological order.
+    """
+    start, separator, end = value.partition(':')
+    start = start or config.FIRST_SEASON
+    end = (end or config.SEASONS[-1]) if separator else start
+    start_year, end_year = season_start_year(start), season_start_year(end)
+    if start_year < season_start_year(config.FIRST_SEASON) or end_year < start_year:
+        raise ValueError(f"Invalid season range '{value}'; seasons start at {config.FIRST_SEASON}.")
+    return [season_label(year) for year in range(start_year, end_year + 1)]
+
+
+def requests_per_season(season, game_logs=False):
+    """Number of NBA API requests a season needs, for the time estimate."""
+    base = 2 if season_start_year(season) >= season_start_year(config.DASH_STATS_FIRST_SEASON) else 1
+    return base + (1 if game_logs else 0)
+
+
+def _with_retries(limiter, request, description):
+    """Runs one rate-limited request, retrying with exponential backoff."""
+    for attempt in range(config.BACKFILL_MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            return request()
+        except Exception as e:
+            if attempt == config.BACKFILL_MAX_RETRIES:
+                raise
+            delay = config.BACKFILL_RETRY_BACKOFF * (2 ** attempt)
+            print(f"    {description} failed ({e}); retrying in {delay:.0f}s...")
+            time.sleep(delay)
+
+
+def normalize_leaders_stats(leaders_df):
+    """
+    Turns a LeagueLeaders frame into LeagueDashPlayerStats' raw format.
+
+    LeagueLeaders returns the same headers for every season, so stats a season did not
+    record arrive as all-null object columns rather than missing ones; every stat column
+    is made numeric, with unrecorded values as NaN.
+    """
+    import numpy as np
+    import pandas as pd
+
+    season_df = leaders_df.rename(columns=LEADERS_COLUMN_RENAMES)
+    for column in LEADERS_STAT_COLUMNS:
+        if column in season_df.columns:
+            season_df[column] = pd.to_numeric(season_df[column], errors='coerce')
+        else:
+            season_df[column] = np.nan
+    shot_attempts = 2 * (season_df['FGA'] + 0.44 * season_df['FTA'])
+    season_df['TS_PCT'] = (season_df['PTS'] / shot_attempts).where(shot_attempts > 0)
+    return season_df
+
+
+def clean_season_stats(raw_df):
+    """
+    Filters and renames one backfilled season like the pipeline does.
+
+    Minutes were not recorded before 1951-52, so those seasons qualify players on games
+    played alone and keep their average minutes empty.
+    """
+    import numpy as np
+    from run_pipeline import clean_player_data
+
+    if raw_df.empty or raw_df['MIN'].notna().any():
+        return clean_player_data(raw_df, league=BACKFILL_LEAGUE)
+    season = raw_df['SEASON'].iloc[0]
+    print(f"    {season} has no minutes recorded; qualifying players on games played only.")
+    season_df = clean_player_data(raw_df.assign(MIN=np.inf), league=BACKFILL_LEAGUE)
+    season_df['AvgMinutes'] = np.nan
+    return season_df
+
+
+def score_season(season_df):
+    """
+    Computes a cleaned season's z-scores and swish scores.
+
+    A stat a player has no record of (a stat the league did not keep yet, or a
+    percentage without attempts) contributes a z-score of 0 rather than voiding their
+    swish score.
+
+    Returns:
+        pd.DataFrame: The scored season (empty if no player qualified).
+    """
+    from process_and_calculate_z_scores import process_and_calc_zscores
+    from calculate_total_fantasy_scores import calculate_fantasy_scores
+
+    seasonal = process_and_calc_zscores(season_df)
+    for df in seasonal.values():
+        z_score_columns = [column for column in df.columns if column.endswith('_ZScore')]
+        df[z_score_columns] = df[z_score_columns].fillna(0.0)
+    season = season_df['Season'].iloc[0] if not season_df.empty else None
+    return calculate_fantasy_scores(seasonal).get(season, season_df.iloc[0:0])
+
+
+def fetch_season_stats(season, limiter):
+    """
+    Fetches one season's per-game player stats in LeagueDashPlayerStats' raw format.
+
+    Returns:
+        pd.DataFrame: Raw rows with a SEASON column (empty if the season has no data).
+    """
+    import pandas as pd
+    from nba_api.stats.endpoints import leaguedashplayerstats, leagueleaders
+
+    league_id = config.LEAGUES[BACKFILL_LEAGUE]['league_id']
+    if season_start_year(season) >= season_start_year(config.DASH_STATS_FIRST_SEASON):
+        def dash(measure_type):
+            return leaguedashplayerstats.LeagueDashPlayerStats(
+                season=season, league_id_nullable=league_id, per_mode_detailed='PerGame',
+                measure_type_detailed_defense=measure_type, timeout=config.REQUEST_TIMEOUT
+            ).get_data_frames()[0]
+
+        base_stats = _with_retries(limiter, lambda: dash('Base'), f"{season} base stats")
+        advanced_stats = _with_retries(limiter, lambda: dash('Advanced'), f"{season} advanced stats")
+        season_df = pd.merge(base_stats, advanced_stats[['PLAYER_ID', 'TS_PCT', 'USG_PCT']], on='PLAYER_ID', how='left')
+    else:
+        season_df = _with_retries(limiter, lambda: leagueleaders.LeagueLeaders(
+            season=season, league_id=league_id, per_mode48='PerGame', scope='S', season_type_all_star='Regular Season',
+            stat_category_abbreviation='PTS', timeout=config.REQUEST_TIMEOUT
+        ).get_data_frames()[0], f"{season} league leaders")
+        season_df = normalize_leaders_stats(season_df)
+
+    season_df['SEASON'] = season
+    return season_df
+
+
+def fetch_season_game_logs(season, limiter):
+    """Fetches every player's regular-season game logs for one season in a single request."""
+    from nba_api.stats.endpoints import leaguegamelog
+
+    game_logs_df = _with_retries(limiter, lambda: leaguegamelog.LeagueGameLog(
+        season=season, league_id=config.LEAGUES[BACKFILL_LEAGUE]['league_id'], player_or_team_abbreviation='P', season_type_all_star='Regular Season',
+        timeout=config.REQUEST_TIMEOUT
+    ).get_data_frames()[0], f"{season} game logs")
+    game_logs_df['SEASON'] = season
+    return game_logs_df
+
+
+def partition_path(dataset, season):
+    return os.path.join(HISTORY_DIR, dataset, f'season={season}', 'part.parquet')
+
+
+def write_partition(dataset, season, df):
+    """Atomically writes one season's partition of a dataset."""
+    path = partition_path(dataset, season)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_parquet(f'{path}.tmp', index=False)
+    os.replace(f'{path}.tmp', path)
+    return path
+
+
+def read_history(dataset='player_stats', seasons=None):
+    """
+    Reads backfilled partitions back into one DataFrame.
+
+    Args:
+        dataset (str): 'player_stats' or 'game_logs'.
+        seasons (list): Seasons to read (default: every partition on disk).
+    """
+    import pandas as pd
+
+    dataset_dir = os.path.join(HISTORY_DIR, dataset)
+    if seasons is None:
+        seasons = sorted(name.split('=', 1)[1] for name in os.listdir(dataset_dir) if name.startswith('season='))
+    frames = [pd.read_parquet(partition_path(dataset, season)) for season in seasons
+              if os.path.exists(partition_path(dataset, season))]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def load_progress():
+    try:
+        with open(PROGRESS_PATH) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_progress(progress):
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    with open(f'{PROGRESS_PATH}.tmp', 'w') as f:
+        json.dump(progress, f, indent=1, sort_keys=True)
+    os.replace(f'{PROGRESS_PATH}.tmp', PROGRESS_PATH)
+
+
+def season_is_done(progress, season, game_logs=False, seed=False):
+    entry = progress.get(season, {})
+    return ('player_stats' in entry and (not game_logs or 'game_logs' in entry)
+            and (not seed or entry.get('seeded')))
+
+
+def backfill_season(season, limiter, game_logs=False, entry=None):
+    """
+    Fetches, scores and writes one season's partitions, skipping datasets already on disk.
+
+    Returns:
+        tuple: (progress entry for the season, scored player stats DataFrame)
+    """
+    import pandas as pd
+
+    entry = dict(entry or {})
+    with stage('backfill_season', season=season) as metrics:
+        if 'player_stats' in entry:
+            scored = pd.read_parquet(partition_path('player_stats', season))
+        else:
+            scored = score_season(clean_season_stats(fetch_season_stats(season, limiter)))
+            write_partition('player_stats', season, scored)
+            entry['player_stats'] = len(scored)
+        metrics.rows_out = len(scored)
+
+        if game_logs and 'game_logs' not in entry:
+            game_logs_df = fetch_season_game_logs(season, limiter)
+            write_partition('game_logs', season, game_logs_df)
+            entry['game_logs'] = len(game_logs_df)
+            metrics.tags['game_logs'] = len(game_logs_df)
+
+    entry['updated_at'] = datetime.now(timezone.utc).isoformat()
+    return entry, scored
+
+
+def run_backfill(seasons, workers=config.BACKFILL_WORKERS, rate=config.BACKFILL_REQUESTS_PER_SECOND,
+                 game_logs=False, seed=False, force=False, dry_run=False):
+    """
+    Backfills a list of seasons in parallel, within a shared request rate.
+
+    Args:
+        seasons (list): Seasons to backfill.
+        workers (int): Seasons processed at once; also bounds how many are in memory.
+        rate (float): Maximum NBA API requests per second across all workers.
+        game_logs (bool): Also backfill every player's game logs.
+        seed (bool): Upsert each season's scored stats to Supabase once written.
+        force (bool): Refetch seasons that are already backfilled.
+        dry_run (bool): Print the plan and time estimate without fetching.
+
+    Returns:
+        list: Seasons that failed.
+    """
+    progress = {} if force else load_progress()
+    todo = [season for season in seasons if not season_is_done(progress, season, game_logs, seed)]
+    total_requests = sum(requests_per_season(season, game_logs) for season in todo
+                         if 'player_stats' not in progress.get(season, {}))
+    print(f"--- Backfill: {len(seasons)} seasons ({seasons[0]} to {seasons[-1]}), {len(todo)} to do ---")
+    print(f"  ~{total_requests} NBA API requests at {rate:g}/s: at least {total_requests / rate / 60:.1f} minutes "
+          f"with {workers} workers.")
+    if dry_run or not todo:
+        return []
+
+    limiter = RateLimiter(rate)
+    pending = iter(todo)
+    running = {}
+    failed = []
+    start = time.perf_counter()
+    seed_data = None
+    if seed:
+        from seed import seed_data
+
+    def submit_next(executor):
+        season = next(pending, None)
+        if season is not None:
+            running[executor.submit(backfill_season, season, limiter, game_logs, progress.get(season))] = season
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in range(workers):
+            submit_next(executor)
+        completed = 0
+        while running:
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                season = running.pop(future)
+                submit_next(executor)
+                try:
+                    entry, scored = future.result()
+                except Exception as e:
+                    print(f"  -> ERROR: Could not backfill season {season}: {e}")
+                    failed.append(season)
+                    continue
+
+                if seed and not entry.get('seeded') and not scored.empty:
+                    try:
+                        entry['seeded'] = bool(seed_data(scored))
+                    except Exception as e:
+                        print(f"  -> ERROR: Could not seed season {season}: {e}")
+                        entry['seeded'] = False
+                    if not entry['seeded']:
+                        failed.append(season)
+                progress[season] = entry
+                save_progress(progress)
+                del scored
+
+                completed += 1
+                elapsed = time.perf_counter() - start
+                eta = elapsed / completed * (len(todo) - completed)
+                print(f"  [{completed}/{len(todo)}] {season}: {entry.get('player_stats')} player seasons"
+                      f"{', %d game logs' % entry['game_logs'] if 'game_logs' in entry else ''} "
+                      f"({elapsed:.0f}s elapsed, ~{eta:.0f}s left)")
+
+    if failed:
+        print(f"Seasons that failed: {sorted(failed)}. Rerun to retry them; finished seasons are skipped.")
+    return failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backfill historical NBA player stats into partitioned Parquet files.")
+    parser.add_argument('--seasons', default=f"{config.FIRST_SEASON}:{config.SEASONS[-1]}",
+                        help="Season range START:END, inclusive (default: %(default)s).")
+    parser.add_argument('--workers', type=int, default=config.BACKFILL_WORKERS, help="Seasons fetched in parallel.")
+    parser.add_argument('--rate', type=float, default=config.BACKFILL_REQUESTS_PER_SECOND,
+                        help="Maximum NBA API requests per second across all workers.")
+    parser.add_argument('--game-logs', action='store_true', help="Also backfill every player's game logs.")
+    parser.add_argument('--seed', action='store_true', help="Upsert each backfilled season to Supabase.")
+    parser.add_argument('--force', action='store_true', help="Refetch seasons that are already backfilled.")
+    parser.add_argument('--dry-run', action='store_true', help="Print the plan and time estimate only.")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    apply_profiling_arguments(args)
+
+    try:
+        seasons = parse_season_range(args.seasons)
+    except ValueError as e:
+        parser.error(str(e))
+
+    failed = run_backfill(seasons, workers=args.workers, rate=args.rate, game_logs=args.game_logs, seed=args.seed,
+                          force=args.force, dry_run=args.dry_run)
+    print_stage_summary()
+    if failed:
+        raise SystemExit(1)
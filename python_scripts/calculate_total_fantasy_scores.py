@@ -1,5 +1,7 @@
 import pandas as pd
 
+from instrumentation import stage
+
 # Define the z-score columns to be used for the total fantasy score
 # For stats where lower is better (e.g., Turnovers), we will invert their z-score contribution
 Z_SCORE_COLUMNS = {
@@ -31,19 +33,22 @@ def calculate_fantasy_scores(seasonal_dataframes):
     for season, df in seasonal_dataframes.items():
         print(f"  Processing season: {season}...")
         
-        # Calculate Swish Score
-        df['Swish_Score'] = 0
-        for col, multiplier in Z_SCORE_COLUMNS.items():
-            if col in df.columns:
-                df['Swish_Score'] += df[col] * multiplier
-            else:
-                print(f"    Warning: Z-score column '{col}' not found for season {season}. Skipping.")
+        with stage('fantasy_scores_season', season=season, rows_in=len(df)) as metrics:
+            # Calculate Swish Score
+            df['Swish_Score'] = 0
+            for col, multiplier in Z_SCORE_COLUMNS.items():
+                if col in df.columns:
+                    df['Swish_Score'] += df[col] * multiplier
+                else:
+                    print(f"    Warning: Z-score column '{col}' not found for season {season}. Skipping.")
         
-        # Rank players based on Swish_Score (descending)
-        df['Overall_Rank'] = df['Swish_Score'].rank(method='min', ascending=False).astype(int)
+            # Rank players based on Swish_Score (descending)
+            df['Overall_Rank'] = df['Swish_Score'].rank(method='min', ascending=False).astype(int)
         
-        # Sort by Overall_Rank
-        processed_dataframes[season] = df.sort_values(by='Overall_Rank')
+            # Sort by Overall_Rank
+            processed_dataframes[season] = df.sort_values(by='Overall_Rank')
+
+            metrics.rows_out = len(processed_dataframes[season])
 
     print("Finished calculating fantasy scores.")
     return processed_dataframes
@@ -0,0 +1,144 @@
+"""
+Local checkpoints that let a failed pipeline run resume where it stopped.
+
+Each stage's output DataFrames are written as Parquet under
+<PIPELINE_CHECKPOINT_DIR>/<run_id>/[<league>/]<stage>/<part>.parquet, and the stage is marked
+complete once all of its parts are on disk. Rerunning with the same run id (see
+`run_pipeline.py --resume`) loads completed stages instead of recomputing them, and
+long stages like seeding record their progress so they can pick up from the last
+acknowledged chunk.
+
+Environment:
+    PIPELINE_CHECKPOINT_DIR   Checkpoint root (default: <repo>/checkpoints).
+"""
+import json
+import os
+import shutil
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_CHECKPOINT_DIR = os.path.join(REPO_ROOT, 'checkpoints')
+COMPLETE_MARKER = '_COMPLETE.json'
+PROGRESS_FILE = 'progress.json'
+
+
+def checkpoint_root():
+    return os.environ.get('PIPELINE_CHECKPOINT_DIR') or DEFAULT_CHECKPOINT_DIR
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def latest_run_id(root=None):
+    """Returns the most recently updated run with checkpoints on disk, or None."""
+    root = root or checkpoint_root()
+    if not os.path.isdir(root):
+        return None
+    runs = [name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))]
+    if not runs:
+        return None
+    return max(runs, key=lambda name: os.path.getmtime(os.path.join(root, name)))
+
+
+class RunCheckpoints:
+    """Reads and writes the checkpoints of one pipeline run, or of one league within it."""
+
+    def __init__(self, run_id, root=None, league=None):
+        self.run_id = run_id
+        self.run_path = os.path.join(root or checkpoint_root(), run_id)
+        # League workers of the same run keep their checkpoints apart
+        self.path = os.path.join(self.run_path, league) if league else self.run_path
+        self.enabled = _parquet_available()
+        if not self.enabled:
+            print("Warning: pyarrow is not installed; pipeline checkpoints are disabled.")
+
+    def _stage_dir(self, stage_name):
+        return os.path.join(self.path, stage_name)
+
+    def _part_path(self, stage_name, part):
+        return os.path.join(self._stage_dir(stage_name), f'{part}.parquet')
+
+    # --- DataFrame checkpoints ---
+
+    def has_part(self, stage_name, part):
+        return self.enabled and os.path.exists(self._part_path(stage_name, part))
+
+    def save_part(self, stage_name, part, df):
+        """Writes one DataFrame of a stage. Safe to call from several threads for different parts."""
+        if not self.enabled:
+            return
+        path = self._part_path(stage_name, part)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            df.to_parquet(f'{path}.tmp', index=False)
+            os.replace(f'{path}.tmp', path)
+        except Exception as e:
+            print(f"Warning: could not checkpoint {stage_name}/{part}: {e}")
+
+    def load_part(self, stage_name, part):
+        import pandas as pd
+        return pd.read_parquet(self._part_path(stage_name, part))
+
+    def is_complete(self, stage_name):
+        return self.enabled and os.path.exists(os.path.join(self._stage_dir(stage_name), COMPLETE_MARKER))
+
+    def save_frames(self, stage_name, frames):
+        """
+        Checkpoints a stage's output and marks the stage complete.
+
+        Args:
+            stage_name (str): Stage name (e.g. 'z_scores').
+            frames (dict): Part name (e.g. season) -> DataFrame. Order is preserved on load.
+        """
+        if not self.enabled:
+            return
+        for part, df in frames.items():
+            self.save_part(stage_name, part, df)
+        if all(self.has_part(stage_name, part) for part in frames):
+            with open(os.path.join(self._stage_dir(stage_name), COMPLETE_MARKER), 'w') as f:
+                json.dump({'parts': list(frames)}, f)
+
+    def load_frames(self, stage_name):
+        """Loads a completed stage's output as {part: DataFrame}."""
+        with open(os.path.join(self._stage_dir(stage_name), COMPLETE_MARKER)) as f:
+            parts = json.load(f)['parts']
+        return {part: self.load_part(stage_name, part) for part in parts}
+
+    def save_frame(self, stage_name, df):
+        self.save_frames(stage_name, {'data': df})
+
+    def load_frame(self, stage_name):
+        return self.load_frames(stage_name)['data']
+
+    # --- Progress within a stage ---
+
+    def progress(self, stage_name):
+        """Returns the progress recorded for a stage (an empty dict if none)."""
+        try:
+            with open(os.path.join(self._stage_dir(stage_name), PROGRESS_FILE)) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def set_progress(self, stage_name, **values):
+        if not self.enabled:
+            return
+        progress = {**self.progress(stage_name), **values}
+        os.makedirs(self._stage_dir(stage_name), exist_ok=True)
+        path = os.path.join(self._stage_dir(stage_name), PROGRESS_FILE)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(progress, f)
+        os.replace(f'{path}.tmp', path)
+
+    def remove(self):
+        """Deletes this run's (or league's) checkpoints once it has finished successfully."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        if self.path != self.run_path:
+            try:
+                os.rmdir(self.run_path)  # Only succeeds once no other league has checkpoints left
+            except OSError:
+                pass
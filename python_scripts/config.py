@@ -9,3 +9,50 @@ MIN_GAMES_PLAYED = 20
 MIN_AVG_MINUTES = 25.0
 REQUEST_TIMEOUT = 30
 REQUEST_DELAY = 0.6 # Still relevant for politeness, but less critical with parallel requests
+
+# --- Leagues ---
+# Each league runs in its own pipeline process and is stored in its own table partitions.
+# Season labels follow nba_api: WNBA seasons are a single year ('2024').
+LEAGUES = {
+    'nba': {'league_id': '00', 'seasons': SEASONS,
+            'min_games_played': MIN_GAMES_PLAYED, 'min_avg_minutes': MIN_AVG_MINUTES},
+    'wnba': {'league_id': '10', 'seasons': [str(year) for year in range(CURRENT_YEAR - 10, CURRENT_YEAR)],
+             'min_games_played': 15, 'min_avg_minutes': 20.0},        # 34-44 game seasons
+    'gleague': {'league_id': '20', 'seasons': SEASONS,
+                'min_games_played': 15, 'min_avg_minutes': 20.0},     # ~50 game seasons, heavy roster churn
+}
+DEFAULT_LEAGUE = 'nba'
+PIPELINE_LEAGUES = ['nba', 'wnba', 'gleague']   # Leagues run_pipeline.py processes by default, in turn
+
+# --- Stage Scheduler (pipeline.py) ---
+SCHEDULER_MAX_JOBS = 3          # Stages running at once
+SCHEDULER_POOLS = {             # Stages sharing a pool never exceed its capacity
+    'nba_api': 1,               # Keep to one scraper at a time to respect the NBA API rate limits
+    'cpu': 2,                   # Model training and scoring
+}
+SCHEDULER_DATA_MAX_AGE_HOURS = 24   # Stages that pull external data rerun after this long
+
+# --- Streaming Mode (run_pipeline.py --stream) ---
+STREAM_MAX_SEASONS_IN_FLIGHT = 3    # Seasons being fetched, scored or seeded at once; bounds peak memory
+
+# --- Asyncio Mode (run_pipeline.py --async) ---
+ASYNC_MAX_STATS_REQUESTS = 8        # NBA API requests in flight at once, across every season
+ASYNC_MAX_DB_REQUESTS = 32          # Supabase requests in flight at once
+ASYNC_MAX_SEASONS_IN_FLIGHT = 16    # Seasons fetched, scored or seeded at once; bounds peak memory
+
+# --- Ranking Snapshots (snapshots.py) ---
+RANKING_SNAPSHOT_BUCKET = 'ranking-snapshots'   # Public Supabase Storage bucket the web API reads from
+RANKING_SNAPSHOT_MAX_AGE = 31536000             # Seconds; a snapshot's path changes whenever its content does
+
+# --- Player Aggregates (player_aggregates.py) ---
+PLAYER_FORM_WINDOWS = [5, 10]          # Last-N-game form windows on the player page
+PLAYER_AGGREGATES_CHUNK_ROWS = 100000  # Game logs held in memory at once
+
+# --- Historical Backfill (backfill.py) ---
+FIRST_SEASON = '1946-47'            # The league's first season (BAA)
+DASH_STATS_FIRST_SEASON = '1996-97' # LeagueDashPlayerStats has no data before this season
+BACKFILL_WORKERS = 4                # Seasons fetched in parallel
+BACKFILL_REQUESTS_PER_SECOND = 1.0  # Shared across workers, to stay under the NBA API rate limits
+BACKFILL_MAX_RETRIES = 3
+BACKFILL_RETRY_BACKOFF = 2.0        # Seconds before the first retry; doubles on each attempt
+BACKFILL_DIR = 'data/history'       # Relative to the repo root; one Parquet partition per season
@@ -1,20 +1,82 @@
 import os
-from supabase import create_client, Client
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 from dotenv import load_dotenv
 
+from http_fixtures import install_from_env
+from instrumentation import count_db_connection
+
+# Record/replay Supabase traffic when PIPELINE_HTTP_MODE is set
+install_from_env()
 load_dotenv()
 
+UPSERT_CHUNK_SIZE = 500
+UPSERT_MAX_WORKERS = 4
+UPSERT_MAX_RETRIES = 3
+UPSERT_RETRY_BACKOFF = 0.5  # Seconds before the first retry; doubles on each attempt
+
+# Connection pool of each shared client (one for reads, one for admin writes)
+DB_MAX_CONNECTIONS = 8
+DB_MAX_KEEPALIVE_CONNECTIONS = 8
+DB_KEEPALIVE_EXPIRY = 60.0  # Seconds an idle connection stays open for reuse
+ASYNC_DB_MAX_CONNECTIONS = 32  # Per async client; requests beyond this wait in its pool
+
+_clients = {}
+_clients_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> {pool: client}
+
 def get_supabase_client(admin=False):
     """
-    Initializes and returns the Supabase client.
+    Returns the process-wide Supabase client for the read or admin pool.
+
+    The client is created on first use and shared by every caller and thread after
+    that, so requests reuse its keep-alive connections instead of opening new ones.
+    Each pool opens at most DB_MAX_CONNECTIONS connections, and every connection it
+    opens is counted in the stage metrics.
 
     Args:
         admin (bool): If True, uses the service role key for admin access.
                       Otherwise, uses the public anon key.
 
     Returns:
-        Client: An instance of the Supabase client.
+        Client: The shared Supabase client for that key.
+    """
+    pool = 'admin' if admin else 'read'
+    # A forked child process gets its own clients rather than its parent's sockets
+    cache_key = (os.getpid(), pool)
+    with _clients_lock:
+        client = _clients.get(cache_key)
+        if client is None:
+            client = _clients[cache_key] = _create_client(admin)
+    return client
+
+async def get_async_supabase_client(admin=False):
+    """
+    Returns the running event loop's shared async Supabase client for the read or admin pool.
+
+    The asyncio counterpart of get_supabase_client: every coroutine on the loop shares
+    one client, whose pool multiplexes up to ASYNC_DB_MAX_CONNECTIONS connections.
     """
+    import asyncio
+    from supabase import acreate_client
+
+    pool = 'admin' if admin else 'read'
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    if pool not in clients:
+        url, key = _credentials(admin)
+        client = await acreate_client(url, key)
+        session = client.postgrest.session
+        # Every connection is kept, so bursts of concurrent upserts don't reconnect
+        client.postgrest.session = _pooled_session(session, pool, ASYNC_DB_MAX_CONNECTIONS, ASYNC_DB_MAX_CONNECTIONS)
+        await session.aclose()
+        # Another coroutine may have created one while this one awaited
+        clients.setdefault(pool, client)
+    return clients[pool]
+
+def _credentials(admin):
     url = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
     
     if admin:
@@ -28,8 +90,185 @@ def get_supabase_client(admin=False):
 
     if not url:
         raise ValueError("NEXT_PUBLIC_SUPABASE_URL must be set in the .env file.")
+    return url, key
+
+def _pooled_session(session, pool, max_connections, max_keepalive_connections=DB_MAX_KEEPALIVE_CONNECTIONS):
+    """
+    Rebuilds a postgrest HTTP session (sync or async) with the same settings as
+    postgrest's own, plus connection limits and a hook counting every connection opened.
+    """
+    import httpx
+
+    # An async client awaits its trace callback and event hooks
+    if isinstance(session, httpx.AsyncClient):
+        async def trace(event, info):
+            if event == 'connection.connect_tcp.complete':
+                count_db_connection(pool)
+
+        async def add_trace(request):
+            request.extensions['trace'] = trace
+    else:
+        def trace(event, info):
+            if event == 'connection.connect_tcp.complete':
+                count_db_connection(pool)
+
+        def add_trace(request):
+            request.extensions['trace'] = trace
+
+    return type(session)(
+        base_url=session.base_url, headers=session.headers, timeout=session.timeout,
+        follow_redirects=True, http2=True, event_hooks={'request': [add_trace]},
+        limits=httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=min(max_keepalive_connections, max_connections),
+                            keepalive_expiry=DB_KEEPALIVE_EXPIRY))
+
+def _create_client(admin):
+    """Creates a Supabase client whose PostgREST session uses a bounded, instrumented connection pool."""
+    # Imported here so scripts that never reach the database start without it
+    from supabase import create_client
+
+    client = create_client(*_credentials(admin))
+    session = client.postgrest.session
+    pooled = _pooled_session(session, 'admin' if admin else 'read', DB_MAX_CONNECTIONS)
+
+    # httpx's sync pool can fail requests from threads queued for a connection, so
+    # threads wait here instead and the pool always has a connection free
+    slots = threading.BoundedSemaphore(DB_MAX_CONNECTIONS)
+
+    def bounded_send(request, **kwargs):
+        with slots:
+            # Looked up on each call so class-level patches (metrics, fixtures) still apply
+            return type(pooled).send(pooled, request, **kwargs)
+    pooled.send = bounded_send
+
+    client.postgrest.session = pooled
+    session.close()
+    return client
+
+def iter_record_chunks(df, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Yields a DataFrame as JSON-ready lists of records, one bounded chunk at a time.
+
+    Only one chunk of dicts exists at once, and NaN values are sent as NULL.
+
+    Yields:
+        tuple: (offset of the chunk's first row, list of record dicts)
+    """
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        yield start, chunk.to_dict('records')
+
+def upsert_in_chunks(table, df, on_conflict, admin=True, chunk_size=UPSERT_CHUNK_SIZE,
+                     max_workers=UPSERT_MAX_WORKERS, max_retries=UPSERT_MAX_RETRIES,
+                     retry_backoff=UPSERT_RETRY_BACKOFF):
+    """
+    Upserts a DataFrame into a table in bounded chunks sent concurrently.
+
+    The workers share the process-wide client, so the chunks go over its warm
+    connections. A chunk that fails is retried with exponential backoff; chunks that
+    still fail are reported without aborting the rest.
+
+    Args:
+        table (str): Table name.
+        df (pd.DataFrame): Rows to upsert; columns must match the table.
+        on_conflict (str): Comma-separated conflict target columns.
+        admin (bool): Whether to use the service role key.
+        chunk_size (int): Rows per request.
+        max_workers (int): Requests in flight at once.
+        max_retries (int): Retries per chunk after the first attempt.
+        retry_backoff (float): Seconds to wait before the first retry.
+
+    Returns:
+        dict: 'rows' upserted, 'chunks' sent, 'failed_offsets' of chunks that
+              could not be written, 'seconds' elapsed and 'rows_per_second'.
+    """
+    client = get_supabase_client(admin=admin)
+
+    def send(records):
+        for attempt in range(max_retries + 1):
+            try:
+                response = client.table(table).upsert(records, on_conflict=on_conflict).execute()
+                return len(response.data)
+            except Exception:
+                if attempt == max_retries:
+                    raise
+                time.sleep(retry_backoff * 2 ** attempt)
+
+    start_time = time.perf_counter()
+    rows, chunks, failed_offsets = 0, 0, []
+    pending = {}
+
+    def collect(done):
+        nonlocal rows
+        for future in done:
+            offset = pending.pop(future)
+            try:
+                rows += future.result()
+            except Exception as e:
+                failed_offsets.append(offset)
+                print(f"  Chunk at row {offset} of '{table}' failed after {max_retries + 1} attempts: {e}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for offset, records in iter_record_chunks(df, chunk_size):
+            # Bound the chunks held in memory to those in flight plus one queued per worker
+            if len(pending) >= 2 * max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[executor.submit(send, records)] = offset
+            chunks += 1
+        collect(list(pending))
+
+    seconds = time.perf_counter() - start_time
+    rows_per_second = rows / seconds if seconds > 0 else 0.0
+    print(f"Upserted {rows} rows into '{table}' in {chunks} chunks over {seconds:.2f}s "
+          f"({rows_per_second:.0f} rows/s, {len(failed_offsets)} failed chunks).")
+    return {'rows': rows, 'chunks': chunks, 'failed_offsets': sorted(failed_offsets),
+            'seconds': seconds, 'rows_per_second': rows_per_second}
+
+def stream_game_logs(columns, league='nba', page_size=1000, chunk_rows=100000):
+    """
+    Streams one league's game logs ordered by (player_id, game_date) in bounded chunks.
+
+    Uses keyset pagination on (player_id, game_date), which is unique within a league, so
+    each page is an index range scan of that league's partition instead of an
+    ever-growing OFFSET.
+
+    Args:
+        columns (list): game_logs columns to read; must include player_id and game_date.
+        league (str): League whose partition is read.
+        page_size (int): Rows per request (at most PostgREST's max-rows).
+        chunk_rows (int): Rows per yielded chunk, roughly.
+
+    Yields:
+        pd.DataFrame: Chunks of roughly `chunk_rows` game logs.
+    """
+    import pandas as pd
+
+    supabase = get_supabase_client()
+    buffer = []
+    buffered_rows = 0
+    last_key = None
+
+    while True:
+        query = supabase.table('game_logs').select(','.join(columns)).eq('league', league)
+        if last_key is not None:
+            player_id, game_date = last_key
+            query = query.or_(f"player_id.gt.{player_id},and(player_id.eq.{player_id},game_date.gt.{game_date})")
+        response = query.order('player_id').order('game_date').limit(page_size).execute()
+
+        page = response.data
+        if page:
+            buffer.append(pd.DataFrame(page))
+            buffered_rows += len(page)
+            last_key = (page[-1]['player_id'], page[-1]['game_date'])
+
+        if buffer and (buffered_rows >= chunk_rows or len(page) < page_size):
+            yield pd.concat(buffer, ignore_index=True)
+            buffer, buffered_rows = [], 0
 
-    return create_client(url, key)
+        if len(page) < page_size:
+            break
 
 if __name__ == '__main__':
     # Example usage: Fetch players and print their names
@@ -1,14 +1,16 @@
 import pandas as pd
 from db_connector import get_supabase_client
 
-def fetch_players():
+DEFAULT_LEAGUE = 'nba'
+
+def fetch_players(league=DEFAULT_LEAGUE):
     """
-    Fetches all players from the players table.
+    Fetches all of a league's players from the players table.
     """
-    print("Fetching players...")
+    print(f"Fetching {league} players...")
     supabase = get_supabase_client()
     try:
-        response = supabase.table('players').select('player_id, full_name').execute()
+        response = supabase.table('players').select('player_id, full_name').eq('league', league).execute()
         if response.data:
             df = pd.DataFrame(response.data)
             print("Successfully fetched players.")
@@ -20,9 +22,11 @@ def fetch_players():
         print(f"An error occurred while fetching players: {e}")
         return None
 
-def fetch_player_stats():
+def fetch_player_stats(league=DEFAULT_LEAGUE):
     """
-    Fetches all player stats from the player_stats_by_season table, handling pagination.
+    Fetches a league's player stats from the player_stats_by_season table, handling pagination.
+
+    The league filter keeps the query on that league's partition of the table.
     """
     supabase = get_supabase_client()
     all_data = []
@@ -31,7 +35,7 @@ def fetch_player_stats():
 
     while True:
         start_index = current_page * page_size
-        response = supabase.table('player_stats_by_season').select('*', count='exact').range(start_index, start_index + page_size - 1).execute()
+        response = supabase.table('player_stats_by_season').select('*', count='exact').eq('league', league).range(start_index, start_index + page_size - 1).execute()
         
         if response.data:
             all_data.extend(response.data)
@@ -146,6 +150,12 @@ def create_age_and_experience_features(df):
     return df
 
 
+def next_season(season):
+    """Returns the season after `season` in the same format ('2023-24' -> '2024-25'; WNBA '2024' -> '2025')."""
+    start_year = int(season.split('-')[0]) + 1
+    return f"{start_year}-{str(start_year + 1)[-2:]}" if '-' in season else str(start_year)
+
+
 def create_team_context_features(df):
     """
     Calculates the usage rate vacated by players leaving a team from the previous season.
@@ -169,9 +179,7 @@ def create_team_context_features(df):
     df_sorted['prev_season_team'] = df_sorted.groupby('player_id')['team'].shift(1)
 
     # Get the next season to link vacated usage
-    df_sorted['season_start_year'] = df_sorted['season'].apply(lambda x: int(x.split('-')[0]))
-    df_sorted['next_season_start_year'] = df_sorted['season_start_year'] + 1
-    df_sorted['next_season'] = df_sorted['next_season_start_year'].apply(lambda y: f"{y}-{str(y+1)[-2:]}")
+    df_sorted['next_season'] = df_sorted['season'].apply(next_season)
 
     # Calculate the total usage for each team in each season
     team_season_usage = df_sorted.groupby(['team', 'season'])['usage_rate'].sum().reset_index()
@@ -190,9 +198,7 @@ def create_team_context_features(df):
     vacated_df['vacated_usage'] = vacated_df['total_usage'] - vacated_df['stayers_usage']
 
     # We want to map this vacated usage to the *next* season
-    vacated_df['season_start_year'] = vacated_df['season'].apply(lambda x: int(x.split('-')[0]))
-    vacated_df['next_season_start_year'] = vacated_df['season_start_year'] + 1
-    vacated_df['next_season'] = vacated_df['next_season_start_year'].apply(lambda y: f"{y}-{str(y+1)[-2:]}")
+    vacated_df['next_season'] = vacated_df['season'].apply(next_season)
 
     # Prepare for merge: we need vacated_usage for the season a player arrives
     vacated_to_merge = vacated_df[['team', 'next_season', 'vacated_usage']]
@@ -206,6 +212,24 @@ def create_team_context_features(df):
     return df_final
 
 
+def engineer_features(df):
+    """
+    Runs the full feature engineering chain used by the projection models.
+
+    Args:
+        df (pd.DataFrame): Raw player stats from the player_stats_by_season table.
+
+    Returns:
+        pd.DataFrame: DataFrame with per-minute, year-over-year, age/experience
+            and team context features added.
+    """
+    df = create_per_minute_stats(df)
+    df = create_yoy_stats(df)
+    df = create_age_and_experience_features(df)
+    df = create_team_context_features(df)
+    return df
+
+
 if __name__ == '__main__':
     player_stats_df = fetch_player_stats()
     if player_stats_df is not None:
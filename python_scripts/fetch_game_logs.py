@@ -1,32 +1,32 @@
-import os
-import time
-import pandas as pd
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from nba_api.stats.endpoints import playergamelog
+import argparse
 
-# --- CONFIGURATION ---
-load_dotenv()
+import config
+# db_connector loads .env and installs the HTTP record/replay layer when PIPELINE_HTTP_MODE is set
+from db_connector import get_supabase_client
+from instrumentation import stage, print_stage_summary
+from profiling import add_profiling_arguments, apply_profiling_arguments
 
-# --- DATABASE SETUP ---
-url: str = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
-key: str = os.environ.get("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+def fetch_and_store_gamelogs(league=config.DEFAULT_LEAGUE):
+    """Fetches game logs for all of a league's players in the database and stores them in Supabase."""
+    # Heavy modules and the client are loaded here so `--help` starts instantly
+    import pandas as pd
+    from nba_api.stats.endpoints import playergamelog
 
-if not url or not key:
-    raise ValueError("Supabase URL and service key must be set in the .env file.")
+    # The game log upserts need the service role key, so the admin pool serves this whole stage
+    supabase = get_supabase_client(admin=True)
+    league_id = config.LEAGUES[league]['league_id']
 
-supabase: Client = create_client(url, key)
-
-def fetch_and_store_gamelogs():
-    """Fetches game logs for all players in the database and stores them in Supabase."""
     # 1. Get all players from the database
     try:
-        response = supabase.table('players').select('player_id, nba_player_id, full_name').execute()
+        with stage('load_players', league=league) as metrics:
+            response = (supabase.table('players').select('player_id, nba_player_id, full_name')
+                        .eq('league', league).execute())
+            metrics.rows_out = len(response.data)
         db_players = response.data
         if not db_players:
             print("No players found in the database. Please run the seed script first.")
             return
-        print(f"Found {len(db_players)} players in the database.")
+        print(f"Found {len(db_players)} {league} players in the database.")
     except Exception as e:
         print(f"Error fetching players from Supabase: {e}")
         return
@@ -43,86 +43,101 @@ def fetch_and_store_gamelogs():
 
         print(f"\n--- Processing game logs for {player_name} (NBA ID: {nba_player_id}) ---")
 
-        try:
-            # Get seasons for this player from our DB
-            seasons_response = supabase.table('player_stats_by_season').select('season').eq('player_id', player_uuid).execute()
-            seasons = list(set([s['season'] for s in seasons_response.data])) # Use set to get unique seasons
+        with stage('player_game_logs', player=player_name, league=league) as metrics:
+            try:
+                # Get seasons for this player from our DB
+                seasons_response = (supabase.table('player_stats_by_season').select('season')
+                                    .eq('league', league).eq('player_id', player_uuid).execute())
+                seasons = list(set([s['season'] for s in seasons_response.data])) # Use set to get unique seasons
             
-            if not seasons:
-                print(f"No seasons found for {player_name} in player_stats_by_season table.")
-                continue
+                if not seasons:
+                    print(f"No seasons found for {player_name} in player_stats_by_season table.")
+                    continue
 
-            print(f"Found seasons: {seasons} for {player_name}. Fetching game logs...")
+                print(f"Found seasons: {seasons} for {player_name}. Fetching game logs...")
 
-            all_gamelogs_df = pd.DataFrame()
+                all_gamelogs_df = pd.DataFrame()
 
-            # Fetch game logs for each season
-            for season in seasons:
-                try:
-                    gamelog = playergamelog.PlayerGameLog(player_id=nba_player_id, season=season)
-                    gamelog_df = gamelog.get_data_frames()[0]
-                    all_gamelogs_df = pd.concat([all_gamelogs_df, gamelog_df], ignore_index=True)
-                    print(f"  - Fetched {len(gamelog_df)} logs for season {season}.")
+                # Fetch game logs for each season
+                for season in seasons:
+                    try:
+                        gamelog = playergamelog.PlayerGameLog(player_id=nba_player_id, season=season,
+                                                              league_id_nullable=league_id)
+                        gamelog_df = gamelog.get_data_frames()[0]
+                        all_gamelogs_df = pd.concat([all_gamelogs_df, gamelog_df], ignore_index=True)
+                        print(f"  - Fetched {len(gamelog_df)} logs for season {season}.")
 
-                except Exception as e:
-                    print(f"  - Error fetching logs for season {season}: {e}")
-                    continue
+                    except Exception as e:
+                        print(f"  - Error fetching logs for season {season}: {e}")
+                        continue
             
-            if all_gamelogs_df.empty:
-                print(f"No game logs found for {player_name} across all seasons.")
-                continue
+                if all_gamelogs_df.empty:
+                    print(f"No game logs found for {player_name} across all seasons.")
+                    continue
 
-            # 3. Format data for Supabase
-            all_gamelogs_df['player_id'] = player_uuid
-            all_gamelogs_df = all_gamelogs_df.rename(columns={
-                'GAME_DATE': 'game_date',
-                'MATCHUP': 'opponent',
-                'WL': 'win_loss',
-                'PTS': 'points',
-                'REB': 'rebounds',
-                'AST': 'assists',
-                'STL': 'steals',
-                'BLK': 'blocks',
-                'TOV': 'turnovers',
-                'MIN': 'minutes_played',
-                'FGM': 'field_goals_made',
-                'FGA': 'field_goal_attempts',
-                'FG_PCT': 'field_goal_percentage',
-                'FG3M': 'three_pointers_made',
-                'FG3A': 'three_point_attempts',
-                'FG3_PCT': 'three_point_percentage',
-                'FTM': 'free_throws_made',
-                'FTA': 'free_throw_attempts',
-                'FT_PCT': 'free_throw_percentage',
-                'PLUS_MINUS': 'plus_minus'
-            })
-
-            # Convert GAME_DATE to a standard format
-            all_gamelogs_df['game_date'] = pd.to_datetime(all_gamelogs_df['game_date'], format='%b %d, %Y').dt.strftime('%Y-%m-%d')
-
-            db_cols = [
-                'player_id', 'game_date', 'opponent', 'win_loss', 'minutes_played', 
-                'field_goals_made', 'field_goal_attempts', 'field_goal_percentage', 
-                'three_pointers_made', 'three_point_attempts', 'three_point_percentage', 
-                'free_throws_made', 'free_throw_attempts', 'free_throw_percentage', 
-                'rebounds', 'assists', 'steals', 'blocks', 'turnovers', 'points', 'plus_minus'
-            ]
+                # 3. Format data for Supabase
+                all_gamelogs_df['player_id'] = player_uuid
+                all_gamelogs_df['league'] = league
+                all_gamelogs_df = all_gamelogs_df.rename(columns={
+                    'GAME_DATE': 'game_date',
+                    'MATCHUP': 'opponent',
+                    'WL': 'win_loss',
+                    'PTS': 'points',
+                    'REB': 'rebounds',
+                    'AST': 'assists',
+                    'STL': 'steals',
+                    'BLK': 'blocks',
+                    'TOV': 'turnovers',
+                    'MIN': 'minutes_played',
+                    'FGM': 'field_goals_made',
+                    'FGA': 'field_goal_attempts',
+                    'FG_PCT': 'field_goal_percentage',
+                    'FG3M': 'three_pointers_made',
+                    'FG3A': 'three_point_attempts',
+                    'FG3_PCT': 'three_point_percentage',
+                    'FTM': 'free_throws_made',
+                    'FTA': 'free_throw_attempts',
+                    'FT_PCT': 'free_throw_percentage',
+                    'PLUS_MINUS': 'plus_minus'
+                })
+
+                # Convert GAME_DATE to a standard format
+                all_gamelogs_df['game_date'] = pd.to_datetime(all_gamelogs_df['game_date'], format='%b %d, %Y').dt.strftime('%Y-%m-%d')
+
+                db_cols = [
+                    'league', 'player_id', 'game_date', 'opponent', 'win_loss', 'minutes_played', 
+                    'field_goals_made', 'field_goal_attempts', 'field_goal_percentage', 
+                    'three_pointers_made', 'three_point_attempts', 'three_point_percentage', 
+                    'free_throws_made', 'free_throw_attempts', 'free_throw_percentage', 
+                    'rebounds', 'assists', 'steals', 'blocks', 'turnovers', 'points', 'plus_minus'
+                ]
             
-            gamelogs_records = all_gamelogs_df[[col for col in db_cols if col in all_gamelogs_df.columns]].to_dict('records')
-
-            # 4. Upsert game logs into the database
-            print(f"Upserting {len(gamelogs_records)} total game logs for {player_name}...")
-            chunk_size = 500
-            for i in range(0, len(gamelogs_records), chunk_size):
-                chunk = gamelogs_records[i:i + chunk_size]
-                supabase.table('game_logs').upsert(chunk, on_conflict='player_id, game_date').execute()
+                gamelogs_records = all_gamelogs_df[[col for col in db_cols if col in all_gamelogs_df.columns]].to_dict('records')
+                metrics.rows_out = len(gamelogs_records)
+
+                # 4. Upsert game logs into the database
+                print(f"Upserting {len(gamelogs_records)} total game logs for {player_name}...")
+                chunk_size = 500
+                for i in range(0, len(gamelogs_records), chunk_size):
+                    chunk = gamelogs_records[i:i + chunk_size]
+                    supabase.table('game_logs').upsert(chunk, on_conflict='league, player_id, game_date').execute()
             
-            print(f"Successfully upserted game logs for {player_name}.")
+                print(f"Successfully upserted game logs for {player_name}.")
+
+            except Exception as e:
+                print(f"An error occurred while processing {player_name}: {e}")
+                continue
 
-        except Exception as e:
-            print(f"An error occurred while processing {player_name}: {e}")
-            continue
 
 if __name__ == "__main__":
-    fetch_and_store_gamelogs()
+    parser = argparse.ArgumentParser(description="Fetch every player's game logs and store them in Supabase.")
+    parser.add_argument('--league', choices=list(config.LEAGUES), default=config.DEFAULT_LEAGUE,
+                        help="League whose players' game logs are fetched (default: %(default)s).")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    apply_profiling_arguments(args)
+
+    with stage('game_logs', league=args.league):
+        fetch_and_store_gamelogs(args.league)
+    print_stage_summary()
     print("\nGame log fetching process finished.")
@@ -1,7 +1,9 @@
 import sys
-from nba_api.stats.static import players
 
 def get_nba_id(player_name):
+    # Imported on first lookup so the usage path doesn't load nba_api
+    from nba_api.stats.static import players
+
     try:
         # The nba_api player list often uses standard ASCII names.
         # This normalization helps find players with special characters in their names.
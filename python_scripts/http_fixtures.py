@@ -0,0 +1,304 @@
+"""
+Record/replay layer for nba_api and Supabase HTTP traffic.
+
+nba_api sends its requests through `requests`, and the Supabase client through `httpx`.
+This module wraps both clients' send methods so that every response can be captured to
+fixture files once and then served back deterministically, with no network access.
+Latency can be injected in any mode to reproduce slow upstreams locally.
+
+Fixtures are keyed on the method, the URL path and sorted query string, the request
+body and the headers that select data (Range, Prefer, Accept-Profile). The scheme
+and host are not part of the key, so fixtures recorded against one Supabase project
+replay against any URL. Auth headers are never stored. Identical requests that got
+different responses while recording are replayed in the same order.
+
+Environment:
+    PIPELINE_HTTP_MODE          'record', 'replay' or unset (live traffic).
+    PIPELINE_HTTP_FIXTURES      Fixture directory (default: <repo>/fixtures/http).
+    PIPELINE_HTTP_LATENCY_MS    Delay added before every response, e.g. '120'.
+    PIPELINE_HTTP_JITTER_MS     Uniform random jitter added to that delay.
+    PIPELINE_HTTP_PASSTHROUGH   In replay mode, send requests with no fixture to the
+                                network instead of failing (set to '1').
+
+Usage:
+    PIPELINE_HTTP_MODE=record python run_pipeline.py     # capture once, online
+    PIPELINE_HTTP_MODE=replay PIPELINE_HTTP_LATENCY_MS=80 python run_pipeline.py
+"""
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_FIXTURE_DIR = os.path.join(REPO_ROOT, 'fixtures', 'http')
+KEY_HEADERS = ('range', 'range-unit', 'prefer', 'accept-profile', 'content-profile')
+# Response headers worth keeping; the Supabase client reads Content-Range for exact counts
+RESPONSE_HEADERS = ('content-type', 'content-range', 'content-encoding', 'preference-applied')
+
+# Stand-ins so clients can be constructed in replay mode on a machine with no .env
+REPLAY_ENV_DEFAULTS = {
+    'NEXT_PUBLIC_SUPABASE_URL': 'http://replay.invalid',
+    'NEXT_PUBLIC_SUPABASE_ANON_KEY': 'replay',
+    'SUPABASE_SERVICE_KEY': 'replay',
+}
+
+
+class FixtureNotFoundError(Exception):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class HttpFixtures:
+    """Records responses to, and replays them from, a fixture directory."""
+
+    def __init__(self, mode, fixture_dir=DEFAULT_FIXTURE_DIR, latency_ms=0.0, jitter_ms=0.0,
+                 passthrough=False, seed=0):
+        if mode not in ('record', 'replay', None):
+            raise ValueError(f"Unknown HTTP fixture mode: {mode!r}")
+        self.mode = mode
+        self.fixture_dir = fixture_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.passthrough = passthrough
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recorded = {}
+        self._loaded = {}
+        self._replay_positions = {}
+        self.stats = {'recorded': 0, 'replayed': 0, 'passed_through': 0}
+
+    # --- Keys and storage ---
+
+    def request_key(self, method, url, headers, body):
+        """Returns (human-readable description, fixture file path) for a request."""
+        parts = urlsplit(str(url))
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        selected = {name: headers[name] for name in KEY_HEADERS if headers.get(name) is not None}
+        body_hash = hashlib.sha256(body or b'').hexdigest()
+
+        description = {'method': method.upper(), 'path': parts.path, 'query': query, 'headers': selected,
+                       'body_sha256': body_hash}
+        digest = hashlib.sha256(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()[:24]
+        service = parts.path.strip('/').split('/')[0] or 'root'
+        return description, os.path.join(self.fixture_dir, service, f'{digest}.json')
+
+    def _load(self, path):
+        # Fixture files are read once per process
+        if path not in self._loaded:
+            with open(path) as f:
+                self._loaded[path] = json.load(f)
+        return self._loaded[path]
+
+    def _store(self, path, description, response):
+        with self._lock:
+            entry = self._recorded.get(path)
+            if entry is None:
+                # A new recording session replaces fixtures from earlier sessions
+                entry = {'request': description, 'responses': []}
+                self._recorded[path] = entry
+            entry['responses'].append(response)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f, indent=1)
+            os.replace(tmp_path, path)
+            self.stats['recorded'] += 1
+
+    def _next_response(self, path):
+        with self._lock:
+            responses = self._load(path)['responses']
+            position = self._replay_positions.get(path, 0)
+            self._replay_positions[path] = position + 1
+            self.stats['replayed'] += 1
+            # Past the end of the recorded sequence, keep returning the last response
+            return responses[min(position, len(responses) - 1)]
+
+    def delay_seconds(self):
+        """The injected latency for the next request, in seconds."""
+        if not self.latency_ms and not self.jitter_ms:
+            return 0.0
+        with self._lock:
+            jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter) / 1000.0
+
+    def _delay(self):
+        seconds = self.delay_seconds()
+        if seconds:
+            time.sleep(seconds)
+
+    @staticmethod
+    def _encode_body(content):
+        try:
+            return {'text': content.decode('utf-8')}
+        except UnicodeDecodeError:
+            return {'base64': base64.b64encode(content).decode('ascii')}
+
+    @staticmethod
+    def _decode_body(response):
+        if 'base64' in response:
+            return base64.b64decode(response['base64'])
+        return response.get('text', '').encode('utf-8')
+
+    # --- Core request handling shared by both clients ---
+
+    def handle(self, method, url, headers, body, send, to_record, from_record, delay=True):
+        """
+        Records, replays or forwards one request.
+
+        Args:
+            send: Callable performing the real request.
+            to_record: Callable turning the client's response into a fixture dict.
+            from_record: Callable turning a fixture dict into the client's response.
+            delay (bool): Whether to inject the configured latency here (async callers
+                sleep on the event loop themselves).
+        """
+        if delay:
+            self._delay()
+        if self.mode is None:
+            return send()
+
+        description, path = self.request_key(method, url, headers, body)
+        if self.mode == 'replay':
+            if os.path.exists(path):
+                return from_record(self._next_response(path))
+            if not self.passthrough:
+                raise FixtureNotFoundError(
+                    f"No recorded response for {description['method']} {description['path']}"
+                    f"{'?' + description['query'] if description['query'] else ''} in {self.fixture_dir}")
+            self.stats['passed_through'] += 1
+            return send()
+
+        response = send()
+        self._store(path, description, to_record(response))
+        return response
+
+
+_fixtures = None
+
+
+def _patch_requests(fixtures):
+    try:
+        import requests
+    except ImportError:
+        return
+    original_send = requests.Session.send
+
+    def to_record(response):
+        headers = {k.lower(): v for k, v in response.headers.items() if k.lower() in RESPONSE_HEADERS}
+        # requests has already decoded any content encoding
+        headers.pop('content-encoding', None)
+        return {'status': response.status_code, 'headers': headers, **HttpFixtures._encode_body(response.content)}
+
+    def fixture_send(self, request, **kwargs):
+        def from_record(record):
+            response = requests.Response()
+            response.status_code = record['status']
+            response.headers = requests.structures.CaseInsensitiveDict(record['headers'])
+            response._content = HttpFixtures._decode_body(record)
+            response.url = request.url
+            response.request = request
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+            return response
+
+        body = request.body.encode('utf-8') if isinstance(request.body, str) else request.body
+        headers = {k.lower(): v for k, v in request.headers.items()}
+        return fixtures.handle(request.method, request.url, headers, body,
+                               lambda: original_send(self, request, **kwargs), to_record, from_record)
+
+    requests.Session.send = fixture_send
+
+
+def _patch_httpx(fixtures):
+    try:
+        import httpx
+    except ImportError:
+        return
+
+    def to_record(response):
+        headers = {k.lower(): v for k, v in response.headers.items() if k.lower() in RESPONSE_HEADERS}
+        headers.pop('content-encoding', None)
+        return {'status': response.status_code, 'headers': headers, **HttpFixtures._encode_body(response.content)}
+
+    def from_record_for(request):
+        def from_record(record):
+            return httpx.Response(record['status'], headers=record['headers'],
+                                  content=HttpFixtures._decode_body(record), request=request)
+        return from_record
+
+    def request_parts(request):
+        headers = {k.lower(): v for k, v in request.headers.items()}
+        return request.method, str(request.url), headers, request.content
+
+    original_send = httpx.Client.send
+
+    def fixture_send(self, request, **kwargs):
+        def send():
+            response = original_send(self, request, **kwargs)
+            response.read()
+            return response
+        return fixtures.handle(*request_parts(request), send, to_record, from_record_for(request))
+
+    httpx.Client.send = fixture_send
+
+    original_async_send = httpx.AsyncClient.send
+
+    async def fixture_async_send(self, request, **kwargs):
+        import asyncio
+
+        # The real request is awaited here so the shared handler stays synchronous
+        method, url, headers, body = request_parts(request)
+        delay = fixtures.delay_seconds()
+        if delay:
+            await asyncio.sleep(delay)
+        if fixtures.mode == 'replay':
+            _, path = fixtures.request_key(method, url, headers, body)
+            if os.path.exists(path) or not fixtures.passthrough:
+                return fixtures.handle(method, url, headers, body, None, to_record, from_record_for(request), delay=False)
+        response = await original_async_send(self, request, **kwargs)
+        await response.aread()
+        return fixtures.handle(method, url, headers, body, lambda: response, to_record, from_record_for(request),
+                               delay=False)
+
+    httpx.AsyncClient.send = fixture_async_send
+
+
+def install(mode, fixture_dir=DEFAULT_FIXTURE_DIR, latency_ms=0.0, jitter_ms=0.0, passthrough=False):
+    """
+    Activates the record/replay layer for this process. Safe to call more than once;
+    only the first call patches the HTTP clients.
+
+    Returns:
+        HttpFixtures: The active fixture store (its `stats` count recorded/replayed requests).
+    """
+    global _fixtures
+    if _fixtures is not None:
+        return _fixtures
+
+    _fixtures = HttpFixtures(mode, fixture_dir, latency_ms, jitter_ms, passthrough)
+    if mode == 'replay':
+        for name, value in REPLAY_ENV_DEFAULTS.items():
+            os.environ.setdefault(name, value)
+    if mode is not None or latency_ms or jitter_ms:
+        _patch_requests(_fixtures)
+        _patch_httpx(_fixtures)
+        print(f"HTTP fixtures: mode={mode or 'live'}, dir={fixture_dir}, latency={latency_ms}ms (+{jitter_ms}ms jitter)")
+    return _fixtures
+
+
+def install_from_env():
+    """Activates the record/replay layer if PIPELINE_HTTP_MODE or an injected latency is set."""
+    mode = os.environ.get('PIPELINE_HTTP_MODE') or None
+    latency_ms = float(os.environ.get('PIPELINE_HTTP_LATENCY_MS') or 0)
+    jitter_ms = float(os.environ.get('PIPELINE_HTTP_JITTER_MS') or 0)
+    if mode is None and not latency_ms and not jitter_ms:
+        return None
+    return install(
+        mode,
+        fixture_dir=os.environ.get('PIPELINE_HTTP_FIXTURES') or DEFAULT_FIXTURE_DIR,
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        passthrough=os.environ.get('PIPELINE_HTTP_PASSTHROUGH') == '1',
+    )
@@ -0,0 +1,268 @@
+"""
+Lightweight stage instrumentation for the pipeline and predmodel scripts.
+
+Wrap a unit of work in `stage()` to record its wall time, CPU time, peak memory,
+rows in/out, the number of HTTP requests it made and the database connections it
+had to open:
+
+    with stage('fetch_season', season=season) as metrics:
+        df = fetch(...)
+        metrics.rows_out = len(df)
+
+Each finished stage is appended as one line to the metrics file, so runs can be
+charted over time. The file is JSON Lines by default, or InfluxDB line protocol when
+its name ends in '.lp'. Every stage of one run (including subprocesses, which inherit
+the environment) shares a run_id.
+
+Environment:
+    PIPELINE_METRICS_FILE   Output file (default: <repo>/metrics/pipeline_metrics.jsonl).
+                            Set to an empty string to disable writing.
+    PIPELINE_RUN_ID         Groups the stages of one run; generated if unset.
+
+Stages can also be profiled on demand (cProfile, tracemalloc or a sampling profiler);
+see profiling.py for the PIPELINE_PROFILE switches.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from profiling import start_stage_profilers
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_METRICS_FILE = os.path.join(REPO_ROOT, 'metrics', 'pipeline_metrics.jsonl')
+
+_lock = threading.Lock()
+_active_stages = []
+_completed_stages = []
+_http_patched = False
+_db_connections = {}
+
+
+def get_run_id():
+    """Returns this run's id, creating it (and exporting it to child processes) on first use."""
+    run_id = os.environ.get('PIPELINE_RUN_ID')
+    if not run_id:
+        run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ') + '-' + uuid.uuid4().hex[:6]
+        os.environ['PIPELINE_RUN_ID'] = run_id
+    return run_id
+
+
+def _peak_rss_mb():
+    """High-water mark of this process's resident memory, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _count_http_call():
+    current = threading.current_thread()
+    with _lock:
+        for stage_metrics in _active_stages:
+            if stage_metrics.counts_thread(current):
+                stage_metrics.http_calls += 1
+
+
+def count_db_connection(pool):
+    """Records a new connection opened by one of db_connector's client pools ('read' or 'admin')."""
+    current = threading.current_thread()
+    with _lock:
+        _db_connections[pool] = _db_connections.get(pool, 0) + 1
+        for stage_metrics in _active_stages:
+            if stage_metrics.counts_thread(current):
+                stage_metrics.db_connections += 1
+
+
+def _patch_http_clients():
+    """Counts requests sent through requests (nba_api) and httpx (supabase)."""
+    global _http_patched
+    if _http_patched:
+        return
+    _http_patched = True
+
+    try:
+        import requests
+        original_send = requests.Session.send
+
+        def counted_send(self, *args, **kwargs):
+            _count_http_call()
+            return original_send(self, *args, **kwargs)
+        requests.Session.send = counted_send
+    except ImportError:
+        pass
+
+    try:
+        import httpx
+        original_client_send = httpx.Client.send
+
+        def counted_client_send(self, *args, **kwargs):
+            _count_http_call()
+            return original_client_send(self, *args, **kwargs)
+        httpx.Client.send = counted_client_send
+
+        original_async_send = httpx.AsyncClient.send
+
+        async def counted_async_send(self, *args, **kwargs):
+            _count_http_call()
+            return await original_async_send(self, *args, **kwargs)
+        httpx.AsyncClient.send = counted_async_send
+    except ImportError:
+        pass
+
+
+class StageMetrics:
+    """
+    Measurements for one stage. Callers set `rows_in` / `rows_out` (and any extra
+    tags) while the stage runs; timings are filled in when it finishes.
+
+    A stage opened on the main thread counts the HTTP calls and CPU time of every
+    thread, since it encloses the work it fans out. A stage opened on a worker thread
+    (e.g. one season in a thread pool) counts only its own thread.
+    """
+
+    def __init__(self, name, season=None, rows_in=None, tags=None):
+        self.name = name
+        self.season = season
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.tags = dict(tags or {})
+        self.http_calls = 0
+        self.db_connections = 0
+        self.thread = threading.current_thread()
+        self.process_wide = self.thread is threading.main_thread()
+        self.nested = False
+
+    def counts_thread(self, thread):
+        return self.process_wide or thread is self.thread
+
+    def _cpu_time(self):
+        return time.process_time() if self.process_wide else time.thread_time()
+
+    def start(self):
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = self._cpu_time()
+        self._rss_start = _peak_rss_mb()
+
+    def finish(self, status):
+        self.status = status
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = self._cpu_time() - self._cpu_start
+        self.peak_rss_mb = _peak_rss_mb()
+        # How far this stage pushed the process's memory high-water mark
+        self.peak_rss_growth_mb = (None if self.peak_rss_mb is None
+                                   else self.peak_rss_mb - self._rss_start)
+
+    def to_record(self):
+        return {
+            'run_id': get_run_id(),
+            'script': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+            'stage': self.name,
+            'season': self.season,
+            'started_at': self.started_at,
+            'status': self.status,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'peak_rss_mb': None if self.peak_rss_mb is None else round(self.peak_rss_mb, 1),
+            'peak_rss_growth_mb': None if self.peak_rss_growth_mb is None else round(self.peak_rss_growth_mb, 1),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'http_calls': self.http_calls,
+            'db_connections': self.db_connections,
+            **self.tags,
+        }
+
+
+def _escape_tag(value):
+    return str(value).replace(' ', r'\ ').replace(',', r'\,').replace('=', r'\=')
+
+
+def to_line_protocol(record):
+    """Formats a stage record as an InfluxDB line protocol point."""
+    tags = {key: record[key] for key in ('run_id', 'script', 'stage', 'season', 'status') if record.get(key) is not None}
+    fields = {key: value for key, value in record.items()
+              if key not in tags and key != 'started_at' and isinstance(value, (int, float)) and not isinstance(value, bool)}
+    timestamp_ns = int(datetime.fromisoformat(record['started_at']).timestamp() * 1e9)
+    tag_str = ','.join(f'{key}={_escape_tag(value)}' for key, value in tags.items())
+    field_str = ','.join(f'{key}={value}i' if isinstance(value, int) else f'{key}={value}' for key, value in fields.items())
+    return f'pipeline_stage,{tag_str} {field_str} {timestamp_ns}'
+
+
+def _write_record(record):
+    path = os.environ.get('PIPELINE_METRICS_FILE', DEFAULT_METRICS_FILE)
+    if not path:
+        return
+    line = to_line_protocol(record) if path.endswith('.lp') else json.dumps(record, default=str)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with _lock, open(path, 'a') as f:
+            f.write(line + '\n')
+    except OSError as e:
+        print(f"Warning: could not write stage metrics to {path}: {e}")
+
+
+@contextmanager
+def stage(name, season=None, rows_in=None, **tags):
+    """
+    Records metrics for the enclosed block and appends them to the metrics file.
+
+    Args:
+        name (str): Stage name (e.g. 'fetch', 'z_scores', 'seed').
+        season (str): Season the stage works on, if it is a per-season stage.
+        rows_in (int): Rows the stage received.
+        **tags: Extra JSON-serializable values stored with the record.
+
+    Yields:
+        StageMetrics: Set `rows_out` (or `rows_in`) on it while the stage runs.
+    """
+    _patch_http_clients()
+    metrics = StageMetrics(name, season=season, rows_in=rows_in, tags=tags)
+    with _lock:
+        metrics.nested = any(parent.counts_thread(metrics.thread) for parent in _active_stages)
+        _active_stages.append(metrics)
+    # None unless PIPELINE_PROFILE selects this stage
+    profilers = start_stage_profilers(name, season, get_run_id())
+    metrics.start()
+    status = 'error'
+    try:
+        yield metrics
+        status = 'ok'
+    finally:
+        metrics.finish(status)
+        if profilers is not None:
+            metrics.tags['profiles'] = profilers.stop()
+        with _lock:
+            _active_stages.remove(metrics)
+            _completed_stages.append(metrics)
+        _write_record(metrics.to_record())
+
+
+def print_stage_summary():
+    """Prints the top-level (non per-season, non-nested) stages finished in this process."""
+    top_level = [m for m in _completed_stages if m.season is None and not m.nested]
+    if not top_level:
+        return
+    total = sum(m.wall_seconds for m in top_level if m.process_wide)
+    print("\n--- Stage Timings ---")
+    print(f"  {'stage':<24}{'wall s':>9}{'cpu s':>9}{'peak MB':>9}{'rows out':>10}{'http':>6}{'db conn':>8}")
+    for m in top_level:
+        peak = '' if m.peak_rss_mb is None else f'{m.peak_rss_mb:.0f}'
+        rows_out = '' if m.rows_out is None else m.rows_out
+        print(f"  {m.name:<24}{m.wall_seconds:>9.2f}{m.cpu_seconds:>9.2f}{peak:>9}{rows_out!s:>10}{m.http_calls:>6}"
+              f"{m.db_connections:>8}")
+    print(f"  Total wall time: {total:.2f}s (run {get_run_id()})")
+    if _db_connections:
+        opened = ', '.join(f'{pool} {count}' for pool, count in sorted(_db_connections.items()))
+        print(f"  Database connections opened: {opened}")
+    print("---------------------")
@@ -0,0 +1,389 @@
+"""
+Single entry point for the whole workflow: ingestion, scoring and modeling.
+
+The scripts that used to be run by hand in order are declared here as a dependency
+graph of stages. Each stage runs its script in a subprocess, and stages whose
+dependencies are done run concurrently, within `--jobs` and the resource pools in
+config.SCHEDULER_POOLS. For example, game-log ingestion (nba_api pool) overlaps
+model training and scoring (cpu pool).
+
+A stage is skipped when its inputs have not changed since its last successful run.
+Its inputs are its source files (its script and every repo module that script
+imports), the runs of the stages it depends on and its arguments. Stages that pull external data (the NBA API) also rerun once their last
+run is older than config.SCHEDULER_DATA_MAX_AGE_HOURS.
+
+Usage:
+    python pipeline.py                         # every stage that is out of date
+    python pipeline.py --until seed            # seed and everything it depends on
+    python pipeline.py --only projections      # just that stage
+    python pipeline.py --force --dry-run       # show what a full rerun would do
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+
+import config
+from instrumentation import stage, get_run_id
+from profiling import add_profiling_arguments, apply_profiling_arguments
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+STATE_FILE = os.path.join(REPO_ROOT, '.pipeline_state.json')
+
+# Where a stage script's flat imports resolve, in sys.path order: the script's own
+# directory, then python_scripts (which the predmodel scripts append to sys.path)
+MODULE_DIRS = ['python_scripts']
+
+# Scripts are relative to the repo root. A stage's source files are its script and every
+# repo module it imports (see stage_inputs); 'inputs' lists any other files it reads.
+STAGES = {
+    'seed': {
+        'script': 'python_scripts/run_pipeline.py',
+        'deps': [],
+        'pool': 'nba_api',
+        'external_data': True,
+    },
+    'game_logs': {
+        'script': 'python_scripts/fetch_game_logs.py',
+        'deps': ['seed'],
+        'pool': 'nba_api',
+        'external_data': True,
+    },
+    'train': {
+        'script': 'predmodel/train_model.py',
+        'deps': ['seed'],
+        'pool': 'cpu',
+    },
+    'projections': {
+        'script': 'predmodel/predict_player_stats.py',
+        'deps': ['train'],
+        'pool': 'cpu',
+    },
+    'risers_fallers': {
+        'script': 'predmodel/predict_risers_fallers.py',
+        'deps': ['train'],
+        'pool': 'cpu',
+    },
+    'game_model': {
+        'script': 'predmodel/train_game_model.py',
+        'deps': ['game_logs'],
+        'pool': 'cpu',
+    },
+    'player_aggregates': {
+        'script': 'python_scripts/player_aggregates.py',
+        'deps': ['game_logs'],
+        'pool': 'cpu',
+    },
+}
+
+
+def ancestors(name):
+    """Returns the stage and every stage it depends on, directly or not."""
+    selected = {name}
+    for dep in STAGES[name]['deps']:
+        selected |= ancestors(dep)
+    return selected
+
+
+def select_stages(only=None, until=None):
+    """
+    Resolves --only / --until into the set of stages to run.
+
+    Args:
+        only (list): Run exactly these stages; their dependencies are assumed done.
+        until (list): Run these stages and everything upstream of them.
+
+    Returns:
+        set: Selected stage names (every stage if neither is given).
+    """
+    unknown = [name for name in (only or []) + (until or []) if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages {unknown}; choose from {list(STAGES)}.")
+    if only:
+        return set(only)
+    if until:
+        return set().union(*(ancestors(name) for name in until))
+    return set(STAGES)
+
+
+def topological_order(names):
+    """Orders stages so that every stage comes after its dependencies."""
+    ordered = []
+
+    def visit(name):
+        if name in ordered:
+            return
+        for dep in STAGES[name]['deps']:
+            visit(dep)
+        ordered.append(name)
+
+    for name in STAGES:
+        visit(name)
+    return [name for name in ordered if name in names]
+
+
+def load_state():
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state):
+    tmp_path = f'{STATE_FILE}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def _imported_modules(path):
+    """Returns the top-level names of every module a source file imports, anywhere in the file."""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return names
+
+
+def stage_inputs(name):
+    """
+    Returns a stage's source files: its script, every repo module the script imports,
+    directly or through other repo modules, and the stage's extra 'inputs'.
+
+    Imports resolve the way they do when the script runs, so a predmodel script's
+    `config` is predmodel/config.py even inside the python_scripts modules it imports.
+
+    Returns:
+        list: Sorted paths relative to the repo root.
+    """
+    script = STAGES[name]['script']
+    search_dirs = [os.path.dirname(script)] + [d for d in MODULE_DIRS if d != os.path.dirname(script)]
+    found = set()
+    pending = [script]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+        for module in _imported_modules(os.path.join(REPO_ROOT, path)):
+            for directory in search_dirs:
+                candidate = os.path.join(directory, f'{module}.py')
+                if os.path.isfile(os.path.join(REPO_ROOT, candidate)):
+                    pending.append(candidate)
+                    break
+    return sorted(found | set(STAGES[name].get('inputs', [])))
+
+
+def stage_fingerprint(name, state, stage_args):
+    """
+    Hashes everything a stage's output depends on: its source files, the last
+    successful run of each dependency, and the arguments it is run with.
+    """
+    digest = hashlib.sha256()
+    for path in stage_inputs(name):
+        digest.update(path.encode('utf-8'))
+        try:
+            with open(os.path.join(REPO_ROOT, path), 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            digest.update(b'missing')
+    for dep in STAGES[name]['deps']:
+        digest.update(f"{dep}={state.get(dep, {}).get('finished_at')}".encode('utf-8'))
+    digest.update(json.dumps(stage_args).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def is_fresh(name, state, fingerprint, max_age_hours=config.SCHEDULER_DATA_MAX_AGE_HOURS):
+    """Whether a stage's last successful run used the same inputs and is recent enough."""
+    previous = state.get(name)
+    if not previous or previous.get('fingerprint') != fingerprint:
+        return False
+    if STAGES[name].get('external_data'):
+        age_hours = (datetime.now(timezone.utc) - datetime.fromisoformat(previous['finished_at'])).total_seconds() / 3600
+        return age_hours < max_age_hours
+    return True
+
+
+def _stream_output(name, pipe):
+    """Prefixes a stage's output lines with its name so concurrent stages stay readable."""
+    for line in iter(pipe.readline, ''):
+        sys.stdout.write(f"[{name}] {line}")
+        sys.stdout.flush()
+    pipe.close()
+
+
+def run_stage(name, stage_args):
+    """
+    Runs one stage's script in a subprocess, streaming its output.
+
+    Returns:
+        int: The script's exit code.
+    """
+    script = os.path.join(REPO_ROOT, STAGES[name]['script'])
+    with stage(f'dag_{name}', target=STAGES[name]['script']) as metrics:
+        process = subprocess.Popen([sys.executable, '-u', script, *stage_args], cwd=os.path.dirname(script),
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+        _stream_output(name, process.stdout)
+        returncode = process.wait()
+        metrics.tags['returncode'] = returncode
+        if returncode != 0:
+            # A failed stage fails the scheduler record too
+            raise subprocess.CalledProcessError(returncode, script)
+    return returncode
+
+
+def run_graph(selected, jobs=config.SCHEDULER_MAX_JOBS, pools=config.SCHEDULER_POOLS, force=False,
+              dry_run=False, stage_args=None):
+    """
+    Runs the selected stages in dependency order, as concurrently as jobs and pools allow.
+
+    Dependencies outside the selection are treated as already done. When a stage
+    fails, the stages downstream of it are not run, but independent branches carry on.
+
+    Args:
+        selected (set): Stage names to run.
+        jobs (int): Maximum stages running at once.
+        pools (dict): Capacity of each resource pool.
+        force (bool): Run every selected stage even if its inputs are unchanged.
+        dry_run (bool): Print the plan without running anything.
+        stage_args (dict): Extra command-line arguments per stage name.
+
+    Returns:
+        dict: Final status per stage: 'ok', 'fresh', 'failed', 'blocked' or 'planned'.
+    """
+    stage_args = stage_args or {}
+    order = topological_order(selected)
+    state = load_state()
+    status = {}
+    durations = {}
+    running = {}
+    pool_usage = {pool: 0 for pool in pools}
+
+    def deps_done(name):
+        return all(dep not in selected or status.get(dep) in ('ok', 'fresh', 'planned') for dep in STAGES[name]['deps'])
+
+    def deps_failed(name):
+        return any(status.get(dep) in ('failed', 'blocked') for dep in STAGES[name]['deps'] if dep in selected)
+
+    def pool_free(name):
+        pool = STAGES[name].get('pool')
+        return pool not in pools or pool_usage[pool] < pools[pool]
+
+    def timed_run(name):
+        start = time.perf_counter()
+        try:
+            run_stage(name, stage_args.get(name, []))
+            return True
+        except Exception as e:
+            print(f"Stage '{name}' failed: {e}")
+            return False
+        finally:
+            durations[name] = time.perf_counter() - start
+
+    print(f"--- Running stages: {', '.join(order)} (run {get_run_id()}) ---")
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        while len(status) < len(order):
+            # Resolve every stage that can be decided without running anything
+            progressed = True
+            while progressed:
+                progressed = False
+                for name in order:
+                    if name in status or name in running.values():
+                        continue
+                    if deps_failed(name):
+                        status[name] = 'blocked'
+                        print(f"Skipping '{name}': an upstream stage failed.")
+                        progressed = True
+                    elif deps_done(name):
+                        fingerprint = stage_fingerprint(name, state, stage_args.get(name, []))
+                        # In a dry run, a stage downstream of a planned one would rerun too
+                        upstream_planned = any(status.get(dep) == 'planned' for dep in STAGES[name]['deps'])
+                        if not force and not upstream_planned and is_fresh(name, state, fingerprint):
+                            status[name] = 'fresh'
+                            print(f"Skipping '{name}': inputs unchanged since {state[name]['finished_at']}.")
+                            progressed = True
+                        elif dry_run:
+                            status[name] = 'planned'
+                            print(f"Would run '{name}' ({STAGES[name]['script']}).")
+                            progressed = True
+
+            # Start ready stages while jobs and pools allow
+            for name in order:
+                if name in status or name in running.values() or len(running) >= jobs:
+                    continue
+                if deps_done(name) and pool_free(name):
+                    pool = STAGES[name].get('pool')
+                    if pool in pool_usage:
+                        pool_usage[pool] += 1
+                    print(f"Starting '{name}' ({STAGES[name]['script']})...")
+                    running[executor.submit(timed_run, name)] = name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                pool = STAGES[name].get('pool')
+                if pool in pool_usage:
+                    pool_usage[pool] -= 1
+                if future.result():
+                    status[name] = 'ok'
+                    state[name] = {
+                        'fingerprint': stage_fingerprint(name, state, stage_args.get(name, [])),
+                        'finished_at': datetime.now(timezone.utc).isoformat(),
+                        'run_id': get_run_id(),
+                    }
+                    save_state(state)
+                else:
+                    status[name] = 'failed'
+
+    print("\n--- Stage Results ---")
+    for name in order:
+        duration = f"{durations[name]:.1f}s" if name in durations else ''
+        print(f"  {name:<20}{status.get(name, 'not run'):<10}{duration:>10}")
+    print("---------------------")
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ingestion, scoring and modeling stages as a dependency graph.")
+    parser.add_argument('--only', nargs='+', default=None, metavar='STAGE',
+                        help=f"Run only these stages. Stages: {', '.join(STAGES)}.")
+    parser.add_argument('--until', nargs='+', default=None, metavar='STAGE',
+                        help="Run these stages and everything they depend on.")
+    parser.add_argument('--jobs', type=int, default=config.SCHEDULER_MAX_JOBS, help="Stages to run at once.")
+    parser.add_argument('--force', action='store_true', help="Rerun stages even if their inputs are unchanged.")
+    parser.add_argument('--dry-run', action='store_true', help="Print the plan without running anything.")
+    parser.add_argument('--train-args', default='', help="Extra arguments for train_model.py, e.g. '--incremental'.")
+    parser.add_argument('--projection-args', default='',
+                        help="Extra arguments for predict_player_stats.py, e.g. '--scenario optimistic'.")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    # Profiling flags reach the stage scripts through the environment
+    apply_profiling_arguments(args)
+
+    try:
+        selected = select_stages(args.only, args.until)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stage_args = {'train': args.train_args.split(), 'projections': args.projection_args.split()}
+    status = run_graph(selected, jobs=args.jobs, force=args.force, dry_run=args.dry_run, stage_args=stage_args)
+    if any(value in ('failed', 'blocked') for value in status.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Precomputes each player's career, season and split aggregates from their game logs.
+
+The player page used to load a player's every season row and every game and aggregate
+them in the browser. This stage runs after the game logs are fetched and stores one
+compact row per player in `player_aggregates`:
+
+    career        games, totals and per-game averages, shooting percentages
+    seasons       the same per season, keyed by season label
+    splits        home / away and wins / losses
+    form          per-game averages over the last N games (config.PLAYER_FORM_WINDOWS)
+    consistency   game-to-game standard deviations, the points coefficient of
+                  variation and a points floor / ceiling (10th / 90th percentiles)
+
+Game logs are streamed in (player_id, game_date) order in bounded chunks, and every
+aggregate of a chunk's players is computed with grouped pandas operations in one pass.
+
+Usage:
+    python player_aggregates.py                  # NBA
+    python player_aggregates.py --league wnba
+"""
+import argparse
+from datetime import datetime, timezone
+
+import config
+from db_connector import stream_game_logs, upsert_in_chunks
+from instrumentation import stage, print_stage_summary
+from profiling import add_profiling_arguments, apply_profiling_arguments
+
+COUNTING_STATS = ['minutes_played', 'points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+                  'field_goals_made', 'field_goal_attempts', 'three_pointers_made', 'three_point_attempts',
+                  'free_throws_made', 'free_throw_attempts']
+CONSISTENCY_STATS = ['minutes_played', 'points', 'rebounds', 'assists']
+GAME_LOG_COLUMNS = ['player_id', 'game_date', 'opponent', 'win_loss'] + COUNTING_STATS
+AGGREGATE_CHUNK_SIZE = 100  # Players per upsert; each row carries a few KB of JSON
+
+def season_labels(game_dates, league=config.DEFAULT_LEAGUE):
+    """
+    Returns the season label of each game date, in the league's format ('2024-25' or '2024').
+
+    Args:
+        game_dates (pd.Series): Datetime game dates.
+        league (str): Key in config.LEAGUES.
+    """
+    if '-' not in config.LEAGUES[league]['seasons'][0]:
+        return game_dates.dt.year.astype(str)
+    # Seasons open after mid-October (the 2020 bubble finals ended on October 11)
+    before_opening = (game_dates.dt.month < 10) | ((game_dates.dt.month == 10) & (game_dates.dt.day < 15))
+    start = game_dates.dt.year - before_opening.astype(int)
+    return start.astype(str) + '-' + ((start + 1) % 100).astype(str).str.zfill(2)
+
+def _ratio(numerator, denominator):
+    return (numerator / denominator.where(denominator > 0)).astype(float)
+
+def summarize_games(games, keys):
+    """
+    Per-game averages and shooting percentages of each group of games.
+
+    Args:
+        games (pd.DataFrame): Game logs with COUNTING_STATS columns.
+        keys (list): Grouping columns.
+
+    Returns:
+        pd.DataFrame: One row per group: 'games', each stat's per-game average and the
+            field goal, three point, free throw and true shooting percentages.
+    """
+    grouped = games.groupby(keys, sort=False)
+    sums = grouped[COUNTING_STATS].sum()
+    counts = grouped.size()
+    summary = sums.div(counts, axis=0)
+    summary.insert(0, 'games', counts)
+    summary['field_goal_pct'] = _ratio(sums['field_goals_made'], sums['field_goal_attempts'])
+    summary['three_point_pct'] = _ratio(sums['three_pointers_made'], sums['three_point_attempts'])
+    summary['free_throw_pct'] = _ratio(sums['free_throws_made'], sums['free_throw_attempts'])
+    summary['true_shooting_pct'] = _ratio(sums['points'], 2 * (sums['field_goal_attempts'] + 0.44 * sums['free_throw_attempts']))
+    return summary
+
+def _json_ready(frame):
+    """Rounds a frame for compact storage and turns NaN into None."""
+    frame = frame.round(3)
+    return frame.astype(object).where(frame.notna(), None)
+
+def _nest(summary):
+    """Turns a (player_id, <level>) indexed summary into {player_id: {level value: {stat: value}}}."""
+    nested = {}
+    for (player_id, key), values in _json_ready(summary).to_dict('index').items():
+        nested.setdefault(player_id, {})[str(key)] = values
+    return nested
+
+def compute_player_aggregates(games, league=config.DEFAULT_LEAGUE, form_windows=config.PLAYER_FORM_WINDOWS):
+    """
+    Computes the aggregates of every player in a frame of game logs.
+
+    Args:
+        games (pd.DataFrame): Game logs holding every game of the players they include.
+        league (str): Key in config.LEAGUES.
+        form_windows (list): Last-N-game windows for the form averages.
+
+    Returns:
+        pd.DataFrame: One row per player, with the player_aggregates columns.
+    """
+    import pandas as pd
+
+    games = games.copy()
+    games['game_date'] = pd.to_datetime(games['game_date'])
+    games[COUNTING_STATS] = games[COUNTING_STATS].apply(pd.to_numeric, errors='coerce')
+    games = games.sort_values(['player_id', 'game_date'], kind='stable')
+    games['season'] = season_labels(games['game_date'], league)
+    # MATCHUP is 'LAL vs. BOS' at home and 'LAL @ BOS' away
+    games['location'] = games['opponent'].fillna('').str.contains(' vs. ', regex=False).map({True: 'home', False: 'away'})
+    games['result'] = games['win_loss'].map({'W': 'wins', 'L': 'losses'})
+
+    grouped = games.groupby('player_id', sort=False)
+    career = summarize_games(games, ['player_id'])
+    totals = grouped[COUNTING_STATS].sum().add_prefix('total_')
+    career = _json_ready(pd.concat([career, totals], axis=1)).to_dict('index')
+
+    seasons = _nest(summarize_games(games, ['player_id', 'season']))
+    locations = _nest(summarize_games(games, ['player_id', 'location']))
+    results = _nest(summarize_games(games.dropna(subset=['result']), ['player_id', 'result']))
+    form = {window: _json_ready(summarize_games(grouped.tail(window), ['player_id'])).to_dict('index')
+            for window in form_windows}
+
+    spread = grouped[CONSISTENCY_STATS].std().add_suffix('_std')
+    spread['points_cv'] = _ratio(spread['points_std'], grouped['points'].mean())
+    points_range = grouped['points'].quantile([0.1, 0.9]).unstack()
+    spread['points_floor'] = points_range[0.1]
+    spread['points_ceiling'] = points_range[0.9]
+    consistency = _json_ready(spread).to_dict('index')
+
+    player_ids = list(career)
+    last_game_dates = grouped['game_date'].max().dt.strftime('%Y-%m-%d')
+    return pd.DataFrame({
+        'player_id': player_ids,
+        'league': league,
+        'games_played': [career[player_id]['games'] for player_id in player_ids],
+        'last_game_date': [last_game_dates[player_id] for player_id in player_ids],
+        'career': [career[player_id] for player_id in player_ids],
+        'seasons': [seasons.get(player_id, {}) for player_id in player_ids],
+        'splits': [{**locations.get(player_id, {}), **results.get(player_id, {})} for player_id in player_ids],
+        'form': [{f'last_{window}': form[window][player_id] for window in form_windows} for player_id in player_ids],
+        'consistency': [consistency[player_id] for player_id in player_ids],
+    })
+
+def iter_player_games(league=config.DEFAULT_LEAGUE, chunk_rows=config.PLAYER_AGGREGATES_CHUNK_ROWS):
+    """
+    Streams a league's game logs in chunks that each hold whole players.
+
+    The last player of a streamed chunk may continue in the next one, so their games
+    are carried over instead of being yielded early.
+
+    Yields:
+        pd.DataFrame: Game logs of one or more complete players.
+    """
+    import pandas as pd
+
+    carry = None
+    for chunk in stream_game_logs(GAME_LOG_COLUMNS, league=league, chunk_rows=chunk_rows):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        last_player = chunk['player_id'].iloc[-1]
+        is_last = chunk['player_id'] == last_player
+        carry = chunk[is_last]
+        if not is_last.all():
+            yield chunk[~is_last]
+    if carry is not None and not carry.empty:
+        yield carry
+
+def build_player_aggregates(league=config.DEFAULT_LEAGUE, chunk_rows=config.PLAYER_AGGREGATES_CHUNK_ROWS):
+    """
+    Computes and stores the aggregates of every player with game logs in a league.
+
+    Each chunk of players is upserted as soon as it is aggregated, so memory stays
+    bounded by the chunk size rather than the number of players.
+
+    Returns:
+        bool: True if every player's row was stored.
+    """
+    print(f"Computing {league} player aggregates from game logs...")
+    players, games_played, failed = 0, 0, 0
+    with stage('aggregate_players', league=league) as metrics:
+        for games in iter_player_games(league, chunk_rows):
+            aggregates = compute_player_aggregates(games, league)
+            aggregates['updated_at'] = datetime.now(timezone.utc).isoformat()
+            result = upsert_in_chunks('player_aggregates', aggregates, on_conflict='player_id',
+                                      chunk_size=AGGREGATE_CHUNK_SIZE)
+            failed += len(result['failed_offsets'])
+            players += len(aggregates)
+            games_played += int(aggregates['games_played'].sum())
+        metrics.rows_out = players
+
+    if not players:
+        print(f"No {league} game logs found; nothing to aggregate.")
+        return True
+    print(f"  Aggregated {games_played} games into {players} players.")
+    if failed:
+        print(f"  {failed} chunks of player aggregates could not be stored; rerun to retry them.")
+    return not failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute per-player career, season and split aggregates from game logs.")
+    parser.add_argument('--league', choices=list(config.LEAGUES), default=config.DEFAULT_LEAGUE,
+                        help="League whose players are aggregated (default: %(default)s).")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    apply_profiling_arguments(args)
+
+    succeeded = build_player_aggregates(args.league)
+    print_stage_summary()
+    if not succeeded:
+        raise SystemExit(1)
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from instrumentation import stage
+
 # Stats to calculate z-scores for
 STATS_FOR_Z_SCORES = [
     'Points', 'Rebounds', 'Assists', 'Steals', 'Blocks',
@@ -30,6 +32,11 @@ def process_and_calc_zscores(main_df):
         print("FATAL: 'PlayerAge' column not found in the source DataFrame.")
         return {}
 
+    # Z-scores are relative to the other players in the same league and season
+    if 'League' in main_df.columns and main_df['League'].nunique() > 1:
+        print(f"FATAL: Found leagues {sorted(main_df['League'].unique())}; process each league separately.")
+        return {}
+
     seasons = main_df['Season'].unique()
     print(f"  Found {len(seasons)} unique seasons.")
 
@@ -42,7 +49,9 @@ def process_and_calc_zscores(main_df):
             print(f"  FATAL: 'PlayerAge' was dropped for season {season} during DataFrame split.")
             continue
 
-        z_scores_df = calculate_z_scores_for_df(season_df, STATS_FOR_Z_SCORES)
+        with stage('z_scores_season', season=season, rows_in=len(season_df)) as metrics:
+            z_scores_df = calculate_z_scores_for_df(season_df, STATS_FOR_Z_SCORES)
+            metrics.rows_out = len(z_scores_df)
 
         # Final check to ensure the column is still present after z-score calculation
         if 'PlayerAge' not in z_scores_df.columns:
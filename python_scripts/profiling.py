@@ -0,0 +1,215 @@
+"""
+On-demand profilers attached to instrumentation stages.
+
+Profiling is off unless switched on from the environment (or the --profile CLI flags,
+which set the same variables). When it is off, a stage only looks up a cached setting:
+nothing is imported, started or traced.
+
+Profilers:
+    cprofile      Deterministic cProfile of the stage's thread. Writes <stage>.prof
+                  (open with pstats or snakeviz) and a <stage>.cprofile.txt summary.
+    tracemalloc   Python allocation tracing. Writes a <stage>.tracemalloc snapshot and a
+                  <stage>.tracemalloc.txt summary of the top allocation sites and peak.
+    sample        Low-overhead sampling profiler: a background thread records the
+                  stage thread's stack every PIPELINE_PROFILE_INTERVAL_MS. Writes
+                  <stage>.folded collapsed stacks for flamegraph.pl or speedscope.
+
+Artifacts go to <PIPELINE_PROFILE_DIR>/<run_id>/<stage>[.<season>].<ext>.
+
+Environment:
+    PIPELINE_PROFILE              Comma-separated profilers, e.g. 'cprofile,tracemalloc'.
+    PIPELINE_PROFILE_STAGES       Comma-separated stage names to profile (default: all).
+    PIPELINE_PROFILE_DIR          Output directory (default: <repo>/metrics/profiles).
+    PIPELINE_PROFILE_INTERVAL_MS  Sampling interval for 'sample' (default: 5).
+"""
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_PROFILE_DIR = os.path.join(REPO_ROOT, 'metrics', 'profiles')
+PROFILERS = ('cprofile', 'tracemalloc', 'sample')
+
+_settings = None
+# Only one cProfile profiler can be active per process, and tracemalloc is process-wide
+_cprofile_lock = threading.Lock()
+_tracemalloc_lock = threading.Lock()
+
+
+def add_profiling_arguments(parser):
+    """Adds --profile / --profile-stages / --profile-dir to a script's argument parser."""
+    parser.add_argument('--profile', default=None,
+                        help=f"Comma-separated profilers to run per stage: {', '.join(PROFILERS)}.")
+    parser.add_argument('--profile-stages', default=None,
+                        help="Comma-separated stage names to profile (default: every stage).")
+    parser.add_argument('--profile-dir', default=None, help="Directory for profile artifacts.")
+
+
+def apply_profiling_arguments(args):
+    """Copies parsed --profile flags into the environment, so subprocesses inherit them too."""
+    for flag, variable in (('profile', 'PIPELINE_PROFILE'), ('profile_stages', 'PIPELINE_PROFILE_STAGES'),
+                           ('profile_dir', 'PIPELINE_PROFILE_DIR')):
+        value = getattr(args, flag, None)
+        if value:
+            os.environ[variable] = value
+    reload_settings()
+
+
+def reload_settings():
+    """Re-reads the profiling environment variables."""
+    global _settings
+    profilers = [p.strip() for p in os.environ.get('PIPELINE_PROFILE', '').split(',') if p.strip()]
+    unknown = sorted(set(profilers) - set(PROFILERS))
+    if unknown:
+        print(f"Warning: ignoring unknown profilers {unknown}; choose from {list(PROFILERS)}.")
+    stages = [s.strip() for s in os.environ.get('PIPELINE_PROFILE_STAGES', '').split(',') if s.strip()]
+    _settings = {
+        'profilers': [p for p in PROFILERS if p in profilers],
+        'stages': set(stages) or None,
+        'dir': os.environ.get('PIPELINE_PROFILE_DIR') or DEFAULT_PROFILE_DIR,
+        'interval': float(os.environ.get('PIPELINE_PROFILE_INTERVAL_MS') or 5) / 1000.0,
+    }
+    return _settings
+
+
+def profilers_for(stage_name):
+    """Returns the profilers enabled for a stage (an empty list when profiling is off)."""
+    settings = _settings or reload_settings()
+    if not settings['profilers']:
+        return []
+    if settings['stages'] is not None and stage_name not in settings['stages']:
+        return []
+    return settings['profilers']
+
+
+def _artifact_base(run_id, stage_name, season):
+    label = stage_name if season is None else f'{stage_name}.{season}'
+    label = re.sub(r'[^A-Za-z0-9_.-]+', '_', label)
+    directory = os.path.join(_settings['dir'], run_id)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, label)
+
+
+class _SamplingProfiler:
+    """Samples one thread's Python stack on a timer and counts collapsed stacks."""
+
+    def __init__(self, target_thread, interval):
+        self._target_id = target_thread.ident
+        self._interval = interval
+        self._stop = threading.Event()
+        self.stacks = Counter()
+        self.samples = 0
+        self._thread = threading.Thread(target=self._run, name='stage-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._target_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class StageProfilers:
+    """Starts the enabled profilers for one stage and writes their artifacts when it ends."""
+
+    def __init__(self, profilers, stage_name, season, run_id):
+        self.profilers = profilers
+        self.stage_name = stage_name
+        self.season = season
+        self.run_id = run_id
+        self.artifacts = []
+        self._cprofile = None
+        self._tracing = False
+        self._sampler = None
+
+    def start(self):
+        if 'cprofile' in self.profilers and _cprofile_lock.acquire(blocking=False):
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+        if 'tracemalloc' in self.profilers and _tracemalloc_lock.acquire(blocking=False):
+            import tracemalloc
+            tracemalloc.start(25)
+            self._tracing = True
+
+        if 'sample' in self.profilers:
+            self._sampler = _SamplingProfiler(threading.current_thread(), _settings['interval'])
+            self._sampler.start()
+
+    def stop(self):
+        """Stops every profiler and writes the artifacts; returns their paths."""
+        # Stop everything before writing, so no profiler records the others' output
+        if self._sampler is not None:
+            self._sampler.stop()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            _cprofile_lock.release()
+        if self._tracing:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _tracemalloc_lock.release()
+
+        base = _artifact_base(self.run_id, self.stage_name, self.season)
+        if self._cprofile is not None:
+            self._write_cprofile(base)
+        if self._tracing:
+            self._write_tracemalloc(base, snapshot, peak)
+        if self._sampler is not None:
+            self._write_samples(base)
+        return self.artifacts
+
+    def _write_cprofile(self, base):
+        import io
+        import pstats
+
+        path = f'{base}.prof'
+        self._cprofile.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(self._cprofile, stream=summary).sort_stats('cumulative').print_stats(40)
+        with open(f'{base}.cprofile.txt', 'w') as f:
+            f.write(summary.getvalue())
+        self.artifacts.append(path)
+
+    def _write_tracemalloc(self, base, snapshot, peak):
+        path = f'{base}.tracemalloc'
+        snapshot.dump(path)
+        with open(f'{base}.tracemalloc.txt', 'w') as f:
+            f.write(f"Peak traced memory: {peak / (1024 * 1024):.1f} MB\n\nTop allocation sites:\n")
+            for stat in snapshot.statistics('lineno')[:30]:
+                f.write(f"{stat}\n")
+        self.artifacts.append(path)
+
+    def _write_samples(self, base):
+        path = f'{base}.folded'
+        with open(path, 'w') as f:
+            for stack, count in self._sampler.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        self.artifacts.append(path)
+
+
+def start_stage_profilers(stage_name, season, run_id):
+    """Starts the profilers enabled for a stage, or returns None when there are none."""
+    profilers = profilers_for(stage_name)
+    if not profilers:
+        return None
+    stage_profilers = StageProfilers(profilers, stage_name, season, run_id)
+    stage_profilers.start()
+    return stage_profilers
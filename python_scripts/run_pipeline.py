@@ -4,65 +4,79 @@ to seeding the final processed data into the Supabase database.
 
 This new approach bypasses all intermediate CSV files, avoiding a persistent bug
 in the environment's pandas library that caused data loss during file writes.
+
+Every league in config.LEAGUES (NBA, WNBA, G League) is processed by its own worker
+process, one league after another; `--leagues` picks which ones run. `--stream`
+processes each season as it arrives on a few threads, and `--async` does the same on
+one asyncio event loop (see async_pipeline.py).
 """
-import pandas as pd
-from nba_api.stats.endpoints import leaguedashplayerstats
+import argparse
+import os
+import subprocess
+import sys
 import time
 import concurrent.futures
 
 # Import configuration
 import config
+from instrumentation import stage, print_stage_summary, get_run_id
+from checkpoints import RunCheckpoints, latest_run_id
+from profiling import add_profiling_arguments, apply_profiling_arguments
 
-# Import the refactored, in-memory functions
-from process_and_calculate_z_scores import process_and_calc_zscores
-from calculate_total_fantasy_scores import calculate_fantasy_scores
-from seed import seed_data
-
-def fetch_season_data(season):
-    """Fetches and merges base and advanced stats for a single season."""
-    print(f"  Fetching data for season: {season}...")
-    try:
-        # Fetch Base and Advanced stats
-        base_stats = leaguedashplayerstats.LeagueDashPlayerStats(
-            season=season, per_mode_detailed='PerGame', measure_type_detailed_defense='Base', timeout=config.REQUEST_TIMEOUT
-        ).get_data_frames()[0]
-        
-        # A small delay to be polite to the API
-        time.sleep(config.REQUEST_DELAY)
-
-        advanced_stats = leaguedashplayerstats.LeagueDashPlayerStats(
-            season=season, per_mode_detailed='PerGame', measure_type_detailed_defense='Advanced', timeout=config.REQUEST_TIMEOUT
-        ).get_data_frames()[0]
-        
-        # Merge stats
-        merged_df = pd.merge(base_stats, advanced_stats[['PLAYER_ID', 'TS_PCT', 'USG_PCT']], on='PLAYER_ID', how='left')
-        merged_df['SEASON'] = season # Add season column
-        print(f"    -> Successfully fetched and merged data for {season}.")
-        return merged_df
-    except Exception as e:
-        print(f"    -> ERROR: Could not fetch data for season {season}: {e}")
-        return None
-
-def fetch_player_data():
-    """Fetches, filters, and cleans player data for all specified seasons in parallel."""
-    print("Step 1: Fetching Player Data from NBA API...")
-    all_seasons_data = []
+# pandas, nba_api and the pipeline stages (which create the Supabase client) are imported
+# inside the functions that use them, so `--help` and other quick invocations start fast.
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # Map the fetch function to each season
-        results = executor.map(fetch_season_data, config.SEASONS)
-    
-    # Filter out None results from failed API calls
-    all_seasons_data = [result for result in results if result is not None]
+def fetch_season_data(season, league=config.DEFAULT_LEAGUE):
+    """Fetches and merges base and advanced stats for a single season of one league."""
+    import pandas as pd
+    from nba_api.stats.endpoints import leaguedashplayerstats
 
-    if not all_seasons_data:
-        print("FATAL: No data could be fetched from the API.")
-        return pd.DataFrame()
+    league_id = config.LEAGUES[league]['league_id']
+    print(f"  Fetching {league} data for season: {season}...")
+    with stage('fetch_season', season=season, league=league) as metrics:
+        try:
+            # Fetch Base and Advanced stats
+            base_stats = leaguedashplayerstats.LeagueDashPlayerStats(
+                season=season, league_id_nullable=league_id, per_mode_detailed='PerGame',
+                measure_type_detailed_defense='Base', timeout=config.REQUEST_TIMEOUT
+            ).get_data_frames()[0]
+            
+            # A small delay to be polite to the API
+            time.sleep(config.REQUEST_DELAY)
 
-    # Combine all seasons into one DataFrame and filter
-    final_df = pd.concat(all_seasons_data, ignore_index=True)
-    print("Filtering players based on minimum games and minutes...")
-    filtered_df = final_df[(final_df['GP'] >= config.MIN_GAMES_PLAYED) & (final_df['MIN'] >= config.MIN_AVG_MINUTES)].copy()
+            advanced_stats = leaguedashplayerstats.LeagueDashPlayerStats(
+                season=season, league_id_nullable=league_id, per_mode_detailed='PerGame',
+                measure_type_detailed_defense='Advanced', timeout=config.REQUEST_TIMEOUT
+            ).get_data_frames()[0]
+            
+            # Merge stats
+            merged_df = pd.merge(base_stats, advanced_stats[['PLAYER_ID', 'TS_PCT', 'USG_PCT']], on='PLAYER_ID', how='left')
+            merged_df['SEASON'] = season # Add season column
+            metrics.rows_out = len(merged_df)
+            print(f"    -> Successfully fetched and merged data for {season}.")
+            return merged_df
+        except Exception as e:
+            metrics.tags['error'] = str(e)
+            print(f"    -> ERROR: Could not fetch {league} data for season {season}: {e}")
+            return None
+
+def fetch_season_checkpointed(season, checkpoints=None, league=config.DEFAULT_LEAGUE):
+    """Fetches one season, reading it from and saving it to the run's checkpoints when given."""
+    if checkpoints is not None and checkpoints.has_part('fetch_season', season):
+        print(f"  Loaded season {season} from checkpoint.")
+        return checkpoints.load_part('fetch_season', season)
+    season_df = fetch_season_data(season, league)
+    if checkpoints is not None and season_df is not None:
+        checkpoints.save_part('fetch_season', season, season_df)
+    return season_df
+
+def clean_player_data(raw_df, league=config.DEFAULT_LEAGUE):
+    """Filters raw LeagueDashPlayerStats rows to the league's qualifying players, renames the columns and tags the league."""
+    import pandas as pd
+
+    thresholds = config.LEAGUES[league]
+    filtered_df = raw_df[(raw_df['GP'] >= thresholds['min_games_played'])
+                         & (raw_df['MIN'] >= thresholds['min_avg_minutes'])].copy()
 
     # Rename columns to a consistent format
     column_renames = {
@@ -79,40 +93,333 @@ def fetch_player_data():
     # Select and reorder final columns
     final_columns = list(column_renames.values())
     filtered_df = filtered_df[final_columns]
+    filtered_df['League'] = league
     
     # Data cleaning
     filtered_df['PlayerAge'] = pd.to_numeric(filtered_df['PlayerAge'], errors='coerce').astype('Int64')
+    return filtered_df
+
+def fetch_player_data(checkpoints=None, league=config.DEFAULT_LEAGUE):
+    """
+    Fetches, filters, and cleans player data for all of a league's seasons in parallel.
+
+    Args:
+        checkpoints (RunCheckpoints): If given, each fetched season is checkpointed, and
+            seasons already checkpointed by an earlier attempt of this run are not refetched.
+        league (str): Key in config.LEAGUES.
+
+    Returns:
+        pd.DataFrame: Qualifying player seasons. `attrs['missing_seasons']` lists the
+            seasons that could not be fetched.
+    """
+    import pandas as pd
+
+    print(f"Step 1: Fetching {league} Player Data from NBA API...")
+    seasons = config.LEAGUES[league]['seasons']
+    all_seasons_data = []
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        # Map the fetch function to each season
+        results = list(executor.map(lambda season: fetch_season_checkpointed(season, checkpoints, league), seasons))
+    
+    # Filter out None results from failed API calls
+    all_seasons_data = [result for result in results if result is not None]
+    missing_seasons = [season for season, result in zip(seasons, results) if result is None]
+
+    if not all_seasons_data:
+        print("FATAL: No data could be fetched from the API.")
+        return pd.DataFrame()
+
+    # Combine all seasons into one DataFrame and filter
+    final_df = pd.concat(all_seasons_data, ignore_index=True)
+    print("Filtering players based on minimum games and minutes...")
+    filtered_df = clean_player_data(final_df, league)
+    filtered_df.attrs['missing_seasons'] = missing_seasons
 
     print(f"Finished fetching data. Total players meeting criteria: {len(filtered_df)}")
     return filtered_df
 
-def main():
-    """Runs the full in-memory data pipeline."""
-    print("--- Starting the In-Memory Data Pipeline ---")
+def _load_or_compute(checkpoints, stage_name, compute):
+    """Returns a stage's {season: DataFrame} output from this run's checkpoint, or computes and checkpoints it."""
+    if checkpoints is not None and checkpoints.is_complete(stage_name):
+        print(f"Loaded '{stage_name}' output from checkpoint {checkpoints.run_id}.")
+        return checkpoints.load_frames(stage_name)
+    frames = compute()
+    if checkpoints is not None and frames:
+        checkpoints.save_frames(stage_name, frames)
+    return frames
+
+def main(checkpoints=None, league=config.DEFAULT_LEAGUE):
+    """
+    Runs the full in-memory data pipeline for one league.
+
+    Args:
+        checkpoints (RunCheckpoints): If given, every stage's output is checkpointed,
+            and stages completed by an earlier attempt of the same run are loaded
+            instead of rerun.
+        league (str): Key in config.LEAGUES.
+
+    Returns:
+        bool: False if the pipeline halted or seeding did not finish.
+    """
+    import pandas as pd
+    from process_and_calculate_z_scores import process_and_calc_zscores
+    from calculate_total_fantasy_scores import calculate_fantasy_scores
+    from seed import seed_data
+    from snapshots import publish_ranking_snapshots
+
+    print(f"--- Starting the In-Memory Data Pipeline ({league}) ---")
     
     # Step 1: Fetch raw data from the API
-    raw_player_df = fetch_player_data()
+    with stage('fetch', league=league) as metrics:
+        if checkpoints is not None and checkpoints.is_complete('fetch'):
+            print(f"Step 1: Loaded player data from checkpoint {checkpoints.run_id}.")
+            raw_player_df = checkpoints.load_frame('fetch')
+        else:
+            raw_player_df = fetch_player_data(checkpoints, league)
+            if checkpoints is not None and raw_player_df.attrs.get('missing_seasons'):
+                # Later stages built on partial data must not be reused; a resumed run
+                # refetches only the missing seasons and recomputes from there
+                print(f"Not checkpointing past the fetch: missing seasons {raw_player_df.attrs['missing_seasons']}.")
+                checkpoints = None
+            elif checkpoints is not None and not raw_player_df.empty:
+                checkpoints.save_frame('fetch', raw_player_df)
+        metrics.rows_out = len(raw_player_df)
 
     if raw_player_df.empty:
         print("Pipeline halted because no data was fetched.")
-        return
+        print_stage_summary()
+        return False
 
     # Step 2: Process data and calculate z-scores
-    z_score_dataframes = process_and_calc_zscores(raw_player_df)
+    with stage('z_scores', rows_in=len(raw_player_df)) as metrics:
+        z_score_dataframes = _load_or_compute(checkpoints, 'z_scores', lambda: process_and_calc_zscores(raw_player_df))
+        metrics.rows_out = sum(len(df) for df in z_score_dataframes.values())
 
     # Step 3: Calculate total fantasy scores
-    final_dataframes = calculate_fantasy_scores(z_score_dataframes)
+    with stage('fantasy_scores', rows_in=metrics.rows_out) as metrics:
+        final_dataframes = _load_or_compute(checkpoints, 'fantasy_scores',
+                                            lambda: calculate_fantasy_scores(z_score_dataframes))
+        metrics.rows_out = sum(len(df) for df in final_dataframes.values())
 
     # Step 4: Seed the database
     if not final_dataframes:
         print("Pipeline halted because no data was processed for seeding.")
-        return
+        print_stage_summary()
+        return False
 
     combined_final_df = pd.concat(final_dataframes.values(), ignore_index=True)
-    seed_data(combined_final_df) 
+    with stage('seed', rows_in=len(combined_final_df)):
+        seeded = seed_data(combined_final_df, checkpoints)
+
+    # Step 5: Publish the web API's ranking snapshots from the seeded tables
+    if seeded:
+        with stage('publish_snapshots', league=league):
+            published = publish_ranking_snapshots(league)
 
+    print_stage_summary()
+    if not seeded:
+        print(f"Seeding did not finish. Rerun with --resume {get_run_id()} to continue from the last acknowledged chunk.")
+        return False
+    if not published:
+        print(f"Publishing snapshots did not finish. Rerun with --resume {get_run_id()} to retry it.")
+        return False
     print("--- In-Memory Data Pipeline Completed Successfully ---")
+    return True
+
+def _season_seeded(checkpoints, season):
+    progress = checkpoints.progress(f'seed_{season}') if checkpoints is not None else {}
+    return 'stats_rows' in progress and progress.get('stats_rows_acked') == progress['stats_rows']
+
+def main_streaming(checkpoints=None, max_in_flight=config.STREAM_MAX_SEASONS_IN_FLIGHT, league=config.DEFAULT_LEAGUE):
+    """
+    Runs the pipeline one season at a time, overlapping network, CPU and database work.
+
+    Each season goes fetch -> filter/rename -> z-scores -> fantasy scores -> upsert as
+    soon as its data arrives, and the ranking snapshots are published once every
+    season is seeded. Fetches run in a thread pool, scoring on the main
+    thread and upserts on a single writer thread. At most `max_in_flight` seasons
+    are held in memory at once, so peak memory does not grow with the history length.
+    Z-scores and rankings are computed within each season, so the results match the
+    batch pipeline.
+
+    Args:
+        checkpoints (RunCheckpoints): If given, fetched seasons and per-season seeding
+            progress are checkpointed, and seasons fully seeded by an earlier attempt
+            of the same run are skipped.
+        max_in_flight (int): Seasons being fetched, scored or seeded at once.
+        league (str): Key in config.LEAGUES.
+
+    Returns:
+        bool: True if every season was fetched and seeded.
+    """
+    from process_and_calculate_z_scores import process_and_calc_zscores
+    from calculate_total_fantasy_scores import calculate_fantasy_scores
+    from seed import seed_data
+    from snapshots import publish_ranking_snapshots
+
+    print(f"--- Starting the Streaming Data Pipeline ({league}, {max_in_flight} seasons in flight) ---")
+    seasons = config.LEAGUES[league]['seasons']
+    pending = [season for season in seasons if not _season_seeded(checkpoints, season)]
+    if len(pending) < len(seasons):
+        print(f"Skipping {len(seasons) - len(pending)} seasons seeded by an earlier attempt.")
+    pending = iter(pending)
+    fetching, seeding = {}, {}
+    results = {}
+
+    def start_next_fetch():
+        season = next(pending, None)
+        if season is not None:
+            fetching[fetch_pool.submit(fetch_season_checkpointed, season, checkpoints, league)] = season
+
+    with stage('stream', league=league) as stream_metrics, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight) as fetch_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=1) as seed_pool:
+        stream_metrics.rows_out = 0
+        for _ in range(max_in_flight):
+            start_next_fetch()
+
+        while fetching or seeding:
+            done, _ = concurrent.futures.wait(list(fetching) + list(seeding),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future in seeding:
+                    season = seeding.pop(future)
+                    results[season] = future.result()
+                    start_next_fetch()
+                    continue
+
+                season = fetching.pop(future)
+                raw_season_df = future.result()
+                if raw_season_df is None:
+                    results[season] = False
+                    start_next_fetch()
+                    continue
+
+                # Score on this thread while other seasons download and upsert
+                season_df = clean_player_data(raw_season_df, league)
+                del raw_season_df
+                scored = calculate_fantasy_scores(process_and_calc_zscores(season_df)).get(season)
+                if scored is None or scored.empty:
+                    print(f"  No qualifying players for season {season}.")
+                    results[season] = True
+                    start_next_fetch()
+                    continue
+                stream_metrics.rows_out += len(scored)
+                seeding[seed_pool.submit(seed_data, scored, checkpoints, f'seed_{season}')] = season
+
+    failed = sorted(season for season, ok in results.items() if not ok)
+    # Snapshots are published once every season is seeded, so the API never mixes runs
+    if not failed:
+        with stage('publish_snapshots', league=league):
+            published = publish_ranking_snapshots(league)
+
+    print_stage_summary()
+    if failed:
+        print(f"Seasons that did not finish: {failed}. Rerun with --stream --resume {get_run_id()} to retry them.")
+        return False
+    if not published:
+        print(f"Publishing snapshots did not finish. Rerun with --stream --resume {get_run_id()} to retry it.")
+        return False
+    print("--- Streaming Data Pipeline Completed Successfully ---")
+    return True
+
+def run_leagues(leagues, child_args):
+    """
+    Runs each league's pipeline in its own worker process, one league after another.
+
+    Each worker is this script restricted to one league, so leagues share no memory,
+    and a failure in one league does not stop the others. The workers run in turn
+    rather than at once, so the NBA API sees one league's request rate, as it does from
+    the scheduler's single-slot nba_api pool. Output lines are prefixed with the league.
+
+    Args:
+        leagues (list): Keys in config.LEAGUES.
+        child_args (list): Command-line arguments passed to every worker.
+
+    Returns:
+        dict: Exit code per league.
+    """
+    from pipeline import _stream_output
+
+    # Workers inherit the run id, so their checkpoints and metrics land in this run
+    get_run_id()
+    returncodes = {}
+    with stage('leagues', leagues=leagues) as metrics:
+        for league in leagues:
+            process = subprocess.Popen(
+                [sys.executable, '-u', os.path.abspath(__file__), '--leagues', league, *child_args],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+            _stream_output(league, process.stdout)
+            returncodes[league] = process.wait()
+        metrics.tags['returncodes'] = returncodes
+    return returncodes
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Fetch, score and seed player stats for every configured season.")
+    parser.add_argument('--leagues', nargs='+', choices=list(config.LEAGUES), default=config.PIPELINE_LEAGUES,
+                        help="Leagues to process, one after another, each in its own worker process (default: %(default)s).")
+    parser.add_argument('--resume', nargs='?', const='latest', default=None, metavar='RUN_ID',
+                        help="Resume a failed run from its checkpoints (default: the most recent one).")
+    parser.add_argument('--keep-checkpoints', action='store_true',
+                        help="Keep this run's checkpoints after it succeeds.")
+    parser.add_argument('--no-checkpoints', action='store_true', help="Don't write or read checkpoints.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--stream', action='store_true',
+                      help="Process and seed each season as soon as it is fetched, holding only a few in memory.")
+    mode.add_argument('--async', dest='use_async', action='store_true',
+                      help="Like --stream, but every season's requests are multiplexed on one asyncio event loop.")
+    parser.add_argument('--max-seasons-in-flight', type=int, default=None,
+                        help=f"Seasons held at once in --stream (default: {config.STREAM_MAX_SEASONS_IN_FLIGHT}) "
+                             f"or --async (default: {config.ASYNC_MAX_SEASONS_IN_FLIGHT}) mode.")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    apply_profiling_arguments(args)
+    leagues = list(dict.fromkeys(args.leagues))
+    if args.max_seasons_in_flight is None:
+        args.max_seasons_in_flight = (config.ASYNC_MAX_SEASONS_IN_FLIGHT if args.use_async
+                                      else config.STREAM_MAX_SEASONS_IN_FLIGHT)
+
+    if args.resume and not args.no_checkpoints:
+        run_id = latest_run_id() if args.resume == 'latest' else args.resume
+        if run_id is None:
+            print("No checkpointed run found to resume; starting a new run.")
+        else:
+            # Reusing the run id points every stage at the earlier attempt's checkpoints
+            os.environ['PIPELINE_RUN_ID'] = run_id
+            print(f"Resuming run {run_id}.")
+
+    if len(leagues) > 1:
+        # Workers keep their checkpoints; they are removed below once every league succeeded
+        child_args = ['--keep-checkpoints']
+        if args.no_checkpoints:
+            child_args.append('--no-checkpoints')
+        if args.stream:
+            child_args += ['--stream', '--max-seasons-in-flight', str(args.max_seasons_in_flight)]
+        elif args.use_async:
+            child_args += ['--async', '--max-seasons-in-flight', str(args.max_seasons_in_flight)]
+        returncodes = run_leagues(leagues, child_args)
+        failed = [league for league, returncode in returncodes.items() if returncode != 0]
+        print_stage_summary()
+        succeeded = not failed
+        if failed:
+            print(f"Leagues that did not finish: {failed}. Rerun with --resume {get_run_id()} to continue them.")
+        elif not args.no_checkpoints and not args.keep_checkpoints:
+            RunCheckpoints(get_run_id()).remove()
+    else:
+        checkpoints = None if args.no_checkpoints else RunCheckpoints(get_run_id(), league=leagues[0])
+        if args.use_async:
+            import asyncio
+            from async_pipeline import main_async
+            succeeded = asyncio.run(main_async(checkpoints, args.max_seasons_in_flight, leagues[0]))
+        elif args.stream:
+            succeeded = main_streaming(checkpoints, args.max_seasons_in_flight, leagues[0])
+        else:
+            succeeded = main(checkpoints, leagues[0])
+        if succeeded and checkpoints is not None and not args.keep_checkpoints:
+            checkpoints.remove()
 
+    # A non-zero exit lets pipeline.py hold back the stages that need fresh data
+    if not succeeded:
+        sys.exit(1)
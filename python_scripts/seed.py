@@ -1,74 +1,119 @@
-import os
-import pandas as pd
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from db_connector import get_supabase_client
 
-# --- DATABASE SETUP ---
-# Initialize Supabase client
-load_dotenv()
-url: str = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
-key: str = os.environ.get("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+STATS_CHUNK_SIZE = 500  # Player stat records per upsert request
 
-if not url or not key:
-    raise ValueError("Supabase URL and service key must be set in the python_scripts/.env file.")
+# Maps the pipeline's column names onto the player_stats_by_season columns
+STATS_COLUMN_MAPPING = {
+    'PlayerAge': 'player_age', 'Team': 'team', 'GamesPlayed': 'games_played', 'AvgMinutes': 'avg_minutes',
+    'Points': 'points', 'Rebounds': 'rebounds', 'Assists': 'assists', 'Steals': 'steals', 'Blocks': 'blocks',
+    'Turnovers': 'turnovers', 'FieldGoalPct': 'field_goal_pct', 'FreeThrowPct': 'free_throw_pct',
+    'ThreePointPct': 'three_point_pct', 'ThreePointersMade': 'three_pointers_made', 'ThreePointAttempts': 'three_point_attempts',
+    'FieldGoalsMade': 'field_goals_made', 'FieldGoalAttempts': 'field_goal_attempts', 'FreeThrowsMade': 'free_throws_made',
+    'FreeThrowAttempts': 'free_throw_attempts', 'TrueShootingPct': 'true_shooting_pct', 'UsageRate': 'usage_rate',
+    'Points_ZScore': 'points_z_score', 'Rebounds_ZScore': 'rebounds_z_score', 'Assists_ZScore': 'assists_z_score',
+    'Steals_ZScore': 'steals_z_score', 'Blocks_ZScore': 'blocks_z_score', 'FieldGoalPct_ZScore': 'field_goal_pct_z_score',
+    'ThreePointersMade_ZScore': 'three_pointers_made_z_score', 'FreeThrowPct_ZScore': 'free_throw_pct_z_score',
+    'Turnovers_ZScore': 'turnovers_z_score', 'Swish_Score': 'swish_score', 'Overall_Rank': 'overall_rank',
+    'player_id': 'player_id', 'Season': 'season', 'League': 'league'
+}
 
-supabase: Client = create_client(url, key)
+def league_of(df):
+    """Returns the league of a frame of one league's player stats (NBA if it has no 'League' column)."""
+    return df['League'].iloc[0] if 'League' in df.columns and not df.empty else 'nba'
 
-def seed_data(df):
-    """Seeds the Supabase database with a combined DataFrame of player stats."""
-    print("Step 4: Seeding data to Supabase...")
+def build_player_records(df, league):
+    """Returns one 'players' row per unique player name in the frame."""
+    player_id_mapping = df.drop_duplicates(subset=['PlayerName']).set_index('PlayerName')['PlayerID'].to_dict()
+    return [{'league': league, 'full_name': name, 'nba_player_id': player_id_mapping.get(name)}
+            for name in df['PlayerName'].unique()]
+
+def build_stats_records(df):
+    """
+    Returns the frame as player_stats_by_season rows; `df` must already have its 'player_id' column.
+
+    Missing values (stats a historical season did not record, an unknown age) are sent
+    as NULL, since NaN is not valid JSON.
+    """
+    cols_to_select = [col for col in STATS_COLUMN_MAPPING.keys() if col in df.columns]
+    records = df[cols_to_select].rename(columns=STATS_COLUMN_MAPPING)
+    return records.astype(object).where(records.notna(), None).to_dict('records')
+
+def seed_data(df, checkpoints=None, progress_stage='seed'):
+    """
+    Seeds the Supabase database with a combined DataFrame of player stats.
+
+    Stats are written through the upsert_player_stats database function, which keeps
+    each season's season_catalog entry (row count, last refresh) current in the same
+    transaction as the chunk.
+
+    Args:
+        df (pd.DataFrame): Combined player stats with z-scores and swish scores, all from
+            one league (its 'League' column; NBA if absent).
+        checkpoints (RunCheckpoints): If given, acknowledged work is recorded so a
+            rerun of the same run skips the player upsert and resumes the stat upserts
+            after the last chunk that succeeded.
+        progress_stage (str): Name the progress is recorded under, so callers that seed
+            one season at a time keep separate progress per season.
+
+    Returns:
+        bool: True if every record was upserted.
+    """
+    league = league_of(df)
+    print(f"Step 4: Seeding {league} data to Supabase...")
+    # Writes go through the admin (service role) pool
+    supabase = get_supabase_client(admin=True)
+    progress = checkpoints.progress(progress_stage) if checkpoints is not None else {}
 
     # 1. Upsert players into the 'players' table
-    player_id_mapping = df.drop_duplicates(subset=['PlayerName']).set_index('PlayerName')['PlayerID'].to_dict()
-    player_records = [{'full_name': name, 'nba_player_id': player_id_mapping.get(name)} for name in df['PlayerName'].unique()]
+    player_records = build_player_records(df, league)
     
-    print(f"  Upserting {len(player_records)} unique players...")
-    try:
-        supabase.table('players').upsert(player_records, on_conflict='full_name').execute()
-        print("    -> Players upserted successfully.")
-    except Exception as e:
-        print(f"    -> FATAL: Error upserting players: {e}")
-        return
+    if progress.get('players_done'):
+        print(f"  Skipping the upsert of {len(player_records)} players; it was acknowledged in an earlier attempt.")
+    else:
+        print(f"  Upserting {len(player_records)} unique players...")
+        try:
+            supabase.table('players').upsert(player_records, on_conflict='league, full_name').execute()
+            print("    -> Players upserted successfully.")
+            if checkpoints is not None:
+                checkpoints.set_progress(progress_stage, players_done=True)
+        except Exception as e:
+            print(f"    -> FATAL: Error upserting players: {e}")
+            return False
 
     # 2. Fetch player IDs to map names to foreign keys
     print("  Fetching player IDs for foreign key mapping...")
     try:
-        all_players_response = supabase.table('players').select('player_id, full_name').in_('full_name', df['PlayerName'].unique().tolist()).execute()
+        all_players_response = supabase.table('players').select('player_id, full_name').eq('league', league).in_('full_name', df['PlayerName'].unique().tolist()).execute()
         player_id_map = {p['full_name']: p['player_id'] for p in all_players_response.data}
         df['player_id'] = df['PlayerName'].map(player_id_map)
         print(f"    -> Successfully mapped {len(df) - df['player_id'].isna().sum()} of {len(df)} players to IDs.")
     except Exception as e:
         print(f"    -> FATAL: Error fetching player IDs: {e}")
-        return
+        return False
 
     # 3. Prepare and upsert player stats data
-    column_mapping = {
-        'PlayerAge': 'player_age', 'Team': 'team', 'GamesPlayed': 'games_played', 'AvgMinutes': 'avg_minutes',
-        'Points': 'points', 'Rebounds': 'rebounds', 'Assists': 'assists', 'Steals': 'steals', 'Blocks': 'blocks',
-        'Turnovers': 'turnovers', 'FieldGoalPct': 'field_goal_pct', 'FreeThrowPct': 'free_throw_pct',
-        'ThreePointPct': 'three_point_pct', 'ThreePointersMade': 'three_pointers_made', 'ThreePointAttempts': 'three_point_attempts',
-        'FieldGoalsMade': 'field_goals_made', 'FieldGoalAttempts': 'field_goal_attempts', 'FreeThrowsMade': 'free_throws_made',
-        'FreeThrowAttempts': 'free_throw_attempts', 'TrueShootingPct': 'true_shooting_pct', 'UsageRate': 'usage_rate',
-        'Points_ZScore': 'points_z_score', 'Rebounds_ZScore': 'rebounds_z_score', 'Assists_ZScore': 'assists_z_score',
-        'Steals_ZScore': 'steals_z_score', 'Blocks_ZScore': 'blocks_z_score', 'FieldGoalPct_ZScore': 'field_goal_pct_z_score',
-        'ThreePointersMade_ZScore': 'three_pointers_made_z_score', 'FreeThrowPct_ZScore': 'free_throw_pct_z_score',
-        'Turnovers_ZScore': 'turnovers_z_score', 'Swish_Score': 'swish_score', 'Overall_Rank': 'overall_rank',
-        'player_id': 'player_id', 'Season': 'season'
-    }
-    
-    cols_to_select = [col for col in column_mapping.keys() if col in df.columns]
-    stats_df = df[cols_to_select].rename(columns=column_mapping)
-    stats_records = stats_df.to_dict('records')
+    stats_records = build_stats_records(df)
+    chunk_size = STATS_CHUNK_SIZE
+    # Resume after the last acknowledged chunk, unless the records changed since then
+    start = 0
+    if progress.get('stats_rows') == len(stats_records):
+        start = progress.get('stats_rows_acked', 0)
+        if start:
+            print(f"  Resuming after {start} player stat records acknowledged in an earlier attempt.")
 
-    print(f"  Upserting {len(stats_records)} player stat records...")
+    print(f"  Upserting {len(stats_records) - start} player stat records...")
     try:
-        chunk_size = 500
-        for i in range(0, len(stats_records), chunk_size):
+        for i in range(start, len(stats_records), chunk_size):
             chunk = stats_records[i:i + chunk_size]
-            supabase.table('player_stats_by_season').upsert(chunk, on_conflict='player_id, season').execute()
+            # Also refreshes the season_catalog entries of the chunk's seasons, in the same transaction
+            supabase.rpc('upsert_player_stats', {'p_rows': chunk}).execute()
+            if checkpoints is not None:
+                checkpoints.set_progress(progress_stage, stats_rows=len(stats_records), stats_rows_acked=i + len(chunk))
         print("    -> Player stats upserted successfully.")
     except Exception as e:
         print(f"    -> FATAL: Error upserting player stats: {e}")
+        return False
 
     print("Finished seeding data.")
+    return True
 
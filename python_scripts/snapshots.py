@@ -0,0 +1,144 @@
+"""
+Publishes precomputed per-season ranking snapshots for the web API.
+
+A snapshot is one season's rankings exactly as `/api/seasons/[season]/total_rankings`
+returns them (stats joined with the player's name, best swish score first) plus a
+`rank` field, serialized as gzip-compressed JSON. Its version is a hash of the JSON, so:
+
+  - it is stored under a new path whenever its content changes,
+    `<league>/<season>/<version>.json.gz` in the RANKING_SNAPSHOT_BUCKET storage bucket,
+    and is never modified after that;
+  - the version doubles as the route's ETag;
+  - republishing unchanged data is a no-op.
+
+The `ranking_snapshots` table points each league's season at its current snapshot,
+and is updated only after the upload succeeds; the version is also copied to the
+season's `season_catalog` entry. run_pipeline.py publishes every season
+of a league once it is seeded; run this script to republish without rerunning it.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+from datetime import datetime, timezone
+
+import config
+from db_connector import get_supabase_client
+
+# The columns the total_rankings route selected from the database before snapshots
+RANKING_COLUMNS = (
+    'player_id, season, team, player_age, games_played, avg_minutes, points, rebounds, assists, steals, blocks, '
+    'turnovers, swish_score, usage_rate, field_goals_made, field_goal_attempts, three_pointers_made, '
+    'three_point_attempts, free_throws_made, free_throw_attempts, true_shooting_pct, field_goal_pct, free_throw_pct, '
+    'players ( full_name ), points_z_score, rebounds_z_score, assists_z_score, steals_z_score, blocks_z_score, '
+    'turnovers_z_score, field_goal_pct_z_score, three_pointers_made_z_score, free_throw_pct_z_score'
+)
+
+def build_ranking_snapshot(rows):
+    """
+    Serializes one season's ranking rows as a snapshot.
+
+    Args:
+        rows (list): player_stats_by_season rows with the joined `players` name,
+                     ordered by swish score, best first.
+
+    Returns:
+        tuple: (version, gzip-compressed JSON bytes). The version is derived from the
+               uncompressed JSON, so identical rankings always get the same version.
+    """
+    rankings, ranked = [], 0
+    for row in rows:
+        stats = {key: value for key, value in row.items() if key != 'players'}
+        # Players without a swish score are unranked
+        rank = None
+        if stats.get('swish_score') is not None:
+            ranked += 1
+            rank = ranked
+        rankings.append({**stats, 'Player': (row.get('players') or {}).get('full_name') or 'Unknown Player',
+                         'rank': rank})
+
+    body = json.dumps(rankings, separators=(',', ':')).encode('utf-8')
+    version = hashlib.sha256(body).hexdigest()[:16]
+    # mtime=0 keeps the compressed bytes identical for identical content
+    return version, gzip.compress(body, compresslevel=9, mtime=0)
+
+def _set_catalog_version(supabase, league, season, version):
+    """Records the season's current snapshot version in its season_catalog entry."""
+    (supabase.table('season_catalog').update({'snapshot_version': version})
+     .eq('league', league).eq('season', season).execute())
+
+def publish_season_snapshot(supabase, league, season):
+    """
+    Builds one season's snapshot from the database and publishes it if it changed.
+
+    Returns:
+        str: The season's current snapshot version, or None if the season has no rows.
+    """
+    rows = (supabase.table('player_stats_by_season').select(RANKING_COLUMNS)
+            .eq('league', league).eq('season', season)
+            # player_id breaks ties, so unchanged data always serializes (and hashes) the same
+            .order('swish_score', desc=True).order('player_id').execute().data)
+    if not rows:
+        print(f"  No {league} rankings for season {season}; nothing to publish.")
+        return None
+
+    version, payload = build_ranking_snapshot(rows)
+    current = (supabase.table('ranking_snapshots').select('version')
+               .eq('league', league).eq('season', season).execute().data)
+    if current and current[0]['version'] == version:
+        print(f"  {league} {season}: snapshot {version} is unchanged.")
+        _set_catalog_version(supabase, league, season, version)
+        return version
+
+    path = f"{league}/{season}/{version}.json.gz"
+    # The path is unique to the content, so overwriting an upload left by a failed attempt is harmless
+    supabase.storage.from_(config.RANKING_SNAPSHOT_BUCKET).upload(path, payload, file_options={
+        'content-type': 'application/gzip', 'cache-control': str(config.RANKING_SNAPSHOT_MAX_AGE), 'upsert': 'true'})
+    supabase.table('ranking_snapshots').upsert({
+        'league': league, 'season': season, 'version': version, 'path': path, 'row_count': len(rows),
+        'size_bytes': len(payload), 'published_at': datetime.now(timezone.utc).isoformat(),
+    }, on_conflict='league, season').execute()
+    _set_catalog_version(supabase, league, season, version)
+    print(f"  {league} {season}: published snapshot {version} ({len(rows)} players, {len(payload) / 1024:.1f} KB).")
+    return version
+
+def publish_ranking_snapshots(league=config.DEFAULT_LEAGUE, seasons=None):
+    """
+    Publishes the ranking snapshot of each season of a league.
+
+    Args:
+        league (str): Key in config.LEAGUES.
+        seasons (list): Seasons to publish (default: all of the league's seasons).
+
+    Returns:
+        bool: True if every season was published or already current.
+    """
+    seasons = config.LEAGUES[league]['seasons'] if seasons is None else seasons
+    print(f"Step 5: Publishing {league} ranking snapshots...")
+    try:
+        # Uploading to storage needs the service role key
+        supabase = get_supabase_client(admin=True)
+    except Exception as e:
+        print(f"    -> FATAL: Could not connect to publish snapshots: {e}")
+        return False
+    failed = []
+    for season in seasons:
+        try:
+            publish_season_snapshot(supabase, league, season)
+        except Exception as e:
+            failed.append(season)
+            print(f"    -> ERROR: Could not publish the {league} {season} snapshot: {e}")
+    if failed:
+        print(f"Snapshots not published for seasons {failed}; the API keeps serving their previous version.")
+        return False
+    print("Finished publishing ranking snapshots.")
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Publish per-season ranking snapshots for the web API.")
+    parser.add_argument('--leagues', nargs='+', choices=list(config.LEAGUES), default=config.PIPELINE_LEAGUES)
+    parser.add_argument('--seasons', nargs='+', default=None, help="Seasons to publish (default: every configured season).")
+    args = parser.parse_args()
+    results = [publish_ranking_snapshots(league, args.seasons) for league in args.leagues]
+    if not all(results):
+        raise SystemExit(1)
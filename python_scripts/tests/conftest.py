@@ -0,0 +1,40 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Stage metrics from test runs stay out of the repo's metrics/ log
+os.environ['PIPELINE_METRICS_FILE'] = ''
+
+
+def _load_config():
+    # predmodel and python_scripts each have a flat `config` module, so the one of the
+    # package under test is swapped into sys.modules around its tests
+    spec = importlib.util.spec_from_file_location('config', os.path.join(PACKAGE_DIR, 'config.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _activate(config_module):
+    if PACKAGE_DIR in sys.path:
+        sys.path.remove(PACKAGE_DIR)
+    sys.path.insert(0, PACKAGE_DIR)
+    sys.modules['config'] = config_module
+
+
+CONFIG = _load_config()
+
+
+def pytest_pycollect_makemodule(module_path, parent):
+    # Test modules import the package's scripts when they are collected
+    _activate(CONFIG)
+
+
+@pytest.fixture(autouse=True)
+def package_config():
+    _activate(CONFIG)
+    yield CONFIG
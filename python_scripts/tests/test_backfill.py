@@ -0,0 +1,127 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backfill
+
+# LeagueLeaders headers, which are the same for every season
+LEADERS_HEADERS = ['PLAYER_ID', 'RANK', 'PLAYER', 'TEAM_ID', 'TEAM', 'GP', 'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M',
+                   'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV',
+                   'PF', 'PTS', 'EFF', 'AST_TOV', 'STL_TOV']
+
+
+def _leaders_frame(season, players=12, unrecorded=('FG3M', 'FG3A', 'FG3_PCT', 'STL', 'BLK', 'TOV')):
+    """A LeagueLeaders result for an early season: unrecorded stats are present but all None."""
+    rng = np.random.default_rng(players)
+    rows = []
+    for i in range(players):
+        fga, fta = rng.uniform(5, 20), rng.uniform(1, 8)
+        fgm, ftm = fga * rng.uniform(0.3, 0.5), fta * rng.uniform(0.6, 0.9)
+        rows.append({
+            'PLAYER_ID': 1000 + i, 'RANK': i + 1, 'PLAYER': f'Player {i}', 'TEAM_ID': 1, 'TEAM': 'BOS',
+            'GP': int(rng.integers(60, 82)), 'MIN': rng.uniform(30, 45), 'FGM': fgm, 'FGA': fga,
+            'FG_PCT': fgm / fga, 'FG3M': 0, 'FG3A': 0, 'FG3_PCT': 0, 'FTM': ftm, 'FTA': fta, 'FT_PCT': ftm / fta,
+            'OREB': None, 'DREB': None, 'REB': rng.uniform(2, 15), 'AST': rng.uniform(1, 8), 'STL': 0,
+            'BLK': 0, 'TOV': 0, 'PF': rng.uniform(1, 4), 'PTS': 2 * fgm + ftm, 'EFF': 10.0, 'AST_TOV': None,
+            'STL_TOV': None,
+        })
+    frame = pd.DataFrame(rows, columns=LEADERS_HEADERS)
+    for column in unrecorded:
+        frame[column] = pd.Series([None] * players, dtype=object)
+    season_df = backfill.normalize_leaders_stats(frame)
+    season_df['SEASON'] = season
+    return season_df
+
+
+def test_season_without_steals_blocks_or_threes_is_scored():
+    scored = backfill.score_season(backfill.clean_season_stats(_leaders_frame('1960-61')))
+
+    assert len(scored) == 12
+    for stat in ('Steals', 'Blocks', 'Turnovers', 'ThreePointersMade'):
+        assert (scored[f'{stat}_ZScore'] == 0).all()
+    assert scored['Swish_Score'].notna().all()
+    assert sorted(scored['Overall_Rank']) == list(range(1, 13))
+
+
+def test_season_without_minutes_qualifies_on_games_played():
+    raw = _leaders_frame('1949-50', unrecorded=('MIN', 'FG3M', 'FG3A', 'FG3_PCT', 'STL', 'BLK', 'TOV'))
+    scored = backfill.score_season(backfill.clean_season_stats(raw))
+
+    assert len(scored) == 12
+    assert scored['AvgMinutes'].isna().all()
+    assert scored['Swish_Score'].notna().all()
+
+
+def test_partitions_round_trip_by_season(tmp_path, monkeypatch):
+    monkeypatch.setattr(backfill, 'HISTORY_DIR', str(tmp_path))
+    backfill.write_partition('player_stats', '1960-61', pd.DataFrame({'Season': ['1960-61'], 'Points': [30.0]}))
+    backfill.write_partition('player_stats', '1961-62', pd.DataFrame({'Season': ['1961-62'], 'Points': [50.0]}))
+
+    assert (tmp_path / 'player_stats' / 'season=1960-61' / 'part.parquet').exists()
+    history = backfill.read_history('player_stats')
+    assert history['Season'].tolist() == ['1960-61', '1961-62']
+    assert backfill.read_history('player_stats', ['1961-62'])['Points'].tolist() == [50.0]
+
+
+def test_parse_season_range():
+    assert backfill.parse_season_range('1994-95:1996-97') == ['1994-95', '1995-96', '1996-97']
+    assert backfill.parse_season_range('1960-61') == ['1960-61']
+    with pytest.raises(ValueError):
+        backfill.parse_season_range('1940-41:1950-51')
+
+
+class _Query:
+    def __init__(self, client, table=None, rpc=None, payload=None):
+        self.client, self.table, self.rpc, self.payload = client, table, rpc, payload
+        self.filters = {}
+
+    def upsert(self, payload, on_conflict=None):
+        self.payload = payload
+        return self
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = values
+        return self
+
+    def execute(self):
+        # The HTTP client encodes request bodies like this, so NaN fails before sending
+        json.dumps(self.payload, allow_nan=False)
+        self.client.calls.append((self.table or self.rpc, self.payload))
+        names = self.filters.get('full_name', [])
+        return type('Response', (), {'data': [{'full_name': name, 'player_id': f'id-{name}'} for name in names]})
+
+
+class _FakeSupabase:
+    def __init__(self):
+        self.calls = []
+
+    def table(self, name):
+        return _Query(self, table=name)
+
+    def rpc(self, name, params):
+        return _Query(self, rpc=name, payload=params)
+
+
+def test_scored_pre_1996_season_seeds_without_nan(monkeypatch):
+    import seed
+
+    supabase = _FakeSupabase()
+    monkeypatch.setattr(seed, 'get_supabase_client', lambda *args, **kwargs: supabase)
+    raw = _leaders_frame('1949-50', unrecorded=('MIN', 'FG3M', 'FG3A', 'FG3_PCT', 'STL', 'BLK', 'TOV'))
+    scored = backfill.score_season(backfill.clean_season_stats(raw))
+
+    assert seed.seed_data(scored)
+
+    stats_rows = [row for name, payload in supabase.calls if name == 'upsert_player_stats' for row in payload['p_rows']]
+    assert len(stats_rows) == len(scored)
+    assert all(row['steals'] is None and row['avg_minutes'] is None and row['usage_rate'] is None
+               for row in stats_rows)
+    assert all(row['player_age'] is None and row['league'] == 'nba' for row in stats_rows)
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from checkpoints import RunCheckpoints, latest_run_id
+
+
+def test_completed_stage_loads_its_parts_in_order(tmp_path):
+    checkpoints = RunCheckpoints('run-1', root=str(tmp_path))
+    frames = {'2024-25': pd.DataFrame({'x': [1, 2]}), '2023-24': pd.DataFrame({'x': [3]})}
+
+    assert not checkpoints.is_complete('z_scores')
+    checkpoints.save_frames('z_scores', frames)
+
+    reloaded = RunCheckpoints('run-1', root=str(tmp_path))
+    assert reloaded.is_complete('z_scores')
+    loaded = reloaded.load_frames('z_scores')
+    assert list(loaded) == ['2024-25', '2023-24']
+    pd.testing.assert_frame_equal(loaded['2024-25'], frames['2024-25'])
+
+
+def test_parts_without_a_complete_marker_are_resumable(tmp_path):
+    checkpoints = RunCheckpoints('run-1', root=str(tmp_path))
+    checkpoints.save_part('fetch_season', '2024-25', pd.DataFrame({'x': [1]}))
+
+    assert checkpoints.has_part('fetch_season', '2024-25')
+    assert not checkpoints.has_part('fetch_season', '2023-24')
+    assert not checkpoints.is_complete('fetch_season')
+
+
+def test_progress_is_merged(tmp_path):
+    checkpoints = RunCheckpoints('run-1', root=str(tmp_path))
+    assert checkpoints.progress('seed') == {}
+
+    checkpoints.set_progress('seed', players_done=True)
+    checkpoints.set_progress('seed', stats_rows=10, stats_rows_acked=5)
+
+    assert checkpoints.progress('seed') == {'players_done': True, 'stats_rows': 10, 'stats_rows_acked': 5}
+
+
+def test_leagues_of_a_run_are_kept_apart(tmp_path):
+    nba = RunCheckpoints('run-1', root=str(tmp_path), league='nba')
+    wnba = RunCheckpoints('run-1', root=str(tmp_path), league='wnba')
+    nba.set_progress('seed', players_done=True)
+
+    assert wnba.progress('seed') == {}
+    assert latest_run_id(str(tmp_path)) == 'run-1'
+
+    nba.remove()
+    assert (tmp_path / 'run-1').exists() is False
+    assert latest_run_id(str(tmp_path)) is None
+    assert wnba.progress('seed') == {}
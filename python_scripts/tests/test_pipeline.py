@@ -0,0 +1,33 @@
+import os
+
+import pipeline
+
+
+def test_stage_inputs_follow_imports_into_shared_modules():
+    inputs = pipeline.stage_inputs('game_model')
+
+    assert 'predmodel/train_game_model.py' in inputs
+    assert 'python_scripts/db_connector.py' in inputs
+    # predmodel scripts import their own config, even through python_scripts modules
+    assert 'predmodel/config.py' in inputs
+    assert 'python_scripts/config.py' not in inputs
+
+
+def test_stage_inputs_include_lazily_imported_modules():
+    inputs = pipeline.stage_inputs('seed')
+
+    for module in ('seed', 'snapshots', 'async_pipeline', 'checkpoints', 'db_connector', 'instrumentation'):
+        assert f'python_scripts/{module}.py' in inputs
+
+
+def test_every_stage_input_exists():
+    for name in pipeline.STAGES:
+        for path in pipeline.stage_inputs(name):
+            assert os.path.isfile(os.path.join(pipeline.REPO_ROOT, path)), path
+
+
+def test_topological_order_puts_dependencies_first():
+    order = pipeline.topological_order(set(pipeline.STAGES))
+    for name in order:
+        for dep in pipeline.STAGES[name]['deps']:
+            assert order.index(dep) < order.index(name)
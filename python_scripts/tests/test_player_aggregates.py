@@ -0,0 +1,78 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import player_aggregates
+
+
+def _game_logs(players=12, games=30, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(players):
+        frame = pd.DataFrame({
+            'player_id': f'player-{i:02d}',
+            'game_date': pd.date_range('2023-10-24', periods=games, freq='3D').strftime('%Y-%m-%d'),
+            'opponent': np.where(np.arange(games) % 2 == 0, 'LAL vs. BOS', 'LAL @ BOS'),
+            'win_loss': np.where(rng.random(games) < 0.5, 'W', 'L'),
+        })
+        for stat in player_aggregates.COUNTING_STATS:
+            frame[stat] = rng.integers(0, 30, games)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _stream(logs, rows):
+    def stream_game_logs(columns, league='nba', chunk_rows=None, **kwargs):
+        for start in range(0, len(logs), rows):
+            yield logs.iloc[start:start + rows][columns].reset_index(drop=True)
+    return stream_game_logs
+
+
+def _canonical(frame):
+    return json.dumps(frame.sort_values('player_id').to_dict('records'), sort_keys=True, default=str)
+
+
+def test_chunked_aggregates_match_a_single_pass(monkeypatch):
+    logs = _game_logs()
+    monkeypatch.setattr(player_aggregates, 'stream_game_logs', _stream(logs, 47))
+
+    chunked = pd.concat([player_aggregates.compute_player_aggregates(games)
+                         for games in player_aggregates.iter_player_games()], ignore_index=True)
+
+    assert _canonical(chunked) == _canonical(player_aggregates.compute_player_aggregates(logs))
+
+
+def test_aggregates_are_stored_as_each_chunk_finishes(monkeypatch):
+    logs = _game_logs()
+    monkeypatch.setattr(player_aggregates, 'stream_game_logs', _stream(logs, 100))
+    batches = []
+
+    def upsert_in_chunks(table, df, on_conflict, chunk_size):
+        batches.append(len(df))
+        return {'rows': len(df), 'failed_offsets': []}
+
+    monkeypatch.setattr(player_aggregates, 'upsert_in_chunks', upsert_in_chunks)
+
+    assert player_aggregates.build_player_aggregates()
+    assert sum(batches) == 12
+    assert len(batches) > 1 and max(batches) < 12
+
+
+def test_form_and_splits():
+    logs = _game_logs(players=1, games=20)
+    row = player_aggregates.compute_player_aggregates(logs).iloc[0]
+
+    assert row['games_played'] == 20
+    assert set(row['form']) == {f'last_{window}' for window in player_aggregates.config.PLAYER_FORM_WINDOWS}
+    last_5 = logs.tail(5)['points'].mean()
+    assert row['form']['last_5']['points'] == round(last_5, 3)
+    assert row['splits']['home']['games'] + row['splits']['away']['games'] == 20
+    assert list(row['seasons']) == ['2023-24']
+
+
+def test_season_labels():
+    dates = pd.Series(pd.to_datetime(['2023-10-24', '2024-04-14', '2020-10-11', '2024-10-22']))
+
+    assert player_aggregates.season_labels(dates).tolist() == ['2023-24', '2023-24', '2019-20', '2024-25']
+    assert player_aggregates.season_labels(dates, 'wnba').tolist() == ['2023', '2024', '2020', '2024']